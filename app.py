@@ -1,29 +1,20 @@
 import streamlit as st
-from langchain.memory import ConversationBufferMemory
-from src.populate_database import load_pinecone
-from src.utils.chains import create_conversation_chain
+from src.resources import get_streaming_chain, get_history_summarizer
+from src.conversation_memory import SummaryBufferMemory
 from src.htmlTemplates import css, bot_template, user_template
-from src.config import DOCUMENT_TYPES, MEMORY_K
+from src.config import DOCUMENT_TYPES, DEBUG
 
 def setup():
     st.set_page_config(page_title="LegisChat", page_icon="⚖️")
     st.write(css, unsafe_allow_html=True)
     st.header("Chat con Documentos Legales ⚖️")
     
-    # Cargar vectorstore una sola vez
-    if "vectorstore" not in st.session_state:
-        st.session_state.vectorstore = load_pinecone()
-    
     if "chat_history" not in st.session_state:
         st.session_state.chat_history = []
     
+    # Memoria acotada por tokens: últimos turnos literales y un resumen incremental del resto
     if "memory" not in st.session_state:
-        st.session_state.memory = ConversationBufferMemory(
-            memory_key="chat_history",
-            return_messages=True,
-            output_key="answer",
-            k=MEMORY_K                    
-        )
+        st.session_state.memory = SummaryBufferMemory(get_history_summarizer())
     
     if "selected_sources" not in st.session_state:
         st.session_state.selected_sources = ["todos"]
@@ -33,36 +24,53 @@ def handle_question(question):
         st.warning("Por favor, ingresa una pregunta válida.")
         return
 
+    # Cadena precompilada para los filtros actuales (compartida entre sesiones)
+    stream = get_streaming_chain(st.session_state.selected_sources)
+    
+    # Preparar el historial para la memoria
+    chat_history = [
+        {"role": role, "content": msg}
+        for role, msg in st.session_state.chat_history
+    ]
+    
+    events = stream({
+        "question": question,
+        "chat_history": chat_history,
+        "selected_sources": st.session_state.selected_sources,
+        "memory": st.session_state.memory
+    })
+    
+    # La recuperación termina antes de que empiece la respuesta: se muestran primero las fuentes
     with st.spinner("Analizando tu consulta..."):
-        # Crear la cadena con los filtros actuales
-        chain = create_conversation_chain(
-            st.session_state.vectorstore,
-            st.session_state.selected_sources
-        )
-        
-        # Preparar el historial para la memoria
-        chat_history = [
-            {"role": role, "content": msg}
-            for role, msg in st.session_state.chat_history
-        ]
-        
-        # Ejecutar la cadena y obtener respuesta
-        response_data = chain.invoke({
-            "question": question,
-            "chat_history": chat_history,
-            "selected_sources": st.session_state.selected_sources
-        })
-        respuesta = response_data["response"]
+        sources_event = next(events)
     
-    # Actualizar el historial en session_state
-    st.session_state.chat_history.append(("user", question))
-    st.session_state.chat_history.append(("bot", respuesta))
+    answer_placeholder = st.empty()
     
-    # Mostrar fuentes utilizadas
     st.subheader("📚 Fuentes utilizadas:")
-    for idx, fuente in enumerate(response_data["context"]):
-        with st.expander(f"Fuente {idx + 1}: {fuente.metadata['source']}"):
+    for idx, fuente in enumerate(sources_event["context"]):
+        with st.expander(f"Fuente {idx + 1}: {fuente.metadata.get('source', 'N/A')}"):
             st.write(fuente.page_content)
+    
+    # Mostrar la respuesta a medida que llegan los tokens
+    partial = ""
+    response_data = None
+    for event in events:
+        if event["type"] == "token":
+            partial += event["token"]
+            answer_placeholder.write(bot_template.replace("{{MSG}}", partial), unsafe_allow_html=True)
+        elif event["type"] == "done":
+            response_data = event
+    
+    # Solo cuando el stream termina se guarda en el historial (que ya muestra la respuesta)
+    answer_placeholder.empty()
+    respuesta = response_data["response"]
+    st.session_state.chat_history.append(("user", question))
+    st.session_state.chat_history.append(("bot", respuesta))
+    
+    if DEBUG and response_data.get("time_to_first_token") is not None:
+        st.caption(f"⏱️ Tiempo hasta el primer token: {response_data['time_to_first_token']:.2f}s")
+    if DEBUG and response_data.get("history_tokens_saved"):
+        st.caption(f"🧠 Tokens de historial ahorrados: {response_data['history_tokens_saved']}")
 
 def build_sidebar():
     with st.sidebar:
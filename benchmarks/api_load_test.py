@@ -0,0 +1,127 @@
+# benchmarks/api_load_test.py
+"""
+Prueba de carga del servicio HTTP (src/api.py).
+
+Por defecto levanta la aplicación con uvicorn en un puerto local, sobre el índice sintético
+y los sustitutos de benchmarks/fakes.py (sin servicios externos ni claves), y le envía
+peticiones concurrentes por HTTP. Con `--url` se apunta a un servicio ya desplegado.
+
+Cada sesión simulada hace varias preguntas seguidas (las de seguimiento usan el historial
+guardado en el servidor); las sesiones se ejecutan en paralelo hasta `--concurrency`.
+
+Uso: python -m benchmarks.api_load_test --sessions 50 --turns 3 --concurrency 20 --stream
+"""
+import argparse
+import asyncio
+import json
+import random
+import socket
+import threading
+import time
+import httpx
+from .offline_suite import VOCABULARY, TOPICS, add_service_arguments, percentiles, prepare_offline_index
+
+def session_questions(turns, rng):
+    topic = rng.choice(TOPICS)
+    questions = [f"¿Qué establece la ley sobre {topic} y {rng.choice(VOCABULARY)}?"]
+    for _ in range(turns - 1):
+        questions.append(f"¿Y qué sanción corresponde en ese caso de {rng.choice(VOCABULARY)}?")
+    return questions
+
+async def ask(client, question, session_id, stream):
+    """Devuelve (session_id, latencia total, tiempo hasta el primer token o None)"""
+    body = {"question": question, "session_id": session_id}
+    started = time.perf_counter()
+    if not stream:
+        response = await client.post("/query", json=body)
+        response.raise_for_status()
+        return response.json()["session_id"], time.perf_counter() - started, None
+    first_token = None
+    async with client.stream("POST", "/query/stream", json=body) as response:
+        response.raise_for_status()
+        async for line in response.aiter_lines():
+            if not line:
+                continue
+            event = json.loads(line)
+            if event["type"] == "sources":
+                session_id = event["session_id"]
+            elif event["type"] == "token" and first_token is None:
+                first_token = time.perf_counter() - started
+    return session_id, time.perf_counter() - started, first_token
+
+def serve_in_background(app):
+    """Arranca uvicorn en un hilo sobre un puerto libre; devuelve (servidor, url)"""
+    import uvicorn
+    with socket.socket() as probe:
+        probe.bind(("127.0.0.1", 0))
+        port = probe.getsockname()[1]
+    server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=port, log_level="warning"))
+    threading.Thread(target=server.run, daemon=True).start()
+    while not server.started:
+        time.sleep(0.05)
+    return server, f"http://127.0.0.1:{port}"
+
+async def run_load(client, args):
+    rng = random.Random(0)
+    semaphore = asyncio.Semaphore(args.concurrency)
+    latencies, first_tokens, errors = [], [], []
+
+    async def run_session(questions):
+        async with semaphore:
+            session_id = None
+            for question in questions:
+                try:
+                    session_id, latency, first_token = await ask(client, question, session_id, args.stream)
+                except httpx.HTTPError as e:
+                    errors.append(repr(e))
+                    return
+                latencies.append(latency)
+                if first_token is not None:
+                    first_tokens.append(first_token)
+
+    sessions = [session_questions(args.turns, rng) for _ in range(args.sessions)]
+    started = time.perf_counter()
+    await asyncio.gather(*(run_session(questions) for questions in sessions))
+    return latencies, first_tokens, errors, time.perf_counter() - started
+
+def main():
+    parser = argparse.ArgumentParser()
+    add_service_arguments(parser)
+    parser.add_argument("--url", default=None, help="Servicio ya desplegado; sin él se usan los sustitutos locales.")
+    parser.add_argument("--sessions", type=int, default=50)
+    parser.add_argument("--turns", type=int, default=3, help="Preguntas por sesión.")
+    parser.add_argument("--concurrency", type=int, default=20, help="Sesiones en paralelo.")
+    parser.add_argument("--stream", action="store_true", help="Usa /query/stream y mide el tiempo hasta el primer token.")
+    args = parser.parse_args()
+
+    server, base_url = None, args.url
+    if base_url is None:
+        _, index, llm, _ = prepare_offline_index(args)
+        from src import resources
+        from src.api import create_app
+        resources.register("embeddings", index.embeddings)
+        resources.register("llm", llm)
+        resources.register("vectorstore", index)
+        server, base_url = serve_in_background(create_app())
+
+    async def run():
+        limits = httpx.Limits(max_connections=args.concurrency)
+        async with httpx.AsyncClient(base_url=base_url, timeout=None, limits=limits) as client:
+            return await run_load(client, args)
+
+    latencies, first_tokens, errors, elapsed = asyncio.run(run())
+    if server is not None:
+        server.should_exit = True
+
+    print(f"\n{len(latencies)} preguntas en {elapsed:.1f}s: {len(latencies) / elapsed:.1f} preguntas/s "
+          f"(concurrencia {args.concurrency}, {len(errors)} errores)")
+    rows = [("latencia", latencies)] + ([("primer token", first_tokens)] if first_tokens else [])
+    for label, values in rows:
+        if values:
+            stats = percentiles(values)
+            print(f"  {label:<14} p50={stats['p50_ms']:8.1f} ms  p90={stats['p90_ms']:8.1f} ms  p99={stats['p99_ms']:8.1f} ms")
+    for error in errors[:5]:
+        print(f"  error: {error}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,127 @@
+# benchmarks/embedding_dimensions.py
+"""
+Recall frente a latencia y memoria según la dimensión de los embeddings y la cuantización,
+sobre los vectores reales del corpus.
+
+Toma los vectores del índice configurado (local o Pinecone, hasta `--limit`) y los proyecta
+a cada dimensión con src.migrate_embeddings.project (equivalente a los embeddings acortados
+de text-embedding-3). La referencia es la búsqueda exacta a la dimensión original. Las
+consultas son `--queries` chunks del propio corpus, excluyendo de los resultados al chunk
+usado como consulta; con `--questions archivo.txt` se embeben preguntas reales (una por línea).
+
+Uso: python -m benchmarks.embedding_dimensions --dimensions 256 512 1024 3072 --dtypes float32 int8 -k 5
+"""
+import argparse
+import json
+import os
+import tempfile
+import time
+import numpy as np
+from .offline_suite import percentiles
+
+def load_corpus(limit):
+    """(ids, matriz float32, metadatos) del índice configurado"""
+    from src.config import VECTORSTORE_BACKEND, LOCAL_INDEX_DIR, PINECONE_API_KEY, PINECONE_INDEX_NAME
+    from src.migrate_embeddings import iter_local_batches, iter_pinecone_batches
+    if VECTORSTORE_BACKEND == "local":
+        from src.local_vectorstore import LocalVectorStore
+        batches = iter_local_batches(LocalVectorStore.load(LOCAL_INDEX_DIR, None), 1000)
+    else:
+        from pinecone import Pinecone
+        batches = iter_pinecone_batches(Pinecone(api_key=PINECONE_API_KEY).Index(PINECONE_INDEX_NAME), 100)
+    ids, blocks, metadatas = [], [], []
+    for batch_ids, vectors, batch_metadatas in batches:
+        ids.extend(batch_ids)
+        blocks.append(vectors)
+        metadatas.extend(batch_metadatas)
+        if len(ids) >= limit:
+            break
+    if not ids:
+        raise SystemExit("El índice está vacío: ejecuta primero populate_database")
+    return ids[:limit], np.concatenate(blocks)[:limit], metadatas[:limit]
+
+def build_store(directory, ids, matrix, metadatas, dtype, rescore_factor):
+    from src.local_vectorstore import LocalVectorStore
+    store = LocalVectorStore(directory, None, dtype=dtype, rescore_factor=rescore_factor)
+    store.upsert([
+        {"id": chunk_id, "values": vector, "metadata": metadata}
+        for chunk_id, vector, metadata in zip(ids, matrix, metadatas)
+    ])
+    store.persist()
+    return store
+
+def search(store, query, k, exclude):
+    """Filas de los k más similares, sin la fila usada como consulta"""
+    results = store.search_by_vector(query, k + 1)
+    return [row for row, _ in results if row != exclude][:k]
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--dimensions", type=int, nargs="+", default=[256, 512, 1024, 3072])
+    parser.add_argument("--dtypes", nargs="+", default=["float32", "float16", "int8"])
+    parser.add_argument("-k", type=int, default=5)
+    parser.add_argument("--queries", type=int, default=200, help="Chunks del corpus usados como consulta.")
+    parser.add_argument("--questions", default=None, help="Archivo con preguntas reales (una por línea).")
+    parser.add_argument("--limit", type=int, default=100000, help="Vectores máximos que se leen del índice.")
+    parser.add_argument("--rescore-factor", type=int, default=4)
+    parser.add_argument("--output", default=None, help="Guarda los resultados en JSON.")
+    args = parser.parse_args()
+
+    ids, matrix, metadatas = load_corpus(args.limit)
+    full = matrix.shape[1]
+    rng = np.random.default_rng(0)
+    if args.questions:
+        from src.get_embedding_function import get_embedding_function
+        with open(args.questions, "r", encoding="utf-8") as f:
+            questions = [line.strip() for line in f if line.strip()]
+        queries = np.asarray(get_embedding_function(dimensions=full).embed_documents(questions), dtype=np.float32)
+        excluded = [None] * len(queries)
+    else:
+        excluded = rng.choice(len(ids), min(args.queries, len(ids)), replace=False).tolist()
+        queries = matrix[excluded]
+    print(f"Corpus: {len(ids)} vectores de {full} dimensiones, {len(queries)} consultas, k={args.k}")
+
+    from src.migrate_embeddings import project
+    results = []
+    with tempfile.TemporaryDirectory(prefix="legischat-dims-") as tmp:
+        reference = build_store(os.path.join(tmp, "reference"), ids, matrix, metadatas, "float32", 1)
+        truth = [set(search(reference, query, args.k, row)) for query, row in zip(queries, excluded)]
+        for dimensions in sorted(set(args.dimensions)):
+            if dimensions > full:
+                print(f"  {dimensions} > {full}: omitida (requiere re-embeber)")
+                continue
+            projected = project(matrix, dimensions)
+            projected_queries = project(queries, dimensions)
+            for dtype in args.dtypes:
+                store = build_store(
+                    os.path.join(tmp, f"{dimensions}-{dtype}"), ids, projected, metadatas, dtype, args.rescore_factor
+                )
+                search(store, projected_queries[0], args.k, excluded[0])  # calentamiento
+                latencies, recalls = [], []
+                for query, row, expected in zip(projected_queries, excluded, truth):
+                    started = time.perf_counter()
+                    found = search(store, query, args.k, row)
+                    latencies.append(time.perf_counter() - started)
+                    recalls.append(len(expected & set(found)) / max(len(expected), 1))
+                search_matrix = store.quantized if store.quantized is not None else store.matrix
+                results.append({
+                    "dimensions": dimensions,
+                    "dtype": dtype,
+                    f"recall@{args.k}": float(np.mean(recalls)),
+                    "latency": percentiles(latencies),
+                    "search_memory_mb": search_matrix.nbytes / 1024 / 1024,
+                    "bytes_per_vector": search_matrix.nbytes // len(ids),
+                })
+
+    print(f"\n{'dim':>6} {'dtype':>8} {'recall@' + str(args.k):>10} {'p50 ms':>8} {'p90 ms':>8} {'MB':>8} {'B/vector':>9}")
+    for result in results:
+        print(f"{result['dimensions']:>6} {result['dtype']:>8} {result[f'recall@{args.k}']:>10.3f} "
+              f"{result['latency']['p50_ms']:>8.2f} {result['latency']['p90_ms']:>8.2f} "
+              f"{result['search_memory_mb']:>8.1f} {result['bytes_per_vector']:>9}")
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump({"parameters": vars(args), "corpus_vectors": len(ids), "results": results}, f, ensure_ascii=False, indent=2)
+        print(f"Resultados guardados en {args.output}")
+
+if __name__ == "__main__":
+    main()
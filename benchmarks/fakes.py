@@ -0,0 +1,153 @@
+# benchmarks/fakes.py
+"""
+Sustitutos locales y deterministas de los servicios externos (embeddings, LLM e índice
+vectorial), con latencia simulada configurable, para medir el rendimiento sin red.
+Cada sustituto registra la duración de sus llamadas en un `StageRecorder`.
+"""
+import asyncio
+import re
+import threading
+import time
+import zlib
+from collections import defaultdict
+from typing import Any
+import numpy as np
+from langchain_core.embeddings import Embeddings
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, AIMessageChunk
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+from src.local_vectorstore import LocalVectorStore
+
+WORD_PATTERN = re.compile(r"\w+")
+
+class StageRecorder:
+    """Duraciones (segundos) por etapa, seguro entre hilos"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.durations = defaultdict(list)
+
+    def record(self, stage, seconds):
+        with self._lock:
+            self.durations[stage].append(seconds)
+
+    def clear(self):
+        with self._lock:
+            self.durations.clear()
+
+class FakeEmbeddings(Embeddings):
+    """
+    Embeddings por hashing de palabras (bolsa de palabras en `dim` posiciones): textos con
+    vocabulario parecido quedan cerca, así la recuperación devuelve resultados con sentido.
+    """
+
+    def __init__(self, dim=256, latency=0.0, recorder=None):
+        self.dim = dim
+        self.latency = latency
+        self.recorder = recorder
+
+    def _vector(self, text):
+        vector = np.zeros(self.dim, dtype=np.float32)
+        for word in WORD_PATTERN.findall(text.lower()):
+            vector[zlib.crc32(word.encode("utf-8")) % self.dim] += 1.0
+        norm = np.linalg.norm(vector)
+        return (vector / norm if norm else vector).tolist()
+
+    def _timed(self, texts):
+        started = time.perf_counter()
+        time.sleep(self.latency)
+        vectors = [self._vector(text) for text in texts]
+        if self.recorder is not None:
+            self.recorder.record("embed", time.perf_counter() - started)
+        return vectors
+
+    def embed_documents(self, texts):
+        return self._timed(list(texts))
+
+    def embed_query(self, text):
+        return self._timed([text])[0]
+
+class FakeChatModel(BaseChatModel):
+    """
+    Modelo de chat determinista. Reconoce el prompt por su contenido y responde:
+    la pregunta tal cual (condensación), un extracto del fragmento (resumen) o una respuesta
+    construida a partir del contexto. `latency` es el tiempo hasta el primer token y
+    `token_latency` el tiempo entre tokens en streaming.
+    """
+
+    latency: float = 0.0
+    token_latency: float = 0.0
+    recorder: Any = None
+
+    @property
+    def _llm_type(self):
+        return "fake-chat"
+
+    @staticmethod
+    def _respond(prompt):
+        if "Pregunta reestructurada" in prompt:
+            match = re.search(r"nueva pregunta: (.*?), \n", prompt, re.DOTALL)
+            return "condense", match.group(1).strip() if match else prompt[-200:]
+        if "Documento original" in prompt:
+            return "summary", " ".join(prompt.split("Documento original:")[-1].split()[:60])
+        if "Resumen actualizado" in prompt:
+            return "history_summary", " ".join(prompt.split()[-80:])
+        context = prompt.split("Contexto:")[-1].split("Pregunta:")[0]
+        return "answer", "Según los documentos: " + " ".join(context.split()[:120])
+
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs):
+        started = time.perf_counter()
+        stage, content = self._respond(messages[-1].content)
+        time.sleep(self.latency + self.token_latency * len(content.split()))
+        if self.recorder is not None:
+            self.recorder.record(f"llm_{stage}", time.perf_counter() - started)
+        return ChatResult(generations=[ChatGeneration(message=AIMessage(content=content))])
+
+    def _stream(self, messages, stop=None, run_manager=None, **kwargs):
+        started = time.perf_counter()
+        stage, content = self._respond(messages[-1].content)
+        time.sleep(self.latency)
+        for word in content.split():
+            time.sleep(self.token_latency)
+            yield ChatGenerationChunk(message=AIMessageChunk(content=word + " "))
+        if self.recorder is not None:
+            self.recorder.record(f"llm_{stage}", time.perf_counter() - started)
+
+    # Versiones asíncronas: la latencia simulada no ocupa un hilo, como un cliente HTTP asíncrono
+    async def _agenerate(self, messages, stop=None, run_manager=None, **kwargs):
+        started = time.perf_counter()
+        stage, content = self._respond(messages[-1].content)
+        await asyncio.sleep(self.latency + self.token_latency * len(content.split()))
+        if self.recorder is not None:
+            self.recorder.record(f"llm_{stage}", time.perf_counter() - started)
+        return ChatResult(generations=[ChatGeneration(message=AIMessage(content=content))])
+
+    async def _astream(self, messages, stop=None, run_manager=None, **kwargs):
+        started = time.perf_counter()
+        stage, content = self._respond(messages[-1].content)
+        await asyncio.sleep(self.latency)
+        for word in content.split():
+            await asyncio.sleep(self.token_latency)
+            yield ChatGenerationChunk(message=AIMessageChunk(content=word + " "))
+        if self.recorder is not None:
+            self.recorder.record(f"llm_{stage}", time.perf_counter() - started)
+
+class FakeVectorIndex(LocalVectorStore):
+    """LocalVectorStore con latencia de red simulada en búsquedas y upserts, como un índice remoto"""
+
+    def __init__(self, directory, embedding, latency=0.0, recorder=None, **kwargs):
+        super().__init__(directory, embedding, **kwargs)
+        self.latency = latency
+        self.recorder = recorder
+
+    def search_by_vector(self, embedding, k=4, filter=None, include_vectors=False):
+        started = time.perf_counter()
+        time.sleep(self.latency)
+        result = super().search_by_vector(embedding, k, filter, include_vectors)
+        if self.recorder is not None:
+            self.recorder.record("vector_query", time.perf_counter() - started)
+        return result
+
+    def upsert(self, vectors):
+        time.sleep(self.latency)
+        return super().upsert(vectors)
@@ -0,0 +1,54 @@
+# benchmarks/lemmatization_throughput.py
+"""
+Compara el throughput de lematización texto a texto (pipeline completo de spaCy, como
+antes) contra `preprocess_texts` con nlp.pipe, y verifica que la salida sea idéntica.
+Usa los chunks del almacén local si existen; si no, textos sintéticos.
+
+Uso: python -m benchmarks.lemmatization_throughput --texts 500 --batch-size 64 --processes 2
+"""
+import argparse
+import time
+from itertools import islice
+from src.chunk_store import get_chunk_store
+from src.text_preprocessing import get_nlp, preprocess_texts, _normalize, _join_lemmas
+
+SAMPLE_TEXT = (
+    "Art. {i}.- Las personas tienen derecho a acceder a bienes y servicios públicos y privados "
+    "de calidad, con eficiencia, eficacia y buen trato, así como a recibir información adecuada "
+    "y veraz sobre su contenido y características. "
+)
+
+def load_texts(count):
+    texts = [full_text for _, _, full_text in islice(get_chunk_store().iter_documents(), count)]
+    if not texts:
+        texts = [SAMPLE_TEXT.format(i=i) * 8 for i in range(count)]
+    return texts
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--texts", type=int, default=500)
+    parser.add_argument("--batch-size", type=int, default=64)
+    parser.add_argument("--processes", type=int, default=1)
+    args = parser.parse_args()
+
+    texts = load_texts(args.texts)
+    nlp = get_nlp()
+
+    # Referencia: un texto a la vez con todos los componentes activos
+    started = time.perf_counter()
+    expected = [_join_lemmas(nlp(_normalize(text))) for text in texts]
+    single_elapsed = time.perf_counter() - started
+
+    started = time.perf_counter()
+    batched = list(preprocess_texts(texts, batch_size=args.batch_size, n_process=args.processes))
+    batch_elapsed = time.perf_counter() - started
+
+    mismatches = sum(a != b for a, b in zip(expected, batched))
+    print(f"{len(texts)} textos")
+    print(f"texto a texto (pipeline completo): {len(texts) / single_elapsed:.1f} textos/s")
+    print(f"nlp.pipe (batch={args.batch_size}, procesos={args.processes}): {len(texts) / batch_elapsed:.1f} textos/s "
+          f"({single_elapsed / batch_elapsed:.1f}x)")
+    print(f"salidas distintas: {mismatches}")
+
+if __name__ == "__main__":
+    main()
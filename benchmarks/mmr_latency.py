@@ -0,0 +1,66 @@
+# benchmarks/mmr_latency.py
+"""
+Mide la latencia extra de diversificar con MMR: top-k simple vs. top-k sobre un pool
+sobredimensionado + mmr_select vectorizado, y contra el MMR de langchain_core como referencia.
+
+Uso: python -m benchmarks.mmr_latency --rows 20000 --dim 3072 --pools 20 50 100
+"""
+import argparse
+import time
+import numpy as np
+from src.mmr import mmr_select
+
+def timed(fn, repeats):
+    started = time.perf_counter()
+    for _ in range(repeats):
+        fn()
+    return (time.perf_counter() - started) / repeats * 1000
+
+def top_k(matrix, query, k):
+    scores = matrix @ query
+    top = np.argpartition(-scores, k - 1)[:k]
+    return top[np.argsort(-scores[top])], scores
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=20000, help="Vectores en el índice simulado.")
+    parser.add_argument("--dim", type=int, default=3072)
+    parser.add_argument("--k", type=int, default=5)
+    parser.add_argument("--pools", type=int, nargs="+", default=[20, 50, 100])
+    parser.add_argument("--lambda-mult", type=float, default=0.7)
+    parser.add_argument("--repeats", type=int, default=20)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    matrix = rng.normal(size=(args.rows, args.dim)).astype(np.float32)
+    matrix /= np.linalg.norm(matrix, axis=1, keepdims=True)
+    query = matrix[0] + 0.1 * rng.normal(size=args.dim).astype(np.float32)
+
+    try:
+        from langchain_core.vectorstores.utils import maximal_marginal_relevance
+    except ImportError:
+        maximal_marginal_relevance = None
+
+    top_k(matrix, query, args.k)  # calentamiento (caché de la matriz)
+    baseline = timed(lambda: top_k(matrix, query, args.k), args.repeats)
+    print(f"top-{args.k} sin MMR: {baseline:.2f} ms")
+    for pool in args.pools:
+        def search_mmr():
+            top, scores = top_k(matrix, query, pool)
+            return mmr_select(scores[top], matrix[top], args.k, args.lambda_mult)
+        total = timed(search_mmr, args.repeats)
+        top, scores = top_k(matrix, query, pool)
+        candidates = matrix[top]
+        selection_only = timed(lambda: mmr_select(scores[top], candidates, args.k, args.lambda_mult), args.repeats)
+        line = (f"pool={pool}: {total:.2f} ms en total (+{total - baseline:.2f} ms), "
+                f"selección MMR {selection_only:.3f} ms")
+        if maximal_marginal_relevance is not None:
+            reference = timed(
+                lambda: maximal_marginal_relevance(query, candidates, lambda_mult=args.lambda_mult, k=args.k),
+                args.repeats
+            )
+            line += f", langchain_core {reference:.3f} ms"
+        print(line)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,230 @@
+# benchmarks/offline_suite.py
+"""
+Benchmark de extremo a extremo sin servicios externos: ejecuta las etapas reales de
+populate_database (split -> lemmatize -> summarize -> embed -> upsert) y la cadena de
+create_conversation_chain contra los sustitutos deterministas de benchmarks/fakes.py.
+
+Informa páginas/s y chunks/s de la ingesta, percentiles de latencia por etapa de las
+consultas y la memoria máxima, y guarda el resultado en JSON para comparar entre commits.
+
+No usa la red: los tokens se estiman por caracteres (TOKEN_COUNTER=chars), así que los
+resultados no dependen de que tiktoken tenga su BPE en caché. Requisito: el modelo de spaCy
+de la lematización (python -m spacy download es_core_news_sm); se comprueba antes de empezar.
+
+Uso: python -m benchmarks.offline_suite --files 4 --pages 50 --queries 40 \
+        --embed-latency 0.05 --llm-latency 0.3 --index-latency 0.02 --output resultados.json
+"""
+import argparse
+import json
+import os
+import random
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime
+import numpy as np
+
+VOCABULARY = (
+    "derecho persona estado ley autoridad proceso sanción trabajo salud educación ambiente "
+    "propiedad contrato obligación garantía tribunal juez plazo recurso pena delito "
+    "ciudadanía participación servicio público administración control reforma norma"
+).split()
+
+TOPICS = ("salud", "trabajo", "educación", "propiedad", "contrato", "delito", "ambiente", "tribunal")
+
+def synthetic_pages(files, pages, seed=0):
+    """Páginas deterministas con estructura de artículos, con los mismos metadatos que extract_pdf_pages"""
+    from langchain_core.documents import Document
+    rng = random.Random(seed)
+    article = 0
+    for f in range(files):
+        filename = f"ley organica sintetica {f}.pdf"
+        for page in range(pages):
+            paragraphs = []
+            for _ in range(4):
+                article += 1
+                words = " ".join(rng.choice(VOCABULARY) for _ in range(90))
+                paragraphs.append(f"Art. {article}.- {words.capitalize()}.")
+            yield Document(
+                page_content="\n".join(paragraphs),
+                metadata={
+                    "source": os.path.join("data", "03_leyes", filename),
+                    "total_pages": pages,
+                    "page": page,
+                    "page_label": str(page + 1),
+                    "filename": filename,
+                    "doc_type": "ley",
+                }
+            )
+
+def synthetic_questions(count, seed=0):
+    """Mezcla de preguntas de primer turno, de seguimiento (con historial) y por número de artículo"""
+    rng = random.Random(seed)
+    questions = []
+    for i in range(count):
+        topic = rng.choice(TOPICS)
+        kind = i % 3
+        if kind == 0:
+            questions.append((f"¿Qué establece la ley sobre {topic} y {rng.choice(VOCABULARY)}?", []))
+        elif kind == 1:
+            history = [
+                {"role": "user", "content": f"¿Qué dice la ley sobre {topic}?"},
+                {"role": "bot", "content": f"La ley regula {topic} y {rng.choice(VOCABULARY)}."},
+            ]
+            questions.append((f"¿Y qué sanción corresponde en ese caso de {rng.choice(VOCABULARY)}?", history))
+        else:
+            questions.append((f"¿Qué dice el artículo {rng.randint(1, 40)} de la ley orgánica sintética 0?", []))
+    return questions
+
+def percentiles(values):
+    values = np.asarray(values, dtype=np.float64) * 1000
+    return {
+        "count": int(len(values)),
+        "mean_ms": float(values.mean()),
+        "p50_ms": float(np.percentile(values, 50)),
+        "p90_ms": float(np.percentile(values, 90)),
+        "p99_ms": float(np.percentile(values, 99)),
+    }
+
+def current_commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def check_prerequisites():
+    """Carga el modelo de spaCy antes de medir; si falta, termina con la instrucción para instalarlo"""
+    from src.text_preprocessing import get_nlp
+    try:
+        get_nlp()
+    except (ImportError, OSError) as e:
+        raise SystemExit(
+            f"La suite necesita spaCy y el modelo es_core_news_sm ({e}).\n"
+            "Instálalo con: python -m spacy download es_core_news_sm"
+        )
+
+def prepare_offline_index(args):
+    """
+    Construye un índice local con los sustitutos de fakes.py ejecutando la ingesta real.
+    Devuelve (recorder, índice, llm, estadísticas de ingesta). Debe llamarse antes de
+    importar cualquier módulo de src: la configuración se lee al importar.
+    """
+    storage = tempfile.mkdtemp(prefix="legischat-bench-")
+    os.environ["STORAGE_DIR"] = storage
+    os.environ["VECTORSTORE_BACKEND"] = "local"
+    os.environ["ANSWER_CACHE_ENABLED"] = "true" if args.answer_cache else "false"
+    os.environ["TOKEN_COUNTER"] = "chars"
+    check_prerequisites()
+
+    from langchain_core.output_parsers import StrOutputParser
+    from src import config, get_embedding_function as embedding_module, multi_representation
+    from src import populate_database
+    from src.prompts import MULTI_REPRESENTATION_PROMPT
+    from .fakes import StageRecorder, FakeEmbeddings, FakeChatModel, FakeVectorIndex
+
+    recorder = StageRecorder()
+    embeddings = FakeEmbeddings(dim=args.dim, latency=args.embed_latency, recorder=recorder)
+    llm = FakeChatModel(latency=args.llm_latency, token_latency=args.token_latency, recorder=recorder)
+    index = FakeVectorIndex(config.LOCAL_INDEX_DIR, embeddings, latency=args.index_latency, recorder=recorder)
+
+    # Los servicios externos se sustituyen por los simulados; el resto del código es el real
+    embedding_module.get_embedding_function = lambda cached=True, http_client=None: embeddings
+    multi_representation.get_summary_chain = lambda: MULTI_REPRESENTATION_PROMPT | llm | StrOutputParser()
+
+    pages = list(synthetic_pages(args.files, args.pages))
+    started = time.perf_counter()
+    ids_by_source = populate_database.stream_to_index(
+        iter(pages), index,
+        batch_size=args.batch_size or config.INGEST_BATCH_SIZE,
+        max_in_flight=args.max_in_flight or config.INGEST_MAX_IN_FLIGHT
+    )
+    populate_database.persist_index(index)
+    ingest_seconds = time.perf_counter() - started
+    populate_database.build_auxiliary_indexes()
+    chunks = sum(len(ids) for ids in ids_by_source.values())
+    ingestion = {
+        "pages": len(pages),
+        "chunks": chunks,
+        "seconds": ingest_seconds,
+        "pages_per_sec": len(pages) / ingest_seconds,
+        "chunks_per_sec": chunks / ingest_seconds,
+        # Tiempo acumulado en los servicios simulados (las etapas del pipeline se imprimen al terminar)
+        "service_seconds": {stage: float(np.sum(values)) for stage, values in recorder.durations.items()},
+    }
+    return recorder, index, llm, ingestion
+
+def add_service_arguments(parser):
+    """Parámetros del corpus sintético y de la latencia simulada de los servicios"""
+    parser.add_argument("--files", type=int, default=4)
+    parser.add_argument("--pages", type=int, default=50, help="Páginas por archivo sintético.")
+    parser.add_argument("--embed-latency", type=float, default=0.05, help="Segundos por llamada de embeddings.")
+    parser.add_argument("--llm-latency", type=float, default=0.3, help="Segundos hasta el primer token del LLM.")
+    parser.add_argument("--token-latency", type=float, default=0.0, help="Segundos entre tokens del LLM.")
+    parser.add_argument("--index-latency", type=float, default=0.02, help="Segundos por consulta/upsert al índice.")
+    parser.add_argument("--dim", type=int, default=256, help="Dimensión de los embeddings simulados.")
+    parser.add_argument("--batch-size", type=int, default=None)
+    parser.add_argument("--max-in-flight", type=int, default=None)
+    parser.add_argument("--answer-cache", action="store_true", help="Mantiene activa la caché semántica de respuestas.")
+
+def main():
+    parser = argparse.ArgumentParser()
+    add_service_arguments(parser)
+    parser.add_argument("--queries", type=int, default=40)
+    parser.add_argument("--output", default=None, help="Archivo JSON de resultados (por defecto benchmarks/results/<commit>.json).")
+    args = parser.parse_args()
+
+    tracemalloc.start()
+    recorder, index, llm, ingestion = prepare_offline_index(args)
+    from src.utils.chains import create_conversation_chain
+    _, ingest_peak = tracemalloc.get_traced_memory()
+    tracemalloc.reset_peak()
+
+    # ----- Consultas -----
+    recorder.clear()
+    chain = create_conversation_chain(index, ["todos"], llm=llm)
+    totals = []
+    for question, history in synthetic_questions(args.queries):
+        started = time.perf_counter()
+        chain.invoke({"question": question, "chat_history": history, "selected_sources": ["todos"]})
+        totals.append(time.perf_counter() - started)
+    query_stages = {stage: percentiles(values) for stage, values in sorted(recorder.durations.items())}
+    query_stages["total"] = percentiles(totals)
+    _, query_peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    results = {
+        "commit": current_commit(),
+        "timestamp": datetime.now().isoformat(),
+        "python": sys.version.split()[0],
+        "parameters": vars(args),
+        "ingestion": ingestion,
+        "query": query_stages,
+        "memory": {
+            "ingestion_peak_traced_mb": ingest_peak / 1024 / 1024,
+            "query_peak_traced_mb": query_peak / 1024 / 1024,
+            # ru_maxrss está en KiB en Linux
+            "max_rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+        },
+    }
+
+    print(f"\nIngesta: {ingestion['pages_per_sec']:.1f} páginas/s, {ingestion['chunks_per_sec']:.1f} chunks/s")
+    for stage, stats in query_stages.items():
+        print(f"  {stage:<16} p50={stats['p50_ms']:8.1f} ms  p90={stats['p90_ms']:8.1f} ms  "
+              f"p99={stats['p99_ms']:8.1f} ms  (n={stats['count']})")
+    print(f"Memoria máxima (RSS): {results['memory']['max_rss_mb']:.0f} MB")
+
+    output = args.output or os.path.join("benchmarks", "results", f"{results['commit'] or 'local'}.json")
+    directory = os.path.dirname(output)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump(results, f, ensure_ascii=False, indent=2)
+    print(f"Resultados guardados en {output}")
+
+if __name__ == "__main__":
+    main()
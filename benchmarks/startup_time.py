@@ -0,0 +1,78 @@
+# benchmarks/startup_time.py
+"""
+Mide el coste de arranque: tiempo de importación por módulo (con `python -X importtime`,
+cada uno en un intérprete limpio) y el tiempo total de `populate_database --help`.
+
+Uso: python -m benchmarks.startup_time --top 10
+"""
+import argparse
+import subprocess
+import sys
+import time
+
+MODULES = (
+    "src.config",
+    "src.resources",
+    "src.text_preprocessing",
+    "src.utils.chains",
+    "src.populate_database",
+    "app",
+)
+
+def import_times(module):
+    """Ejecuta `import module` en un proceso nuevo y devuelve [(paquete, self_us, cumulative_us)]"""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True, text=True
+    )
+    if result.returncode != 0:
+        raise RuntimeError(result.stderr.strip().splitlines()[-1])
+    entries = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "[us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        entries.append((name.rstrip(), int(self_us), int(cumulative_us)))
+    return entries
+
+def by_package(entries):
+    """Suma el tiempo propio de cada import por paquete raíz (langchain_core, numpy, ...)"""
+    totals = {}
+    for name, self_us, _ in entries:
+        package = name.strip().split(".")[0]
+        totals[package] = totals.get(package, 0) + self_us
+    return totals
+
+def wall_time(args):
+    started = time.perf_counter()
+    subprocess.run([sys.executable, *args], capture_output=True, check=True)
+    return time.perf_counter() - started
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--top", type=int, default=10, help="Dependencias más costosas a mostrar por módulo.")
+    parser.add_argument("modules", nargs="*", default=MODULES)
+    args = parser.parse_args()
+
+    baseline = wall_time(["-c", "pass"])
+    print(f"Intérprete vacío: {baseline * 1000:.0f} ms")
+    for module in args.modules:
+        try:
+            entries = import_times(module)
+        except RuntimeError as e:
+            print(f"\n{module}: no se pudo importar ({e})")
+            continue
+        total = next((cumulative for name, _, cumulative in entries if name.strip() == module), 0)
+        print(f"\n{module}: {total / 1000:.1f} ms")
+        packages = by_package(entries)
+        for package in sorted(packages, key=packages.get, reverse=True)[:args.top]:
+            print(f"  {packages[package] / 1000:8.1f} ms  {package}")
+
+    try:
+        elapsed = wall_time(["-m", "src.populate_database", "--help"])
+        print(f"\npopulate_database --help: {elapsed * 1000:.0f} ms (incluye el arranque del intérprete)")
+    except subprocess.CalledProcessError as e:
+        print(f"\npopulate_database --help falló: {e.stderr.decode().strip().splitlines()[-1]}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,59 @@
+# benchmarks/stub_ollama.py
+"""
+Servidor HTTP mínimo que imita la API /api/generate de Ollama.
+Responde con un texto determinista tras una latencia simulada, para probar
+la generación de resúmenes sin un modelo real.
+
+Uso: python -m benchmarks.stub_ollama --port 11435 --latency 0.5
+"""
+import argparse
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+class StubOllamaHandler(BaseHTTPRequestHandler):
+    latency = 0.0
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length", 0))
+        payload = json.loads(self.rfile.read(length) or b"{}")
+        time.sleep(self.latency)
+
+        prompt = payload.get("prompt", "")
+        response = f"resumen: {prompt[-200:].strip()}"
+
+        self.send_response(200)
+        self.send_header("Content-Type", "application/x-ndjson")
+        self.end_headers()
+        for line in (
+            {"model": payload.get("model"), "response": response, "done": False},
+            {"model": payload.get("model"), "response": "", "done": True},
+        ):
+            self.wfile.write((json.dumps(line) + "\n").encode("utf-8"))
+
+    def log_message(self, format, *args):
+        pass
+
+def start_stub_server(port=0, latency=0.0):
+    """Inicia el servidor en un hilo en segundo plano y devuelve (server, base_url)"""
+    handler = type("Handler", (StubOllamaHandler,), {"latency": latency})
+    server = ThreadingHTTPServer(("127.0.0.1", port), handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}"
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--port", type=int, default=11435)
+    parser.add_argument("--latency", type=float, default=0.5, help="Segundos de latencia por petición.")
+    args = parser.parse_args()
+
+    server, base_url = start_stub_server(args.port, args.latency)
+    print(f"Stub de Ollama escuchando en {base_url}")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.shutdown()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,52 @@
+# benchmarks/summary_throughput.py
+"""
+Compara el throughput de generación de resúmenes secuencial vs. concurrente
+contra el stub local de Ollama.
+
+Cada ejecución usa una caché de resúmenes vacía en un directorio temporal: así la segunda
+no se sirve de lo que generó la primera y no quedan resúmenes del stub en storage/.
+
+Uso: python -m benchmarks.summary_throughput --chunks 40 --latency 0.2 --concurrency 8
+"""
+import argparse
+import os
+import shutil
+import tempfile
+import time
+from .stub_ollama import start_stub_server
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--chunks", type=int, default=40)
+    parser.add_argument("--latency", type=float, default=0.2)
+    parser.add_argument("--concurrency", type=int, default=8)
+    args = parser.parse_args()
+
+    server, base_url = start_stub_server(latency=args.latency)
+    storage = tempfile.mkdtemp(prefix="legischat-summaries-")
+    # La configuración se lee al importar, por eso se fija antes de importar src
+    os.environ["OLLAMA_BASE_URL"] = base_url
+    os.environ["STORAGE_DIR"] = storage
+    from src.config import SUMMARY_CACHE_PATH
+    from src.multi_representation import generate_summaries, get_summary_cache
+
+    texts = [f"Art. {i}.- Texto de prueba del chunk {i}." for i in range(args.chunks)]
+    try:
+        for concurrency in (1, args.concurrency):
+            started = time.perf_counter()
+            summaries = generate_summaries(texts, max_concurrency=concurrency)
+            elapsed = time.perf_counter() - started
+            assert len(summaries) == len(texts)
+            print(f"concurrencia={concurrency}: {len(texts) / elapsed:.2f} chunks/s")
+            # La siguiente ejecución empieza con la caché vacía
+            get_summary_cache().close()
+            get_summary_cache.cache_clear()
+            for suffix in ("", "-wal", "-shm"):
+                if os.path.exists(SUMMARY_CACHE_PATH + suffix):
+                    os.remove(SUMMARY_CACHE_PATH + suffix)
+    finally:
+        server.shutdown()
+        shutil.rmtree(storage, ignore_errors=True)
+
+if __name__ == "__main__":
+    main()
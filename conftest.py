@@ -0,0 +1,4 @@
+import os
+
+# Las pruebas no deben depender de la descarga del BPE de tiktoken (igual que benchmarks/offline_suite.py)
+os.environ.setdefault("TOKEN_COUNTER", "chars")
@@ -0,0 +1,139 @@
+# src/answer_cache.py
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+from functools import lru_cache
+import numpy as np
+from .config import (
+    INDEX_VERSION_PATH, ANSWER_CACHE_THRESHOLD, ANSWER_CACHE_TTL, ANSWER_CACHE_MAX_ENTRIES
+)
+
+def bump_index_version(path=INDEX_VERSION_PATH):
+    """Marca que el índice cambió; las cachés de respuestas se invalidan al detectarlo"""
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(str(time.time()))
+
+NUMBER_PATTERN = re.compile(r"\d+")
+
+def question_numbers(question):
+    """Números citados en la pregunta (artículos, leyes, incisos...); deben coincidir para reutilizar"""
+    return frozenset(NUMBER_PATTERN.findall(question or ""))
+
+def _read_index_version(path):
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return f.read().strip()
+    except OSError:
+        return None
+
+class SemanticAnswerCache:
+    """
+    Caché semántica de respuestas en memoria, compartida por todo el proceso.
+
+    Cada entrada guarda el embedding normalizado de la pregunta condensada, la respuesta y
+    los IDs de los chunks usados. Una pregunta con similitud coseno >= `threshold` sobre el
+    mismo conjunto de fuentes seleccionadas reutiliza la respuesta, siempre que ambas preguntas
+    citen los mismos números: "artículo 66" y "artículo 67" son casi idénticas para el
+    embedding pero no tienen la misma respuesta. Las entradas expiran
+    tras `ttl` segundos, se descartan por LRU al superar `max_entries` y se vacían cuando
+    cambia la versión del índice.
+    """
+
+    def __init__(self, threshold=0.95, ttl=86400, max_entries=1000, version_path=INDEX_VERSION_PATH):
+        self.threshold = threshold
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.version_path = version_path
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()  # (sources, n) -> (vector, answer, source_ids, created, numbers)
+        self._matrices = {}  # sources -> (keys, matriz) recalculada cuando cambian las entradas
+        self._next_id = 0
+        self._version = _read_index_version(version_path)
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def sources_key(selected_sources):
+        return tuple(sorted(selected_sources))
+
+    def _check_version(self):
+        version = _read_index_version(self.version_path)
+        if version != self._version:
+            self._entries.clear()
+            self._matrices.clear()
+            self._version = version
+
+    def _expire(self, now):
+        expired = [key for key, entry in self._entries.items() if now - entry[3] > self.ttl]
+        for key in expired:
+            del self._entries[key]
+            self._matrices.pop(key[0], None)
+
+    def _matrix(self, sources):
+        if sources not in self._matrices:
+            keys = [key for key in self._entries if key[0] == sources]
+            matrix = np.stack([self._entries[key][0] for key in keys]) if keys else None
+            self._matrices[sources] = (keys, matrix)
+        return self._matrices[sources]
+
+    def lookup(self, embedding, selected_sources, question=None):
+        """Devuelve (answer, source_ids) si hay una pregunta suficientemente parecida, o None"""
+        sources = self.sources_key(selected_sources)
+        numbers = question_numbers(question)
+        query = np.asarray(embedding, dtype=np.float32)
+        query = query / (np.linalg.norm(query) or 1.0)
+        with self._lock:
+            self._check_version()
+            self._expire(time.time())
+            keys, matrix = self._matrix(sources)
+            if matrix is not None:
+                scores = matrix @ query
+                # Candidatos por encima del umbral, del más parecido al menos parecido
+                for row in np.argsort(-scores):
+                    if scores[row] < self.threshold:
+                        break
+                    key = keys[row]
+                    _, answer, source_ids, _, entry_numbers = self._entries[key]
+                    if entry_numbers == numbers:
+                        self._entries.move_to_end(key)
+                        self.hits += 1
+                        return answer, source_ids
+            self.misses += 1
+            return None
+
+    def store(self, embedding, selected_sources, answer, source_ids, question=None):
+        sources = self.sources_key(selected_sources)
+        vector = np.asarray(embedding, dtype=np.float32)
+        vector = vector / (np.linalg.norm(vector) or 1.0)
+        with self._lock:
+            self._check_version()
+            key = (sources, self._next_id)
+            self._next_id += 1
+            self._entries[key] = (vector, answer, list(source_ids), time.time(), question_numbers(question))
+            self._matrices.pop(sources, None)
+            while len(self._entries) > self.max_entries:
+                evicted, _ = self._entries.popitem(last=False)
+                self._matrices.pop(evicted[0], None)
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "entries": len(self._entries),
+        }
+
+@lru_cache(maxsize=None)
+def get_answer_cache():
+    """Caché de respuestas compartida por todas las sesiones del proceso"""
+    return SemanticAnswerCache(
+        threshold=ANSWER_CACHE_THRESHOLD,
+        ttl=ANSWER_CACHE_TTL,
+        max_entries=ANSWER_CACHE_MAX_ENTRIES
+    )
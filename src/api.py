@@ -0,0 +1,145 @@
+# src/api.py
+"""
+Servicio HTTP asíncrono para consultar el corpus legal sin la interfaz de Streamlit.
+
+Todas las peticiones comparten un bucle de eventos, el pool HTTP y las cadenas
+precompiladas de src.resources; las respuestas del LLM se obtienen con `ainvoke`/`astream`.
+El historial de cada conversación se guarda en el servidor: basta con reenviar el
+`session_id` devuelto por la primera pregunta.
+
+Uso: uvicorn src.api:app --host 0.0.0.0 --port 8000
+
+    POST   /query              {"question", "session_id"?, "selected_sources"?} -> respuesta completa
+    POST   /query/stream       mismo cuerpo -> eventos NDJSON (sources, token..., done)
+    GET    /sessions/{id}      historial de la sesión
+    DELETE /sessions/{id}
+    GET    /health
+"""
+import asyncio
+import json
+from contextlib import asynccontextmanager
+from typing import Optional
+from fastapi import FastAPI, HTTPException
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel, Field
+from . import resources
+from .config import DOCUMENT_TYPES, API_MAX_CONCURRENCY
+from .session_store import SessionStore
+
+class QueryRequest(BaseModel):
+    question: str
+    session_id: Optional[str] = None
+    selected_sources: list[str] = Field(default_factory=lambda: ["todos"])
+
+def normalize_sources(selected_sources):
+    """Misma regla que la barra lateral de app.py: "todos" (o nada) equivale a todas las fuentes"""
+    unknown = [source for source in selected_sources if source not in DOCUMENT_TYPES]
+    if unknown:
+        raise HTTPException(status_code=422, detail=f"Fuentes desconocidas: {unknown}")
+    if not selected_sources or "todos" in selected_sources:
+        return ["todos"]
+    return sorted(set(selected_sources))
+
+def serialize_sources(docs):
+    return [
+        {
+            "id": doc.metadata.get("id"),
+            "filename": doc.metadata.get("filename"),
+            "page": doc.metadata.get("page_label", doc.metadata.get("page")),
+            "source": doc.metadata.get("source"),
+            "content": doc.page_content,
+        }
+        for doc in docs
+    ]
+
+def create_app(sessions=None):
+    """Crea la aplicación; `sessions` permite inyectar otro SessionStore"""
+    # El resumidor se resuelve en la primera llamada: importar el módulo no crea clientes
+    if sessions is None:
+        sessions = SessionStore(lambda summary, messages: resources.get_history_summarizer()(summary, messages))
+    # Acota las preguntas en curso (la recuperación ocupa hilos del executor)
+    semaphore = asyncio.Semaphore(API_MAX_CONCURRENCY)
+
+    @asynccontextmanager
+    async def lifespan(app):
+        # Carga el vectorstore y los clientes antes de la primera petición
+        await asyncio.to_thread(resources.get_vectorstore)
+        yield
+        await resources.aclose()
+
+    app = FastAPI(title="LegisChat", lifespan=lifespan)
+
+    def chain_inputs(request, session, selected_sources):
+        return {
+            "question": request.question,
+            "chat_history": list(session.messages),
+            "selected_sources": selected_sources,
+            "memory": session.memory,
+        }
+
+    @app.get("/health")
+    async def health():
+        return {"status": "ok", "sessions": len(sessions)}
+
+    @app.post("/query")
+    async def query(request: QueryRequest):
+        if not request.question.strip():
+            raise HTTPException(status_code=422, detail="La pregunta está vacía.")
+        selected_sources = normalize_sources(request.selected_sources)
+        chain = resources.get_conversation_chain(selected_sources)
+        session = sessions.get_or_create(request.session_id)
+        async with session.lock, semaphore:
+            result = await chain.ainvoke(chain_inputs(request, session, selected_sources))
+            session.append_turn(request.question, result["response"])
+        return {
+            "session_id": session.id,
+            "question": result.get("question"),
+            "response": result["response"],
+            "sources": serialize_sources(result.get("context") or []),
+            "time_saved": result.get("time_saved", 0.0),
+            "history_tokens_saved": result.get("history_tokens_saved", 0),
+        }
+
+    @app.post("/query/stream")
+    async def query_stream(request: QueryRequest):
+        if not request.question.strip():
+            raise HTTPException(status_code=422, detail="La pregunta está vacía.")
+        selected_sources = normalize_sources(request.selected_sources)
+        stream = resources.get_async_streaming_chain(selected_sources)
+        session = sessions.get_or_create(request.session_id)
+
+        async def events():
+            async with session.lock, semaphore:
+                async for event in stream(chain_inputs(request, session, selected_sources)):
+                    if event["type"] == "sources":
+                        payload = {"type": "sources", "session_id": session.id, "sources": serialize_sources(event["context"])}
+                    elif event["type"] == "token":
+                        payload = event
+                    else:
+                        session.append_turn(request.question, event["response"])
+                        payload = {
+                            "type": "done",
+                            "response": event["response"],
+                            "time_to_first_token": event.get("time_to_first_token"),
+                            "history_tokens_saved": event.get("history_tokens_saved", 0),
+                        }
+                    yield json.dumps(payload, ensure_ascii=False) + "\n"
+
+        return StreamingResponse(events(), media_type="application/x-ndjson")
+
+    @app.get("/sessions/{session_id}")
+    async def get_session(session_id: str):
+        session = sessions.get(session_id)
+        if session is None:
+            raise HTTPException(status_code=404, detail="Sesión no encontrada.")
+        return {"session_id": session.id, "messages": session.messages}
+
+    @app.delete("/sessions/{session_id}")
+    async def delete_session(session_id: str):
+        if not sessions.delete(session_id):
+            raise HTTPException(status_code=404, detail="Sesión no encontrada.")
+        return {"deleted": session_id}
+
+    return app
+
+app = create_app()
@@ -0,0 +1,114 @@
+# src/article_index.py
+import json
+import os
+import re
+import unicodedata
+from functools import lru_cache
+from .config import ARTICLE_INDEX_PATH
+
+# Encabezado de artículo al inicio de línea: "Art. 66.-", "Artículo 1.-", "Art. 130.1.-"
+ARTICLE_HEADER_PATTERN = re.compile(r"(?m)^\s*Art(?:[íi]culo|\.)\s*(\d+(?:\.\d+)?)\s*\.?\s*-")
+# Prefijo que prepare_chunks antepone al contenido ("Tipo: ... Archivo: ... Página: N. ")
+CHUNK_PREFIX_PATTERN = re.compile(r"^Tipo: .*?\. Archivo: .*?\. Página: [^.]*\. ", re.DOTALL)
+
+def strip_accents(text):
+    return "".join(c for c in unicodedata.normalize("NFKD", text) if not unicodedata.combining(c)).lower()
+
+def _page_number(metadata):
+    try:
+        return int(metadata.get("page", 0))
+    except (TypeError, ValueError):
+        return 0
+
+class ArticleIndex:
+    """
+    Índice estructural (documento, número de artículo) -> IDs de chunks.
+    Permite responder preguntas sobre un artículo concreto sin embeddings ni búsqueda vectorial.
+    """
+
+    def __init__(self, documents=None):
+        # {filename: {"doc_type": str, "articles": {numero: [ids]}}}
+        self.documents = documents or {}
+
+    @classmethod
+    def build(cls, records):
+        """
+        Construye el índice a partir de (id, metadata, full_text). Los chunks se ordenan por
+        archivo, página y posición; un chunk que no empieza con un encabezado se asigna
+        también al artículo que venía del chunk anterior.
+        """
+        ordered = sorted(
+            records,
+            key=lambda r: (r[1].get("filename", ""), _page_number(r[1]), r[1].get("start_index", 0), r[0])
+        )
+        documents = {}
+        current_file, current_article = None, None
+        for chunk_id, metadata, full_text in ordered:
+            filename = metadata.get("filename", "")
+            if filename != current_file:
+                current_file, current_article = filename, None
+            entry = documents.setdefault(filename, {"doc_type": metadata.get("doc_type"), "articles": {}})
+            articles = entry["articles"]
+
+            text = CHUNK_PREFIX_PATTERN.sub("", full_text, count=1)
+            headers = list(ARTICLE_HEADER_PATTERN.finditer(text))
+            # Continuación del artículo anterior
+            if current_article and (not headers or text[:headers[0].start()].strip()):
+                articles.setdefault(current_article, []).append(chunk_id)
+            for match in headers:
+                ids = articles.setdefault(match.group(1), [])
+                if chunk_id not in ids:
+                    ids.append(chunk_id)
+            if headers:
+                current_article = headers[-1].group(1)
+        return cls(documents)
+
+    def save(self, path):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(self.documents, f, ensure_ascii=False)
+
+    @classmethod
+    def load(cls, path):
+        with open(path, "r", encoding="utf-8") as f:
+            return cls(json.load(f))
+
+    def resolve_documents(self, doc_types=None, source_hint=None):
+        """Archivos candidatos según los tipos de documento permitidos y un nombre parcial"""
+        hint = strip_accents(source_hint) if source_hint else None
+        return [
+            filename for filename, entry in self.documents.items()
+            if (doc_types is None or entry["doc_type"] in doc_types)
+            and (hint is None or hint in strip_accents(filename))
+        ]
+
+    def lookup(self, article, doc_types=None, source_hint=None):
+        """
+        Devuelve (filename, ids) si la referencia identifica un único documento que contiene
+        el artículo; en caso contrario None (la consulta sigue por la búsqueda normal).
+        """
+        matches = [
+            filename for filename in self.resolve_documents(doc_types, source_hint)
+            if article in self.documents[filename]["articles"]
+        ]
+        if len(matches) != 1:
+            return None
+        return matches[0], self.documents[matches[0]]["articles"][article]
+
+def build_article_index(chunk_store, path=ARTICLE_INDEX_PATH):
+    """Reconstruye el índice de artículos a partir del almacén de chunks"""
+    index = ArticleIndex.build(chunk_store.iter_documents())
+    index.save(path)
+    get_article_index.cache_clear()
+    total = sum(len(entry["articles"]) for entry in index.documents.values())
+    print(f"Índice de artículos: {total} artículos en {len(index.documents)} documentos")
+    return index
+
+@lru_cache(maxsize=None)
+def get_article_index():
+    """Índice de artículos compartido; None si aún no se ha construido"""
+    if not os.path.exists(ARTICLE_INDEX_PATH):
+        return None
+    return ArticleIndex.load(ARTICLE_INDEX_PATH)
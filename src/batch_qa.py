@@ -0,0 +1,308 @@
+# src/batch_qa.py
+"""
+Respuestas en lote a preguntas leídas de un CSV (p. ej. para auditorías).
+
+    python -m src.batch_qa preguntas.csv --output respuestas.parquet --sources ley codigo
+
+Las filas con la misma pregunta (sin distinguir mayúsculas ni espacios), fuentes e
+historial se resuelven una sola vez, y las preguntas que tras condensarse coinciden
+comparten recuperación y respuesta. Por cada lote de preguntas distintas se hace una
+única llamada al modelo de embeddings (sin escribir las preguntas en la caché en disco
+de los documentos); la condensación, la recuperación y la respuesta se
+ejecutan con concurrencia acotada. Cada lote terminado se añade a un punto de control
+(<output>.partial.jsonl): si el proceso se interrumpe, al relanzar el mismo comando solo
+se procesan las filas pendientes.
+"""
+import argparse
+import json
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from .config import BATCH_QA_CONCURRENCY, BATCH_QA_CHUNK_SIZE, DOCUMENT_TYPES
+from .tracing import span
+
+OUTPUT_COLUMNS = ["row_id", "question", "selected_sources", "condensed_question", "answer", "sources", "source_ids"]
+
+def normalize_question(question):
+    return " ".join(question.casefold().split())
+
+def parse_sources(value, default):
+    """Fuentes de una fila ("ley;codigo"); si la celda está vacía se usan las indicadas por línea de comandos"""
+    if not isinstance(value, str) or not value.strip():
+        return default
+    sources = [source.strip() for source in value.replace(",", ";").split(";") if source.strip()]
+    unknown = [source for source in sources if source not in DOCUMENT_TYPES]
+    if unknown:
+        raise ValueError(f"Fuentes desconocidas: {unknown}")
+    return ["todos"] if "todos" in sources else sorted(set(sources))
+
+def parse_history(value):
+    """Historial previo de la fila como JSON [{"role", "content"}]; vacío = pregunta independiente"""
+    if not isinstance(value, str) or not value.strip():
+        return []
+    return json.loads(value)
+
+def load_questions(path, question_column, id_column=None, sources_column=None, history_column=None, default_sources=("todos",)):
+    import pandas as pd
+    df = pd.read_csv(path, dtype=str, keep_default_na=False)
+    for column in (question_column, id_column, sources_column, history_column):
+        if column and column not in df.columns:
+            raise ValueError(f"La columna '{column}' no existe en {path}")
+    rows = []
+    for position, record in enumerate(df.to_dict("records")):
+        question = record[question_column].strip()
+        if not question:
+            continue
+        rows.append({
+            "row_id": record[id_column] if id_column else str(position),
+            "question": question,
+            "selected_sources": parse_sources(record.get(sources_column), list(default_sources)),
+            "chat_history": parse_history(record.get(history_column)) if history_column else [],
+        })
+    return rows
+
+def checkpoint_path(output):
+    return output + ".partial.jsonl"
+
+def read_output(path):
+    import pandas as pd
+    if path.endswith(".parquet"):
+        return pd.read_parquet(path)
+    return pd.read_csv(path, dtype=str, keep_default_na=False)
+
+def write_output(path, records):
+    import pandas as pd
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    df = pd.DataFrame(records, columns=OUTPUT_COLUMNS)
+    if path.endswith(".parquet"):
+        df.to_parquet(path, index=False)
+    else:
+        df.to_csv(path, index=False)
+
+def load_completed(output):
+    """row_id -> fila ya respondida, según una salida anterior y el punto de control"""
+    completed = {}
+    if os.path.exists(output):
+        for record in read_output(output).to_dict("records"):
+            completed[str(record["row_id"])] = record
+    if os.path.exists(checkpoint_path(output)):
+        with open(checkpoint_path(output), "r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    # Última línea a medio escribir cuando se interrumpió el proceso
+                    continue
+                completed[str(record["row_id"])] = record
+    return completed
+
+def describe_sources(docs):
+    sources = []
+    for doc in docs:
+        page = doc.metadata.get("page_label", doc.metadata.get("page", ""))
+        sources.append(f"{doc.metadata.get('filename', 'N/A')} (p. {page})")
+    return "; ".join(sources)
+
+def _safe(function):
+    """Envuelve `function` para que un error en una pregunta no detenga el lote"""
+    def run(*args):
+        try:
+            return function(*args)
+        except Exception as e:
+            return e
+    return run
+
+class BatchAnswerer:
+    """Condensa, recupera y responde lotes de preguntas con los recursos compartidos del proceso"""
+
+    def __init__(self, vectorstore, embeddings, llm, concurrency=BATCH_QA_CONCURRENCY):
+        from .utils.chains import create_answer_chain, create_condense_chain
+        self.vectorstore = vectorstore
+        self.embeddings = embeddings
+        self.condense_chain = create_condense_chain(llm)
+        self.answer_chain = create_answer_chain(llm)
+        self.concurrency = concurrency
+        self.stats = {"questions": 0, "retrievals": 0, "embed_calls": 0, "errors": 0}
+
+    def _condense(self, items):
+        """Solo las preguntas con historial necesitan condensarse"""
+        with_history = [item for item in items if item["chat_history"]]
+        for item in items:
+            item["condensed_question"] = item["question"]
+        if not with_history:
+            return
+        with span("batch.condense", questions=len(with_history)):
+            condensed = self.condense_chain.batch(
+                [{"question": item["question"], "chat_history": item["chat_history"]} for item in with_history],
+                config={"max_concurrency": self.concurrency},
+                return_exceptions=True
+            )
+        for item, question in zip(with_history, condensed):
+            if isinstance(question, Exception):
+                item["error"] = question
+            else:
+                item["condensed_question"] = question
+
+    def _retrieve(self, groups):
+        """Una recuperación por grupo: atajo por artículo o búsqueda híbrida con el embedding del lote"""
+        from .utils.chains import hybrid_retrieve, hydrate_documents, lookup_article_documents
+        pending = []
+        for group in groups:
+            group["docs"] = lookup_article_documents(group["question"], group["selected_sources"])
+            if group["docs"] is None:
+                pending.append(group)
+        if not pending:
+            return
+        # Las preguntas son consultas: CachedEmbeddings las guarda solo en su LRU en memoria
+        embed = getattr(self.embeddings, "embed_queries", self.embeddings.embed_documents)
+        with span("batch.embed", texts=len(pending)):
+            vectors = embed([group["question"] for group in pending])
+        self.stats["embed_calls"] += 1
+
+        def search(group, vector):
+            return hydrate_documents(
+                hybrid_retrieve(self.vectorstore, group["selected_sources"], group["question"], embedding=vector)
+            )
+        with span("batch.retrieve", retrievals=len(pending)), ThreadPoolExecutor(max_workers=self.concurrency) as executor:
+            for group, docs in zip(pending, executor.map(_safe(search), pending, vectors)):
+                group["docs"] = docs
+
+    def answer(self, items):
+        """
+        Responde `items` ({"question", "selected_sources", "chat_history"}, uno por pregunta
+        distinta) y añade a cada uno "condensed_question", "docs" y "answer" o "error".
+        """
+        self.stats["questions"] += len(items)
+        self._condense(items)
+
+        # Preguntas que tras condensarse coinciden comparten recuperación y respuesta
+        groups = {}
+        for item in items:
+            if "error" in item:
+                continue
+            key = (normalize_question(item["condensed_question"]), tuple(item["selected_sources"]))
+            group = groups.setdefault(key, {
+                "question": item["condensed_question"], "selected_sources": item["selected_sources"], "items": []
+            })
+            group["items"].append(item)
+        groups = list(groups.values())
+        self.stats["retrievals"] += len(groups)
+        self._retrieve(groups)
+
+        answerable = [group for group in groups if not isinstance(group["docs"], Exception)]
+        with span("batch.answer", questions=len(answerable)):
+            answers = self.answer_chain.batch(
+                [{"context": group["docs"], "question": group["question"]} for group in answerable],
+                config={"max_concurrency": self.concurrency},
+                return_exceptions=True
+            )
+        for group in groups:
+            for item in group["items"]:
+                if isinstance(group["docs"], Exception):
+                    item["error"] = group["docs"]
+                else:
+                    item["docs"] = group["docs"]
+        for group, answer in zip(answerable, answers):
+            for item in group["items"]:
+                if isinstance(answer, Exception):
+                    item["error"] = answer
+                else:
+                    item["answer"] = answer
+        self.stats["errors"] += sum(1 for item in items if "error" in item)
+        return items
+
+def run(rows, output, answerer, chunk_size=BATCH_QA_CHUNK_SIZE):
+    """Procesa las filas pendientes por lotes, guardando cada lote en el punto de control"""
+    completed = load_completed(output)
+    pending_rows = [row for row in rows if row["row_id"] not in completed]
+    if len(pending_rows) < len(rows):
+        print(f"Reanudando: {len(rows) - len(pending_rows)} filas ya respondidas, {len(pending_rows)} pendientes")
+
+    # Filas idénticas se agrupan en una sola pregunta
+    items = {}
+    for row in pending_rows:
+        key = (
+            normalize_question(row["question"]),
+            tuple(row["selected_sources"]),
+            json.dumps(row["chat_history"], ensure_ascii=False, sort_keys=True)
+        )
+        item = items.setdefault(key, {
+            "question": row["question"], "selected_sources": row["selected_sources"],
+            "chat_history": row["chat_history"], "rows": []
+        })
+        item["rows"].append(row)
+    items = list(items.values())
+
+    started = time.perf_counter()
+    answered = 0
+    with open(checkpoint_path(output), "a", encoding="utf-8") as checkpoint:
+        for start in range(0, len(items), chunk_size):
+            batch = answerer.answer(items[start:start + chunk_size])
+            for item in batch:
+                if "error" in item:
+                    print(f"Error en la pregunta '{item['question'][:80]}': {item['error']!r}")
+                    continue
+                for row in item["rows"]:
+                    record = {
+                        "row_id": row["row_id"],
+                        "question": row["question"],
+                        "selected_sources": ";".join(row["selected_sources"]),
+                        "condensed_question": item["condensed_question"],
+                        "answer": item["answer"],
+                        "sources": describe_sources(item["docs"]),
+                        "source_ids": ";".join(doc.metadata.get("id", "") for doc in item["docs"]),
+                    }
+                    checkpoint.write(json.dumps(record, ensure_ascii=False) + "\n")
+                    completed[row["row_id"]] = record
+                    answered += 1
+            checkpoint.flush()
+            elapsed = time.perf_counter() - started
+            print(f"  {answered}/{len(pending_rows)} filas ({answered / elapsed:.2f} filas/s)")
+    elapsed = time.perf_counter() - started
+
+    # Salida final en el orden del CSV; el punto de control se borra solo si no quedan errores
+    write_output(output, [completed[row["row_id"]] for row in rows if row["row_id"] in completed])
+    failed = len(rows) - sum(1 for row in rows if row["row_id"] in completed)
+    if not failed:
+        os.remove(checkpoint_path(output))
+    return answered, failed, elapsed
+
+def main():
+    parser = argparse.ArgumentParser(description="Responde en lote las preguntas de un CSV.")
+    parser.add_argument("input", help="CSV con una pregunta por fila.")
+    parser.add_argument("--output", required=True, help="Archivo de salida (.parquet o .csv).")
+    parser.add_argument("--question-column", default="question")
+    parser.add_argument("--id-column", default=None, help="Identificador de fila; por defecto, su posición en el CSV.")
+    parser.add_argument("--sources-column", default=None, help="Fuentes por fila, separadas por ';'.")
+    parser.add_argument("--history-column", default=None, help="Historial previo por fila en JSON; se condensa la pregunta.")
+    parser.add_argument("--sources", nargs="+", default=["todos"], choices=list(DOCUMENT_TYPES), help="Fuentes por defecto.")
+    parser.add_argument("--concurrency", type=int, default=BATCH_QA_CONCURRENCY)
+    parser.add_argument("--chunk-size", type=int, default=BATCH_QA_CHUNK_SIZE, help="Preguntas distintas por lote.")
+    args = parser.parse_args()
+
+    default_sources = ["todos"] if "todos" in args.sources else sorted(set(args.sources))
+    rows = load_questions(
+        args.input, args.question_column, args.id_column, args.sources_column, args.history_column, default_sources
+    )
+    from .resources import get_embeddings, get_llm, get_vectorstore
+    answerer = BatchAnswerer(get_vectorstore(), get_embeddings(), get_llm(), concurrency=args.concurrency)
+
+    try:
+        answered, failed, elapsed = run(rows, args.output, answerer, chunk_size=max(1, args.chunk_size))
+    except KeyboardInterrupt:
+        print(f"\nInterrumpido. El progreso está en {checkpoint_path(args.output)}; relanza el mismo comando para continuar.")
+        sys.exit(130)
+
+    stats = answerer.stats
+    print(f"Respondidas {answered} filas en {elapsed:.1f}s ({answered / elapsed if elapsed else 0:.2f} filas/s)")
+    print(f"  {stats['questions']} preguntas distintas, {stats['retrievals']} recuperaciones, "
+          f"{stats['embed_calls']} llamadas de embeddings, {stats['errors']} errores")
+    if failed:
+        print(f"  {failed} filas sin respuesta; relanza el mismo comando para reintentarlas.")
+    print(f"Resultados guardados en {args.output}")
+
+if __name__ == "__main__":
+    main()
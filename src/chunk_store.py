@@ -0,0 +1,113 @@
+# src/chunk_store.py
+import json
+import os
+import sqlite3
+import threading
+import zlib
+from functools import lru_cache
+from .config import CHUNK_STORE_PATH
+
+class ChunkStore:
+    """
+    Almacén local (SQLite) del texto completo y el resumen de cada chunk, indexado por ID.
+    Los textos se guardan comprimidos con zlib; en Pinecone solo quedan los metadatos filtrables.
+    También conserva los metadatos ligeros y el texto lematizado usado por el índice léxico.
+    """
+
+    def __init__(self, path):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS chunks ("
+            " id TEXT PRIMARY KEY, full_text BLOB NOT NULL, summary BLOB NOT NULL,"
+            " metadata TEXT, lemmas BLOB)"
+        )
+        # Migrar almacenes creados antes de que existieran estas columnas
+        columns = {row[1] for row in self._conn.execute("PRAGMA table_info(chunks)")}
+        for column, kind in (("metadata", "TEXT"), ("lemmas", "BLOB")):
+            if column not in columns:
+                self._conn.execute(f"ALTER TABLE chunks ADD COLUMN {column} {kind}")
+        self._conn.commit()
+
+    def put_many(self, rows):
+        """Guarda filas (id, full_text, summary, metadata, lemmas), sobrescribiendo las existentes"""
+        data = [
+            (
+                chunk_id,
+                zlib.compress(full_text.encode("utf-8")),
+                zlib.compress(summary.encode("utf-8")),
+                json.dumps(metadata or {}, ensure_ascii=False),
+                zlib.compress(lemmas.encode("utf-8")) if lemmas is not None else None,
+            )
+            for chunk_id, full_text, summary, metadata, lemmas in rows
+        ]
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO chunks (id, full_text, summary, metadata, lemmas) VALUES (?, ?, ?, ?, ?)",
+                data
+            )
+            self._conn.commit()
+
+    def get_many(self, ids):
+        """Devuelve {id: (full_text, summary, metadata)} para los IDs presentes, en una sola consulta"""
+        ids = list(dict.fromkeys(ids))
+        if not ids:
+            return {}
+        placeholders = ",".join("?" * len(ids))
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT id, full_text, summary, metadata FROM chunks WHERE id IN ({placeholders})", ids
+            ).fetchall()
+        return {
+            chunk_id: (
+                zlib.decompress(full_text).decode("utf-8"),
+                zlib.decompress(summary).decode("utf-8"),
+                json.loads(metadata or "{}"),
+            )
+            for chunk_id, full_text, summary, metadata in rows
+        }
+
+    def iter_lexical(self):
+        """Recorre (id, metadata, lemmas) de los chunks que tienen texto lematizado"""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT id, metadata, lemmas FROM chunks WHERE lemmas IS NOT NULL ORDER BY id"
+            ).fetchall()
+        for chunk_id, metadata, lemmas in rows:
+            yield chunk_id, json.loads(metadata or "{}"), zlib.decompress(lemmas).decode("utf-8")
+
+    def iter_documents(self):
+        """Recorre (id, metadata, full_text) de todos los chunks"""
+        with self._lock:
+            rows = self._conn.execute("SELECT id, metadata, full_text FROM chunks ORDER BY id").fetchall()
+        for chunk_id, metadata, full_text in rows:
+            yield chunk_id, json.loads(metadata or "{}"), zlib.decompress(full_text).decode("utf-8")
+
+    def filenames(self):
+        """Nombres de archivo distintos de los chunks guardados"""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT DISTINCT json_extract(metadata, '$.filename') FROM chunks"
+                " WHERE json_extract(metadata, '$.filename') IS NOT NULL"
+            ).fetchall()
+        return sorted(row[0] for row in rows)
+
+    def delete_many(self, ids):
+        with self._lock:
+            self._conn.executemany("DELETE FROM chunks WHERE id = ?", [(chunk_id,) for chunk_id in ids])
+            self._conn.commit()
+
+    def clear(self):
+        with self._lock:
+            self._conn.execute("DELETE FROM chunks")
+            self._conn.commit()
+
+@lru_cache(maxsize=None)
+def get_chunk_store():
+    """Instancia compartida del almacén de chunks"""
+    return ChunkStore(CHUNK_STORE_PATH)
@@ -13,15 +13,107 @@ DOCUMENT_TYPES = {
     "codigo": "Códigos"
 }
 
+# Modo debug (muestra métricas de latencia en la interfaz)
+DEBUG = os.getenv("DEBUG", "false").lower() == "true"
+
+# Trazas por etapa: "off", "log", "prometheus" o "json" (ver src/tracing.py)
+TRACING_EXPORTER = os.getenv("TRACING_EXPORTER", "off").lower()
+
 # Configuración de OpenAI
 OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
 MODEL_NAME = "gpt-3.5-turbo"
 TEMPERATURE = 0
+# Recuento de tokens: "tiktoken" (exacto; descarga el BPE la primera vez) o "chars" (estimación sin red)
+TOKEN_COUNTER = os.getenv("TOKEN_COUNTER", "tiktoken").lower()
+
+# Pool HTTP compartido por todos los clientes de OpenAI del proceso
+HTTP_MAX_CONNECTIONS = int(os.getenv("HTTP_MAX_CONNECTIONS", "20"))
+HTTP_MAX_KEEPALIVE = int(os.getenv("HTTP_MAX_KEEPALIVE", "10"))
+HTTP_TIMEOUT = float(os.getenv("HTTP_TIMEOUT", "60"))
 
 # Configuración de Pinecone
 PINECONE_API_KEY = os.getenv("PINECONE_API_KEY")
 PINECONE_INDEX_NAME = os.getenv("PINECONE_INDEX_NAME")
 
+# Backend del índice vectorial: "pinecone" (remoto) o "local" (NumPy en disco)
+VECTORSTORE_BACKEND = os.getenv("VECTORSTORE_BACKEND", "pinecone")
+LOCAL_INDEX_NLIST = int(os.getenv("LOCAL_INDEX_NLIST", "0"))  # 0 = búsqueda exacta; >0 = clusters IVF
+LOCAL_INDEX_NPROBE = int(os.getenv("LOCAL_INDEX_NPROBE", "8"))
+# Copia cuantizada en memoria para la búsqueda: "float32" (sin cuantizar), "float16" o "int8";
+# los mejores candidatos se recalculan con los vectores float32 del disco. Reduce la memoria
+# residente (int8: 4x); en NumPy la conversión de float16 es lenta, int8 es la opción recomendada
+LOCAL_INDEX_DTYPE = os.getenv("LOCAL_INDEX_DTYPE", "float32")
+LOCAL_INDEX_RESCORE_FACTOR = int(os.getenv("LOCAL_INDEX_RESCORE_FACTOR", "4"))  # candidatos recalculados por resultado
+
 # Configuración de recuperación
 RETRIEVER_K = 5
-MEMORY_K = 5
\ No newline at end of file
+MEMORY_K = 5  # turnos recientes que se envían literalmente al condensar la pregunta
+MEMORY_MAX_TOKENS = int(os.getenv("MEMORY_MAX_TOKENS", "1000"))  # presupuesto de esos turnos; el resto se resume
+MEMORY_SUMMARY_WORKERS = 2  # hilos que actualizan los resúmenes de conversación fuera de la petición
+HYBRID_SEARCH = os.getenv("HYBRID_SEARCH", "true").lower() == "true"  # fusiona BM25 + denso si hay índice léxico
+HYBRID_CANDIDATES = 20  # candidatos por cada recuperador antes de la fusión
+RRF_K = 60
+CONTEXT_MAX_TOKENS = int(os.getenv("CONTEXT_MAX_TOKENS", "2500"))  # presupuesto del contexto del prompt de respuesta
+MMR_ENABLED = os.getenv("MMR_ENABLED", "true").lower() == "true"  # diversifica los resultados densos con MMR
+MMR_CANDIDATES = int(os.getenv("MMR_CANDIDATES", "20"))  # candidatos (con sus vectores) sobre los que se aplica MMR
+MMR_LAMBDA = float(os.getenv("MMR_LAMBDA", "0.7"))  # 1 = solo relevancia, 0 = solo diversidad
+
+# Modo de baja latencia: omite la condensación sin historial y recupera en paralelo con ella
+LOW_LATENCY_MODE = os.getenv("LOW_LATENCY_MODE", "true").lower() == "true"
+SPECULATIVE_REUSE_THRESHOLD = 0.95  # similitud mínima para reutilizar la recuperación especulativa
+SPECULATIVE_WORKERS = 8
+
+# Caché semántica de respuestas
+ANSWER_CACHE_ENABLED = os.getenv("ANSWER_CACHE_ENABLED", "true").lower() == "true"
+ANSWER_CACHE_THRESHOLD = float(os.getenv("ANSWER_CACHE_THRESHOLD", "0.95"))  # similitud coseno mínima
+ANSWER_CACHE_TTL = int(os.getenv("ANSWER_CACHE_TTL", "86400"))  # segundos
+ANSWER_CACHE_MAX_ENTRIES = int(os.getenv("ANSWER_CACHE_MAX_ENTRIES", "1000"))
+
+# Configuración de ingesta
+PDF_WORKERS = int(os.getenv("PDF_WORKERS", os.cpu_count() or 1))
+PDF_PAGES_PER_TASK = int(os.getenv("PDF_PAGES_PER_TASK", "50"))
+INGEST_BATCH_SIZE = int(os.getenv("INGEST_BATCH_SIZE", "32"))  # páginas por lote
+INGEST_MAX_IN_FLIGHT = int(os.getenv("INGEST_MAX_IN_FLIGHT", "2"))  # lotes en cola entre etapas
+
+# Servicio HTTP (src/api.py)
+API_MAX_CONCURRENCY = int(os.getenv("API_MAX_CONCURRENCY", "32"))  # preguntas procesándose a la vez
+SESSION_TTL = int(os.getenv("SESSION_TTL", "3600"))  # segundos sin actividad antes de descartar una sesión
+SESSION_MAX_COUNT = int(os.getenv("SESSION_MAX_COUNT", "1000"))  # sesiones en memoria (se descartan las más antiguas)
+
+# Preguntas en lote (src/batch_qa.py)
+BATCH_QA_CONCURRENCY = int(os.getenv("BATCH_QA_CONCURRENCY", "8"))  # recuperaciones y llamadas al LLM en paralelo
+BATCH_QA_CHUNK_SIZE = int(os.getenv("BATCH_QA_CHUNK_SIZE", "32"))  # preguntas distintas por lote (y por punto de control)
+
+# Lematización con spaCy (índice léxico y normalización de consultas)
+LEMMA_BATCH_SIZE = int(os.getenv("LEMMA_BATCH_SIZE", "64"))  # textos por lote de nlp.pipe
+LEMMA_PROCESSES = int(os.getenv("LEMMA_PROCESSES", "1"))  # procesos de nlp.pipe (1 = en el mismo proceso)
+LEMMA_QUERY_CACHE_SIZE = 1024  # consultas cortas lematizadas que se guardan en memoria
+LEMMA_QUERY_MAX_CHARS = 256  # longitud máxima de una consulta para entrar en la caché
+
+# Almacenamiento local (manifiestos, cachés e índices auxiliares)
+STORAGE_DIR = os.getenv("STORAGE_DIR", "storage")
+MANIFEST_PATH = os.path.join(STORAGE_DIR, "manifest.json")
+CHUNK_STORE_PATH = os.path.join(STORAGE_DIR, "chunks.sqlite")
+LOCAL_INDEX_DIR = os.path.join(STORAGE_DIR, "local_index")
+LEXICAL_INDEX_DIR = os.path.join(STORAGE_DIR, "lexical_index")
+ARTICLE_INDEX_PATH = os.path.join(STORAGE_DIR, "article_index.json")
+INDEX_VERSION_PATH = os.path.join(STORAGE_DIR, "index_version")
+TRACING_JSON_PATH = os.getenv("TRACING_JSON_PATH", os.path.join(STORAGE_DIR, "traces.jsonl"))
+TRACING_PROMETHEUS_PATH = os.getenv("TRACING_PROMETHEUS_PATH", os.path.join(STORAGE_DIR, "metrics.prom"))
+
+# Configuración del LLM de resúmenes (multi representation)
+OLLAMA_BASE_URL = os.getenv("OLLAMA_BASE_URL", "http://localhost:11434")
+SUMMARY_MODEL = os.getenv("SUMMARY_MODEL", "llama3.2")
+SUMMARY_CONCURRENCY = int(os.getenv("SUMMARY_CONCURRENCY", "4"))
+SUMMARY_CACHE_PATH = os.path.join(STORAGE_DIR, "summary_cache.sqlite")
+SUMMARY_CACHE_MAX_MB = int(os.getenv("SUMMARY_CACHE_MAX_MB", "512"))
+
+# Configuración de embeddings
+EMBEDDING_MODEL = os.getenv("EMBEDDING_MODEL", "text-embedding-3-large")
+EMBEDDING_NATIVE_DIMENSIONS = {"text-embedding-3-large": 3072, "text-embedding-3-small": 1536, "text-embedding-ada-002": 1536}
+# Dimensión de los vectores: la nativa del modelo o una reducida (p. ej. 256 o 1024) con los
+# embeddings acortados de los modelos text-embedding-3. Cambiarla exige migrar el índice (src/migrate_embeddings.py)
+EMBEDDING_DIMENSIONS = int(os.getenv("EMBEDDING_DIMENSIONS", EMBEDDING_NATIVE_DIMENSIONS.get(EMBEDDING_MODEL, 3072)))
+EMBEDDING_CACHE_DIR = os.path.join(STORAGE_DIR, "embeddings")
+EMBEDDING_CACHE_DTYPE = os.getenv("EMBEDDING_CACHE_DTYPE", "float32")  # float32 o float16
+EMBEDDING_QUERY_CACHE_SIZE = int(os.getenv("EMBEDDING_QUERY_CACHE_SIZE", "1024"))  # consultas embebidas en memoria (LRU)
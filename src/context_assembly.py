@@ -0,0 +1,145 @@
+# src/context_assembly.py
+from .article_index import CHUNK_PREFIX_PATTERN
+from .config import CONTEXT_MAX_TOKENS
+from .utils.tokens import count_tokens, get_encoding
+
+# Solapamiento buscado entre chunks vecinos (chunk_overlap de get_text_splitter, con margen);
+# coincidencias más cortas que el mínimo se consideran casuales
+MAX_OVERLAP_CHARS = 400
+MIN_OVERLAP_CHARS = 20
+# El splitter recorta los espacios y saltos de línea entre chunks, así que dos chunks contiguos
+# pueden quedar separados por unos pocos caracteres de espacio en blanco
+MAX_GAP_CHARS = 3
+
+def _page(metadata):
+    try:
+        return int(metadata.get("page", 0))
+    except (TypeError, ValueError):
+        return 0
+
+def _start(metadata):
+    try:
+        return int(metadata["start_index"])
+    except (KeyError, TypeError, ValueError):
+        return None
+
+def _page_chars(metadata):
+    try:
+        return int(metadata["page_chars"])
+    except (KeyError, TypeError, ValueError):
+        return None
+
+def _overlap(previous, text):
+    """Longitud del sufijo de `previous` que se repite al inicio de `text`"""
+    for size in range(min(len(previous), len(text), MAX_OVERLAP_CHARS), MIN_OVERLAP_CHARS - 1, -1):
+        if previous.endswith(text[:size]):
+            return size
+    return 0
+
+class _Block:
+    """Fragmento contiguo de un documento formado por uno o más chunks fusionados"""
+
+    def __init__(self, rank, metadata, text):
+        self.rank = rank
+        self.filename = metadata.get("filename", "N/A")
+        self.first_label = self.last_label = metadata.get("page_label", metadata.get("page", ""))
+        self.last_page = _page(metadata)
+        self.last_page_chars = _page_chars(metadata)
+        start = _start(metadata)
+        self.last_end = start + len(text) if start is not None else None
+        self.text = text
+
+    def try_merge(self, rank, metadata, text):
+        """
+        Añade el chunk si continúa este bloque: en la misma página, solapado o contiguo (con hasta
+        MAX_GAP_CHARS de espacio en blanco recortado entre ambos); en la página siguiente, solo si
+        el bloque llega al final de su página y el chunk empieza al inicio de la suya
+        """
+        if metadata.get("filename", "N/A") != self.filename:
+            return False
+        page, start = _page(metadata), _start(metadata)
+        if page == self.last_page and start is not None and self.last_end is not None:
+            gap = start - self.last_end
+            if gap > MAX_GAP_CHARS:
+                return False
+            if gap > 0:
+                addition = "\n" + text
+                end = start + len(text)
+            else:
+                # El solapamiento se conoce exactamente por las posiciones en la página
+                addition = text[-gap:]
+                end = max(self.last_end, start + len(text))
+        elif page == self.last_page and _overlap(self.text, text):
+            # Chunks sin posición (vectores antiguos): se fusionan si el solapamiento coincide
+            addition = text[_overlap(self.text, text):]
+            end = None
+        elif page == self.last_page + 1 and start is not None and start <= MAX_GAP_CHARS and self._reaches_page_end():
+            addition = "\n" + text
+            end = start + len(text)
+        else:
+            return False
+        self.text += addition
+        self.rank = min(self.rank, rank)
+        self.last_page = page
+        self.last_page_chars = _page_chars(metadata)
+        self.last_label = metadata.get("page_label", metadata.get("page", ""))
+        self.last_end = end
+        return True
+
+    def _reaches_page_end(self):
+        # Sin la longitud de la página (vectores antiguos) no se puede saber: no se fusiona
+        return self.last_end is not None and self.last_page_chars is not None and self.last_end >= self.last_page_chars
+
+    def header(self):
+        pages = self.first_label if self.first_label == self.last_label else f"{self.first_label}-{self.last_label}"
+        return f"Archivo: {self.filename}. Página: {pages}."
+
+def _merge_blocks(docs):
+    """Agrupa los documentos en bloques contiguos; el rango de un bloque es el mejor de sus chunks"""
+    ranked = [
+        (rank, doc.metadata, CHUNK_PREFIX_PATTERN.sub("", doc.page_content, count=1))
+        for rank, doc in enumerate(docs)
+    ]
+    # Orden de lectura dentro de cada archivo para poder fusionar vecinos
+    ranked.sort(key=lambda item: (item[1].get("filename", ""), _page(item[1]), _start(item[1]) or 0))
+    blocks = []
+    seen = set()
+    for rank, metadata, text in ranked:
+        key = metadata.get("id") or (metadata.get("filename"), _page(metadata), text)
+        if key in seen:
+            continue
+        seen.add(key)
+        if not blocks or not blocks[-1].try_merge(rank, metadata, text):
+            blocks.append(_Block(rank, metadata, text))
+    return sorted(blocks, key=lambda block: block.rank)
+
+def _truncate(text, max_tokens):
+    encoding = get_encoding()
+    return encoding.decode(encoding.encode(text)[:max_tokens])
+
+def assemble_context(docs, max_tokens=CONTEXT_MAX_TOKENS):
+    """
+    Construye el contexto del prompt de respuesta: fusiona chunks contiguos del mismo
+    archivo, elimina el solapamiento entre ellos y el prefijo "Tipo/Archivo/Página" repetido,
+    y empaqueta los bloques por relevancia hasta `max_tokens`.
+    Devuelve (contexto, tokens_antes, tokens_después); "antes" es la suma de los chunks sin ensamblar.
+    """
+    tokens_before = sum(count_tokens(doc.page_content) for doc in docs)
+    parts = []
+    tokens_after = 0
+    remaining = max_tokens
+    for block in _merge_blocks(docs):
+        part = f"{block.header()}\n{block.text.strip()}"
+        tokens = count_tokens(part) + 2  # separador entre bloques
+        if tokens > remaining:
+            # El bloque más relevante que no cabe se recorta; los siguientes se omiten
+            if remaining > 50:
+                parts.append(_truncate(part, remaining - 2))
+                tokens_after += remaining
+            break
+        parts.append(part)
+        tokens_after += tokens
+        remaining -= tokens
+    context = "\n\n".join(parts)
+    # Los recuentos por bloque ya incluyen el separador; el último no lo lleva
+    return context, tokens_before, max(tokens_after - 2, 0)
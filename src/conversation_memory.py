@@ -0,0 +1,113 @@
+# src/conversation_memory.py
+import contextvars
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from .config import MEMORY_K, MEMORY_MAX_TOKENS, MEMORY_SUMMARY_WORKERS
+from .utils.tokens import count_tokens
+
+def format_messages(messages):
+    return "\n".join(f"{message['role']}: {message['content']}" for message in messages)
+
+def create_history_summarizer(llm):
+    """Función (resumen_anterior, mensajes_nuevos) -> resumen_actualizado basada en el LLM dado"""
+    from langchain_core.output_parsers import StrOutputParser
+    from .prompts import CONVERSATION_SUMMARY_PROMPT
+    chain = CONVERSATION_SUMMARY_PROMPT | llm | StrOutputParser()
+
+    def summarize(summary, messages):
+        return chain.invoke({"summary": summary or "(vacío)", "new_lines": format_messages(messages)})
+    return summarize
+
+# Compartido por todas las sesiones del proceso
+_summary_executor = ThreadPoolExecutor(max_workers=MEMORY_SUMMARY_WORKERS)
+
+class SummaryBufferMemory:
+    """
+    Memoria de conversación acotada por tokens, una por sesión.
+
+    Recibe el historial completo ([{"role", "content"}]) y devuelve uno compacto: los
+    últimos `max_turns` turnos literales, siempre que quepan en `max_tokens`, precedidos
+    de un resumen de los anteriores. El resumen se actualiza de forma incremental: solo
+    se envían al LLM los mensajes que salen de la ventana desde la última llamada.
+
+    La llamada al LLM no bloquea la petición: se lanza en segundo plano y, mientras no
+    termina, se usa el último resumen completado seguido de los mensajes aún sin resumir.
+    """
+
+    def __init__(self, summarize, max_turns=MEMORY_K, max_tokens=MEMORY_MAX_TOKENS):
+        self.summarize = summarize
+        self.max_turns = max_turns
+        self.max_tokens = max_tokens
+        self.summary = ""
+        self.summarized = 0  # mensajes del historial ya incorporados al resumen
+        self.last_tokens_saved = 0
+        self.total_tokens_saved = 0
+        self._lock = threading.Lock()
+        self._pending = None  # actualización del resumen en curso
+        self._pending_until = 0  # mensajes que quedarán resumidos cuando termine
+        self._generation = 0  # cambia al reiniciarse la conversación
+
+    def _recent_start(self, messages):
+        start = max(self.summarized, len(messages) - 2 * self.max_turns)
+        # Se descartan turnos completos (pregunta y respuesta) hasta entrar en el presupuesto,
+        # conservando siempre el último
+        while len(messages) - start > 2 and count_tokens(format_messages(messages[start:])) > self.max_tokens:
+            start += 2
+        return start
+
+    def history(self, messages):
+        """Historial compacto para el prompt de condensación"""
+        messages = list(messages or [])
+        with self._lock:
+            # El historial se reinició (nueva conversación): se descarta el resumen
+            if len(messages) < max(self.summarized, self._pending_until if self._pending else 0):
+                self.summary, self.summarized = "", 0
+                self._generation += 1
+                self._pending = None
+
+            start = self._recent_start(messages)
+            if start > self.summarized and self._pending is None:
+                self._pending = _summary_executor.submit(
+                    contextvars.copy_context().run, self._update_summary,
+                    self._generation, self.summary, messages[self.summarized:start], start
+                )
+                self._pending_until = start
+
+            # Los mensajes que salieron de la ventana pero aún no están resumidos se envían literalmente
+            compact = messages[min(start, self.summarized):]
+            if self.summary:
+                compact = [{"role": "system", "content": f"Resumen de la conversación anterior: {self.summary}"}] + compact
+
+            self.last_tokens_saved = max(
+                count_tokens(format_messages(messages)) - count_tokens(format_messages(compact)), 0
+            )
+            self.total_tokens_saved += self.last_tokens_saved
+            return compact
+
+    def _update_summary(self, generation, summary, messages, summarized):
+        try:
+            summary = self.summarize(summary, messages)
+        except Exception as e:
+            # Se reintenta en el siguiente turno con los mismos mensajes
+            print(f"No se pudo actualizar el resumen de la conversación: {e!r}")
+            summary = None
+        with self._lock:
+            if generation != self._generation:
+                return
+            if summary is not None:
+                self.summary, self.summarized = summary, summarized
+            self._pending = None
+
+    def wait(self):
+        """Espera a que termine la actualización del resumen en curso, si la hay"""
+        pending = self._pending
+        if pending is not None:
+            pending.result()
+
+    def stats(self):
+        return {
+            "summarized_messages": self.summarized,
+            "summary_tokens": count_tokens(self.summary),
+            "last_tokens_saved": self.last_tokens_saved,
+            "total_tokens_saved": self.total_tokens_saved,
+        }
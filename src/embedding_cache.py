@@ -0,0 +1,286 @@
+# src/embedding_cache.py
+import hashlib
+import json
+import os
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+import numpy as np
+from langchain_core.embeddings import Embeddings
+from .config import EMBEDDING_QUERY_CACHE_SIZE
+
+# Bloqueo entre procesos: flock en POSIX, msvcrt.locking en Windows y, si no hay ninguno,
+# solo el bloqueo entre hilos (un único proceso por directorio de caché)
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+    try:
+        import msvcrt
+    except ImportError:
+        msvcrt = None
+
+class EmbeddingCache:
+    """
+    Almacén en disco de embeddings indexado por hash del texto.
+
+    Los vectores se guardan como una matriz float32/float16 de solo anexado (`vectors.bin`)
+    que se lee mediante memoria mapeada, y el índice es un archivo de texto con una clave
+    por línea (`keys.txt`): la línea i corresponde a la fila i de la matriz.
+
+    Las escrituras se serializan con un bloqueo de archivo (`flock` o `msvcrt.locking`), de modo que
+    varios procesos pueden compartir el directorio; dentro de un proceso se usa una única
+    instancia por directorio (ver `get_cache`).
+    """
+
+    def __init__(self, directory, model, dtype="float32"):
+        self.directory = directory
+        self.model = model
+        self.dtype = np.dtype(dtype)
+        self.dim = None
+        self.hits = 0
+        self.misses = 0
+        self._rows = {}
+        self._count = 0  # filas de vectors.bin cubiertas por keys.txt
+        self._keys_offset = 0  # bytes de keys.txt ya leídos
+        self._matrix = None
+        self._lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+        self._vectors_path = os.path.join(directory, "vectors.bin")
+        self._keys_path = os.path.join(directory, "keys.txt")
+        self._meta_path = os.path.join(directory, "meta.json")
+        self._lock_path = os.path.join(directory, ".lock")
+        with self._file_lock():
+            self._load()
+
+    @contextmanager
+    def _file_lock(self):
+        """Bloqueo exclusivo entre procesos sobre el directorio de la caché"""
+        with open(self._lock_path, "a+b") as f:
+            if fcntl is not None:
+                fcntl.flock(f, fcntl.LOCK_EX)
+            elif msvcrt is not None:
+                # msvcrt bloquea bytes desde la posición actual y reintenta solo ~10 s
+                f.seek(0)
+                while True:
+                    try:
+                        msvcrt.locking(f.fileno(), msvcrt.LK_LOCK, 1)
+                        break
+                    except OSError:
+                        continue
+            try:
+                yield
+            finally:
+                if fcntl is not None:
+                    fcntl.flock(f, fcntl.LOCK_UN)
+                elif msvcrt is not None:
+                    f.seek(0)
+                    msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+
+    def _read_meta(self):
+        if not os.path.exists(self._meta_path):
+            return None
+        with open(self._meta_path, "r", encoding="utf-8") as f:
+            return json.load(f)
+
+    def _load(self):
+        meta = self._read_meta()
+        # Si cambió el modelo o el tipo de dato, la caché anterior no es válida
+        if not meta or meta.get("model") != self.model or meta.get("dtype") != self.dtype.name:
+            for path in (self._vectors_path, self._keys_path, self._meta_path):
+                if os.path.exists(path):
+                    os.remove(path)
+            return
+        self.dim = meta["dim"]
+        self._read_new_keys()
+        self._repair()
+
+    def _row_bytes(self):
+        return self.dim * self.dtype.itemsize
+
+    def _read_new_keys(self):
+        """Registra las claves anexadas a keys.txt desde la última lectura (también por otros procesos)"""
+        if not os.path.exists(self._keys_path):
+            return
+        with open(self._keys_path, "rb") as f:
+            f.seek(self._keys_offset)
+            data = f.read()
+        # Una línea sin salto final es una escritura interrumpida: se descarta en _repair
+        complete = data[:data.rfind(b"\n") + 1]
+        for line in complete.splitlines():
+            self._rows[line.decode("utf-8")] = self._count
+            self._count += 1
+        self._keys_offset += len(complete)
+
+    def _repair(self):
+        """
+        Recorta vectors.bin a las filas que cubre keys.txt (y keys.txt a su última línea completa).
+        Un corte entre la escritura del vector y la de su clave deja filas huérfanas que, sin
+        recortar, desplazarían las claves siguientes a vectores de otro texto.
+        """
+        if os.path.exists(self._keys_path) and os.path.getsize(self._keys_path) > self._keys_offset:
+            os.truncate(self._keys_path, self._keys_offset)
+        stored_rows = os.path.getsize(self._vectors_path) // self._row_bytes() if os.path.exists(self._vectors_path) else 0
+        if stored_rows < self._count:
+            # Claves sin vector (el archivo de vectores se truncó): la caché no es fiable
+            for path in (self._vectors_path, self._keys_path):
+                if os.path.exists(path):
+                    os.remove(path)
+            self._rows, self._count, self._keys_offset = {}, 0, 0
+        elif os.path.exists(self._vectors_path) and os.path.getsize(self._vectors_path) != self._count * self._row_bytes():
+            os.truncate(self._vectors_path, self._count * self._row_bytes())
+
+    def _write_meta(self):
+        with open(self._meta_path, "w", encoding="utf-8") as f:
+            json.dump({"model": self.model, "dtype": self.dtype.name, "dim": self.dim}, f)
+
+    def _mapped(self):
+        """Devuelve la matriz mapeada en memoria (sin copiarla a RAM)"""
+        if self._matrix is None or self._matrix.shape[0] < self._count:
+            self._matrix = np.memmap(
+                self._vectors_path, dtype=self.dtype, mode="r", shape=(self._count, self.dim)
+            )
+        return self._matrix
+
+    def key(self, text):
+        return hashlib.sha256(f"{self.model}\x1f{text}".encode("utf-8")).hexdigest()
+
+    def lookup(self, keys):
+        """Devuelve un dict clave -> vector (vista de la memoria mapeada) para las claves presentes"""
+        with self._lock:
+            found = {key: self._rows[key] for key in keys if key in self._rows}
+            self.hits += len(found)
+            self.misses += len(keys) - len(found)
+            if not found:
+                return {}
+            matrix = self._mapped()
+            return {key: matrix[row] for key, row in found.items()}
+
+    def add(self, keys, vectors):
+        """Anexa nuevos vectores al final del archivo"""
+        if not keys:
+            return
+        array = np.asarray(vectors, dtype=self.dtype)
+        with self._lock, self._file_lock():
+            if self.dim is None:
+                # Otro proceso pudo crear la caché mientras tanto
+                meta = self._read_meta()
+                self.dim = meta["dim"] if meta else array.shape[1]
+                if not meta:
+                    self._write_meta()
+            # Incorpora lo que hayan escrito otros procesos y descarta escrituras interrumpidas
+            self._read_new_keys()
+            self._repair()
+            new = [(key, vector) for key, vector in zip(keys, array) if key not in self._rows]
+            if not new:
+                return
+            # La fila se toma del tamaño real del archivo, no del número de claves en memoria
+            row = os.path.getsize(self._vectors_path) // self._row_bytes() if os.path.exists(self._vectors_path) else 0
+            # Primero los vectores y luego las claves, para que un corte no deje claves huérfanas
+            with open(self._vectors_path, "ab") as f:
+                f.write(np.stack([vector for _, vector in new]).tobytes())
+            lines = "".join(key + "\n" for key, _ in new).encode("utf-8")
+            with open(self._keys_path, "ab") as f:
+                f.write(lines)
+            for offset, (key, _) in enumerate(new):
+                self._rows[key] = row + offset
+            self._count = row + len(new)
+            self._keys_offset += len(lines)
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "entries": len(self._rows),
+        }
+
+_caches = {}
+_caches_lock = threading.Lock()
+
+def get_cache(directory, model, dtype="float32"):
+    """Una única EmbeddingCache por directorio en cada proceso"""
+    with _caches_lock:
+        cache = _caches.get(directory)
+        if cache is None or cache.model != model or cache.dtype != np.dtype(dtype):
+            cache = _caches[directory] = EmbeddingCache(directory, model, dtype)
+        return cache
+
+class CachedEmbeddings(Embeddings):
+    """
+    Envoltorio de un modelo de embeddings que consulta primero la caché en disco.
+
+    `embed_documents` cumple la interfaz de LangChain (listas de floats); la ingesta usa
+    `embed_documents_array`, que devuelve vectores NumPy float32 donde los aciertos son vistas
+    de la memoria mapeada, sin copia (con una caché float16 se convierten). Los embeddings de
+    consultas no se escriben en disco: se guardan en una LRU en memoria de `query_cache_size` entradas.
+    """
+
+    def __init__(self, embeddings, cache: EmbeddingCache, query_cache_size=EMBEDDING_QUERY_CACHE_SIZE):
+        self.embeddings = embeddings
+        self.cache = cache
+        self.query_cache_size = query_cache_size
+        self._queries = OrderedDict()
+        self._queries_lock = threading.Lock()
+
+    def embed_documents_array(self, texts: list[str]) -> list[np.ndarray]:
+        keys = [self.cache.key(text) for text in texts]
+        cached = self.cache.lookup(keys)
+
+        # Calcular solo los textos que faltan (sin repetir textos idénticos)
+        missing = {}
+        for key, text in zip(keys, texts):
+            if key not in cached and key not in missing:
+                missing[key] = text
+        if missing:
+            vectors = np.asarray(self.embeddings.embed_documents(list(missing.values())), dtype=np.float32)
+            self.cache.add(list(missing), vectors)
+            cached.update(zip(missing, vectors))
+
+        return [np.asarray(cached[key], dtype=np.float32) for key in keys]
+
+    def embed_documents(self, texts: list[str]) -> list[list[float]]:
+        return [vector.tolist() for vector in self.embed_documents_array(texts)]
+
+    def embed_query(self, text: str) -> list[float]:
+        key = self.cache.key(text)
+        with self._queries_lock:
+            vector = self._queries.get(key)
+            if vector is not None:
+                self._queries.move_to_end(key)
+                return vector
+        # Una consulta idéntica a un texto indexado ya tiene su vector en disco
+        cached = self.cache.lookup([key])
+        vector = cached[key].tolist() if key in cached else self.embeddings.embed_query(text)
+        self._remember({key: vector})
+        return vector
+
+    def embed_queries(self, texts: list[str]) -> list[list[float]]:
+        """
+        Varias consultas con una sola llamada al modelo (p. ej. un lote de `batch_qa`). Igual
+        que `embed_query`, solo se guardan en la LRU en memoria, nunca en la caché en disco.
+        """
+        keys = [self.cache.key(text) for text in texts]
+        vectors = {}
+        with self._queries_lock:
+            for key in keys:
+                if key in self._queries:
+                    self._queries.move_to_end(key)
+                    vectors[key] = self._queries[key]
+        missing = [key for key in dict.fromkeys(keys) if key not in vectors]
+        if missing:
+            vectors.update((key, vector.tolist()) for key, vector in self.cache.lookup(missing).items())
+            pending = {key: text for key, text in zip(keys, texts) if key not in vectors}
+            if pending:
+                vectors.update(zip(pending, self.embeddings.embed_documents(list(pending.values()))))
+            self._remember({key: vectors[key] for key in missing})
+        return [vectors[key] for key in keys]
+
+    def _remember(self, vectors):
+        with self._queries_lock:
+            self._queries.update(vectors)
+            for key in vectors:
+                self._queries.move_to_end(key)
+            while len(self._queries) > self.query_cache_size:
+                self._queries.popitem(last=False)
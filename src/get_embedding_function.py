@@ -1,14 +1,32 @@
 import os
 from dotenv import load_dotenv
 from langchain_openai import OpenAIEmbeddings
+from .config import (
+    EMBEDDING_MODEL, EMBEDDING_CACHE_DIR, EMBEDDING_CACHE_DTYPE, EMBEDDING_DIMENSIONS, EMBEDDING_NATIVE_DIMENSIONS
+)
+from .embedding_cache import CachedEmbeddings, get_cache
 
 # Cargar variables de entorno desde un archivo .env
 load_dotenv()
 
-def get_embedding_function():
+def get_embedding_function(cached=True, http_client=None, dimensions=EMBEDDING_DIMENSIONS):
+    # `dimensions` solo se envía si difiere de la nativa: los modelos antiguos no aceptan el parámetro
+    reduced = dimensions != EMBEDDING_NATIVE_DIMENSIONS.get(EMBEDDING_MODEL)
     embeddings = OpenAIEmbeddings(
         openai_api_key=os.getenv("OPENAI_API_KEY"),
-        model="text-embedding-3-large" 
+        model=EMBEDDING_MODEL,
+        dimensions=dimensions if reduced else None,
+        http_client=http_client
     )
-    return embeddings
-
+    if not cached:
+        return embeddings
+    
+    # Envolver con la caché en disco para no recalcular embeddings ya conocidos
+    # (una caché por dimensión: los vectores acortados no sirven para otra)
+    model_key = f"{EMBEDDING_MODEL}-{dimensions}" if reduced else EMBEDDING_MODEL
+    cache = get_cache(
+        os.path.join(EMBEDDING_CACHE_DIR, model_key),
+        model=model_key,
+        dtype=EMBEDDING_CACHE_DTYPE
+    )
+    return CachedEmbeddings(embeddings, cache)
@@ -0,0 +1,71 @@
+# src/index_manifest.py
+import hashlib
+import json
+import os
+
+MANIFEST_VERSION = 1
+
+def file_hash(path, block_size=1 << 20):
+    """Calcula el hash SHA-256 del contenido de un archivo"""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(block_size), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+def chunk_content_hash(doc_type, filename, page, text):
+    """Hash estable del contenido de un chunk (no depende del momento de la ingesta)"""
+    payload = "\x1f".join([str(doc_type), str(filename), str(page), text])
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+class IndexManifest:
+    """
+    Registro local de archivo -> (hash del archivo, IDs de chunks) indexados en Pinecone.
+    Permite saber qué cambió sin consultar el índice.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.files = {}
+
+    @classmethod
+    def load(cls, path):
+        manifest = cls(path)
+        if os.path.exists(path):
+            try:
+                with open(path, "r", encoding="utf-8") as f:
+                    data = json.load(f)
+                if data.get("version") == MANIFEST_VERSION:
+                    manifest.files = data.get("files", {})
+            except (OSError, ValueError) as e:
+                print(f"Manifiesto inválido en {path}, se reconstruirá: {e}")
+        return manifest
+
+    def save(self):
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        # Escritura atómica para no corromper el manifiesto si el proceso se interrumpe
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"version": MANIFEST_VERSION, "files": self.files}, f, ensure_ascii=False, indent=1)
+        os.replace(tmp_path, self.path)
+
+    def is_current(self, source, digest):
+        entry = self.files.get(source)
+        return entry is not None and entry.get("hash") == digest
+
+    def chunk_ids(self, source):
+        return set(self.files.get(source, {}).get("chunk_ids", []))
+
+    def update(self, source, digest, chunk_ids):
+        self.files[source] = {"hash": digest, "chunk_ids": sorted(chunk_ids)}
+
+    def remove(self, source):
+        self.files.pop(source, None)
+
+    def sources(self):
+        return set(self.files)
+
+    def clear(self):
+        self.files = {}
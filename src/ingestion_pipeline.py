@@ -0,0 +1,103 @@
+# src/ingestion_pipeline.py
+import queue
+import threading
+import time
+from itertools import islice
+
+_DONE = object()
+
+def batched(iterable, size):
+    """Agrupa un iterable en listas de hasta `size` elementos sin materializarlo completo"""
+    iterator = iter(iterable)
+    while True:
+        batch = list(islice(iterator, size))
+        if not batch:
+            return
+        yield batch
+
+class Pipeline:
+    """
+    Pipeline por etapas conectadas con colas acotadas.
+
+    Cada etapa corre en su propio hilo y procesa lotes a medida que llegan, de modo que
+    la carga de PDFs, el LLM, los embeddings y el upsert trabajan en paralelo. Las colas
+    tienen un tamaño máximo (`max_in_flight`), así una etapa lenta frena a las anteriores
+    (back-pressure) y la memoria queda acotada por el número de lotes en vuelo.
+    """
+
+    def __init__(self, max_in_flight=2):
+        self.max_in_flight = max(1, max_in_flight)
+        self.stages = []
+        self.timings = {}
+        self._error = None
+        self._stop = threading.Event()
+
+    def add_stage(self, name, fn):
+        """Añade una etapa `fn(batch) -> batch` (si devuelve None, el lote se descarta)"""
+        self.stages.append((name, fn))
+        return self
+
+    def _put(self, q, item):
+        # Reintentar con timeout para poder abortar si otra etapa falla
+        while not self._stop.is_set():
+            try:
+                q.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def _get(self, q):
+        while not self._stop.is_set():
+            try:
+                return q.get(timeout=0.1)
+            except queue.Empty:
+                continue
+        return _DONE
+
+    def _fail(self, name, error):
+        if self._error is None:
+            self._error = (name, error)
+        self._stop.set()
+
+    def _run_stage(self, name, fn, in_q, out_q):
+        try:
+            while True:
+                batch = self._get(in_q)
+                if batch is _DONE:
+                    break
+                started = time.perf_counter()
+                result = fn(batch)
+                self.timings[name] = self.timings.get(name, 0.0) + time.perf_counter() - started
+                if result is not None and out_q is not None and not self._put(out_q, result):
+                    return
+        except Exception as e:
+            self._fail(name, e)
+            return
+        if out_q is not None:
+            self._put(out_q, _DONE)
+
+    def run(self, batches):
+        """Consume el generador de lotes de entrada hasta agotarlo y espera a todas las etapas"""
+        queues = [queue.Queue(maxsize=self.max_in_flight) for _ in self.stages]
+        threads = []
+        for i, (name, fn) in enumerate(self.stages):
+            out_q = queues[i + 1] if i + 1 < len(queues) else None
+            thread = threading.Thread(target=self._run_stage, args=(name, fn, queues[i], out_q), daemon=True)
+            thread.start()
+            threads.append(thread)
+
+        try:
+            for batch in batches:
+                if not self._put(queues[0], batch):
+                    break
+        except Exception as e:
+            self._fail("source", e)
+        self._put(queues[0], _DONE)
+
+        for thread in threads:
+            thread.join()
+        if self._error is not None:
+            name, error = self._error
+            raise RuntimeError(f"Fallo en la etapa '{name}' del pipeline de ingesta") from error
+        return self.timings
@@ -0,0 +1,179 @@
+# src/lexical_index.py
+import json
+import os
+from functools import lru_cache
+import numpy as np
+from .config import LEXICAL_INDEX_DIR
+
+# Campos de metadatos que se codifican por documento para poder filtrar sin el índice vectorial
+FILTER_FIELDS = ("doc_type", "filename")
+
+class BM25Index:
+    """
+    Índice invertido BM25 sobre el texto lematizado de los chunks.
+
+    Las listas de postings se guardan en formato CSR (offsets por término, documentos y
+    frecuencias) dentro de un .npz comprimido, junto con el vocabulario y los IDs de chunk.
+    """
+
+    def __init__(self, ids, vocabulary, offsets, postings, frequencies, doc_lengths, fields, k1=1.5, b=0.75):
+        self.ids = ids
+        self.vocabulary = vocabulary
+        self.offsets = offsets
+        self.postings = postings
+        self.frequencies = frequencies
+        self.doc_lengths = doc_lengths
+        self.fields = fields
+        self.k1 = k1
+        self.b = b
+        self.avg_length = float(doc_lengths.mean()) if len(doc_lengths) else 0.0
+        df = np.diff(offsets).astype(np.float32)
+        n = len(ids)
+        self.idf = np.log(1.0 + (n - df + 0.5) / (df + 0.5)).astype(np.float32)
+
+    @classmethod
+    def build(cls, records):
+        """Construye el índice a partir de (id, metadata, texto_lematizado)"""
+        ids = []
+        vocabulary = {}
+        term_ids, doc_ids, counts = [], [], []
+        doc_lengths = []
+        fields = {field: ([], {}) for field in FILTER_FIELDS}
+
+        for doc, (chunk_id, metadata, lemmas) in enumerate(records):
+            ids.append(chunk_id)
+            tokens = lemmas.split()
+            doc_lengths.append(len(tokens))
+            frequencies = {}
+            for token in tokens:
+                term = vocabulary.setdefault(token, len(vocabulary))
+                frequencies[term] = frequencies.get(term, 0) + 1
+            for term, count in frequencies.items():
+                term_ids.append(term)
+                doc_ids.append(doc)
+                counts.append(count)
+            for field, (codes, values) in fields.items():
+                codes.append(values.setdefault(metadata.get(field), len(values)))
+
+        term_ids = np.asarray(term_ids, dtype=np.int64)
+        order = np.argsort(term_ids, kind="stable")
+        offsets = np.zeros(len(vocabulary) + 1, dtype=np.int64)
+        np.cumsum(np.bincount(term_ids, minlength=len(vocabulary)), out=offsets[1:])
+        encoded_fields = {
+            field: (np.asarray(codes, dtype=np.int32), list(values))
+            for field, (codes, values) in fields.items()
+        }
+        return cls(
+            ids,
+            vocabulary,
+            offsets,
+            np.asarray(doc_ids, dtype=np.int32)[order],
+            np.asarray(counts, dtype=np.float32)[order],
+            np.asarray(doc_lengths, dtype=np.float32),
+            encoded_fields,
+        )
+
+    def save(self, directory):
+        os.makedirs(directory, exist_ok=True)
+        arrays = {
+            "offsets": self.offsets,
+            "postings": self.postings,
+            "frequencies": self.frequencies.astype(np.uint16),
+            "doc_lengths": self.doc_lengths,
+        }
+        for field, (codes, _) in self.fields.items():
+            arrays[f"field_{field}"] = codes
+        np.savez_compressed(os.path.join(directory, "bm25.npz"), **arrays)
+        with open(os.path.join(directory, "bm25.json"), "w", encoding="utf-8") as f:
+            json.dump({
+                "ids": self.ids,
+                "vocabulary": sorted(self.vocabulary, key=self.vocabulary.get),
+                "fields": {field: values for field, (_, values) in self.fields.items()},
+            }, f, ensure_ascii=False)
+
+    @classmethod
+    def load(cls, directory):
+        with open(os.path.join(directory, "bm25.json"), "r", encoding="utf-8") as f:
+            meta = json.load(f)
+        arrays = np.load(os.path.join(directory, "bm25.npz"))
+        fields = {
+            field: (arrays[f"field_{field}"], values)
+            for field, values in meta["fields"].items()
+        }
+        return cls(
+            meta["ids"],
+            {term: i for i, term in enumerate(meta["vocabulary"])},
+            arrays["offsets"],
+            arrays["postings"],
+            arrays["frequencies"].astype(np.float32),
+            arrays["doc_lengths"],
+            fields,
+        )
+
+    def _filter_mask(self, filter):
+        if not filter:
+            return None
+        mask = np.ones(len(self.ids), dtype=bool)
+        for field, condition in filter.items():
+            if field not in self.fields:
+                continue
+            codes, values = self.fields[field]
+            accepted = condition["$in"] if isinstance(condition, dict) and "$in" in condition else [condition]
+            wanted = [i for i, value in enumerate(values) if value in accepted]
+            mask &= np.isin(codes, wanted)
+        return mask
+
+    def search_terms(self, terms, k=20, filter=None):
+        """Devuelve [(chunk_id, score)] para una consulta ya lematizada"""
+        scores = np.zeros(len(self.ids), dtype=np.float32)
+        norm = self.k1 * (1.0 - self.b + self.b * self.doc_lengths / max(self.avg_length, 1e-9))
+        for term in set(terms):
+            term_id = self.vocabulary.get(term)
+            if term_id is None:
+                continue
+            start, end = self.offsets[term_id], self.offsets[term_id + 1]
+            docs = self.postings[start:end]
+            tf = self.frequencies[start:end]
+            scores[docs] += self.idf[term_id] * tf * (self.k1 + 1.0) / (tf + norm[docs])
+
+        mask = self._filter_mask(filter)
+        if mask is not None:
+            scores[~mask] = 0.0
+        matched = np.flatnonzero(scores > 0)
+        if len(matched) == 0:
+            return []
+        k = min(k, len(matched))
+        top = matched[np.argpartition(-scores[matched], k - 1)[:k]]
+        top = top[np.argsort(-scores[top])]
+        return [(self.ids[i], float(scores[i])) for i in top]
+
+    def search(self, query, k=20, filter=None):
+        # Import diferido: spaCy solo se carga si existe un índice léxico que consultar
+        from .text_preprocessing import preprocess_query
+        return self.search_terms(preprocess_query(query).split(), k=k, filter=filter)
+
+def reciprocal_rank_fusion(rankings, k=60, with_scores=False):
+    """Fusiona listas de IDs ordenadas por relevancia con Reciprocal Rank Fusion"""
+    scores = {}
+    for ranking in rankings:
+        for rank, chunk_id in enumerate(ranking):
+            scores[chunk_id] = scores.get(chunk_id, 0.0) + 1.0 / (k + rank + 1)
+    fused = sorted(scores, key=scores.get, reverse=True)
+    if with_scores:
+        return [(chunk_id, scores[chunk_id]) for chunk_id in fused]
+    return fused
+
+def build_lexical_index(chunk_store, directory=LEXICAL_INDEX_DIR):
+    """Reconstruye el índice BM25 a partir del texto lematizado guardado en el almacén de chunks"""
+    index = BM25Index.build(chunk_store.iter_lexical())
+    index.save(directory)
+    get_lexical_index.cache_clear()
+    print(f"Índice léxico BM25: {len(index.ids)} chunks, {len(index.vocabulary)} términos")
+    return index
+
+@lru_cache(maxsize=None)
+def get_lexical_index():
+    """Índice BM25 compartido; None si aún no se ha construido"""
+    if not os.path.exists(os.path.join(LEXICAL_INDEX_DIR, "bm25.npz")):
+        return None
+    return BM25Index.load(LEXICAL_INDEX_DIR)
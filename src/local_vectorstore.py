@@ -0,0 +1,320 @@
+# src/local_vectorstore.py
+import json
+import os
+import numpy as np
+from langchain_core.documents import Document
+from langchain_core.vectorstores import VectorStore
+
+# Campos para los que se precalculan particiones (filas por valor) y así filtrar sin recorrer metadatos
+PARTITION_FIELDS = ("doc_type", "filename")
+
+# Filas por bloque al convertir la copia cuantizada a float32 (acota la memoria temporal)
+SCORE_BLOCK_ROWS = 4096
+QUANTIZED_DTYPES = ("float32", "float16", "int8")
+
+def _normalize(matrix):
+    norms = np.linalg.norm(matrix, axis=-1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return matrix / norms
+
+def quantize(matrix, dtype):
+    """
+    Copia cuantizada de una matriz de vectores normalizados: (códigos, escalas).
+    float16 no necesita escalas; int8 usa una escala por dimensión (máximo absoluto / 127),
+    porque en vectores normalizados de muchas dimensiones cada componente es pequeña.
+    """
+    if dtype == "float16":
+        return np.asarray(matrix, dtype=np.float16), None
+    if dtype != "int8":
+        raise ValueError(f"Tipo de cuantización no soportado: {dtype} (opciones: {', '.join(QUANTIZED_DTYPES)})")
+    scales = np.zeros(matrix.shape[1], dtype=np.float32)
+    for start in range(0, len(matrix), SCORE_BLOCK_ROWS):
+        scales = np.maximum(scales, np.abs(np.asarray(matrix[start:start + SCORE_BLOCK_ROWS])).max(axis=0))
+    scales = scales / 127
+    scales[scales == 0] = 1.0
+    codes = np.empty(matrix.shape, dtype=np.int8)
+    for start in range(0, len(matrix), SCORE_BLOCK_ROWS):
+        block = np.asarray(matrix[start:start + SCORE_BLOCK_ROWS], dtype=np.float32)
+        codes[start:start + SCORE_BLOCK_ROWS] = np.clip(np.rint(block / scales), -127, 127)
+    return codes, scales
+
+def _kmeans(matrix, n_clusters, iterations=10, seed=0):
+    """K-means (Lloyd) sobre vectores normalizados; devuelve centroides normalizados y asignaciones"""
+    rng = np.random.default_rng(seed)
+    centroids = matrix[rng.choice(len(matrix), n_clusters, replace=False)].astype(np.float32)
+    for _ in range(iterations):
+        assignments = np.argmax(matrix @ centroids.T, axis=1)
+        for c in range(n_clusters):
+            members = matrix[assignments == c]
+            if len(members):
+                centroids[c] = members.mean(axis=0)
+        centroids = _normalize(centroids)
+    return centroids, np.argmax(matrix @ centroids.T, axis=1)
+
+class LocalVectorStore(VectorStore):
+    """
+    Índice vectorial local equivalente a PineconeVectorStore.
+
+    Guarda una matriz float32 de embeddings normalizados (`embeddings.npy`, leída con memoria
+    mapeada) y los metadatos de cada fila (`records.jsonl`). La búsqueda es coseno exacta
+    con top-k vectorizado o, si `nlist > 0`, aproximada tipo IVF explorando `nprobe` clusters.
+    Con `dtype` "float16" o "int8" se mantiene en memoria una copia cuantizada para la primera
+    pasada y solo los `rescore_factor * k` mejores candidatos se recalculan en float32.
+    También expone `upsert`/`delete` con la misma forma que un índice de Pinecone, para que
+    populate_database pueda construirlo con el mismo pipeline.
+    """
+
+    def __init__(self, directory, embedding, nlist=0, nprobe=8, text_key="text", dtype="float32", rescore_factor=4):
+        if dtype not in QUANTIZED_DTYPES:
+            raise ValueError(f"Tipo de cuantización no soportado: {dtype} (opciones: {', '.join(QUANTIZED_DTYPES)})")
+        self.directory = directory
+        self._embedding = embedding
+        self.nlist = nlist
+        self.nprobe = nprobe
+        self.text_key = text_key
+        self.dtype = dtype
+        self.rescore_factor = max(1, rescore_factor)
+        self.quantized = None
+        self.scales = None
+        self.ids = []
+        self.metadatas = []
+        self.matrix = np.zeros((0, 0), dtype=np.float32)
+        self.centroids = None
+        self.assignments = None
+        self.partitions = {}
+        self._pending = {}
+        self._deleted = set()
+
+    @property
+    def embeddings(self):
+        return self._embedding
+
+    @property
+    def dimension(self):
+        return self.matrix.shape[1] if len(self.matrix) else None
+
+    # ----- Persistencia -----
+
+    @classmethod
+    def load(cls, directory, embedding, nlist=0, nprobe=8, dtype="float32", rescore_factor=4):
+        store = cls(directory, embedding, nlist=nlist, nprobe=nprobe, dtype=dtype, rescore_factor=rescore_factor)
+        matrix_path = os.path.join(directory, "embeddings.npy")
+        records_path = os.path.join(directory, "records.jsonl")
+        if os.path.exists(matrix_path) and os.path.exists(records_path):
+            store.matrix = np.load(matrix_path, mmap_mode="r")
+            with open(records_path, "r", encoding="utf-8") as f:
+                for line in f:
+                    record = json.loads(line)
+                    store.ids.append(record["id"])
+                    store.metadatas.append(record["metadata"])
+            ivf_path = os.path.join(directory, "ivf.npz")
+            if os.path.exists(ivf_path):
+                ivf = np.load(ivf_path)
+                store.centroids, store.assignments = ivf["centroids"], ivf["assignments"]
+            store._build_partitions()
+            store._quantize()
+        return store
+
+    def persist(self):
+        """Aplica upserts/borrados pendientes y escribe el índice en disco"""
+        if not self._pending and not self._deleted:
+            return
+        keep = [i for i, chunk_id in enumerate(self.ids) if chunk_id not in self._deleted and chunk_id not in self._pending]
+        ids = [self.ids[i] for i in keep]
+        metadatas = [self.metadatas[i] for i in keep]
+        blocks = [np.asarray(self.matrix[keep], dtype=np.float32)] if keep else []
+        if self._pending:
+            ids.extend(self._pending)
+            metadatas.extend(metadata for _, metadata in self._pending.values())
+            blocks.append(_normalize(np.asarray([values for values, _ in self._pending.values()], dtype=np.float32)))
+        matrix = np.concatenate(blocks) if blocks else np.zeros((0, 0), dtype=np.float32)
+
+        os.makedirs(self.directory, exist_ok=True)
+        # Se escribe en archivos temporales y se reemplaza, para no alterar mapas de memoria abiertos
+        matrix_path = os.path.join(self.directory, "embeddings.npy")
+        with open(matrix_path + ".tmp", "wb") as f:
+            np.save(f, matrix)
+        records_path = os.path.join(self.directory, "records.jsonl")
+        with open(records_path + ".tmp", "w", encoding="utf-8") as f:
+            for chunk_id, metadata in zip(ids, metadatas):
+                f.write(json.dumps({"id": chunk_id, "metadata": metadata}, ensure_ascii=False) + "\n")
+        os.replace(matrix_path + ".tmp", matrix_path)
+        os.replace(records_path + ".tmp", records_path)
+
+        ivf_path = os.path.join(self.directory, "ivf.npz")
+        self.centroids = self.assignments = None
+        if self.nlist and len(matrix) >= self.nlist * 39:
+            self.centroids, self.assignments = _kmeans(matrix, self.nlist)
+            np.savez(ivf_path, centroids=self.centroids, assignments=self.assignments)
+        elif os.path.exists(ivf_path):
+            os.remove(ivf_path)
+
+        self.ids, self.metadatas = ids, metadatas
+        self.matrix = np.load(matrix_path, mmap_mode="r")
+        self._pending, self._deleted = {}, set()
+        self._build_partitions()
+        self._quantize()
+
+    def _quantize(self):
+        """Recalcula la copia cuantizada (en memoria) a partir de la matriz float32 del disco"""
+        self.quantized = self.scales = None
+        if self.dtype != "float32" and len(self.matrix):
+            self.quantized, self.scales = quantize(self.matrix, self.dtype)
+
+    def _build_partitions(self):
+        partitions = {field: {} for field in PARTITION_FIELDS}
+        for row, metadata in enumerate(self.metadatas):
+            for field in PARTITION_FIELDS:
+                if field in metadata:
+                    partitions[field].setdefault(metadata[field], []).append(row)
+        self.partitions = {
+            field: {value: np.asarray(rows, dtype=np.int64) for value, rows in values.items()}
+            for field, values in partitions.items()
+        }
+
+    # ----- API compatible con el índice de Pinecone -----
+
+    def upsert(self, vectors):
+        for vector in vectors:
+            self._deleted.discard(vector["id"])
+            self._pending[vector["id"]] = (vector["values"], vector["metadata"])
+
+    def delete(self, ids=None, delete_all=False, **kwargs):
+        if delete_all:
+            self.ids, self.metadatas = [], []
+            self.matrix = np.zeros((0, 0), dtype=np.float32)
+            self._pending, self._deleted = {}, set()
+            self.centroids = self.assignments = None
+            self.quantized = self.scales = None
+            self.partitions = {}
+            os.makedirs(self.directory, exist_ok=True)
+            for name in ("embeddings.npy", "records.jsonl", "ivf.npz"):
+                path = os.path.join(self.directory, name)
+                if os.path.exists(path):
+                    os.remove(path)
+            return
+        for chunk_id in ids or []:
+            self._pending.pop(chunk_id, None)
+            self._deleted.add(chunk_id)
+
+    # ----- Búsqueda -----
+
+    def _filter_rows(self, filter):
+        """Convierte un filtro estilo Pinecone ({campo: valor | {"$in": [...]}}) en filas candidatas"""
+        if not filter:
+            return None
+        rows = None
+        for field, condition in filter.items():
+            values = condition["$in"] if isinstance(condition, dict) and "$in" in condition else [condition]
+            if field in self.partitions:
+                parts = [self.partitions[field][v] for v in values if v in self.partitions[field]]
+                field_rows = np.unique(np.concatenate(parts)) if parts else np.zeros(0, dtype=np.int64)
+            else:
+                accepted = set(values)
+                field_rows = np.asarray(
+                    [row for row, metadata in enumerate(self.metadatas) if metadata.get(field) in accepted],
+                    dtype=np.int64
+                )
+            rows = field_rows if rows is None else np.intersect1d(rows, field_rows)
+        return rows
+
+    def _probe_rows(self, query):
+        """Filas de los `nprobe` clusters más cercanos a la consulta (búsqueda IVF)"""
+        if self.centroids is None:
+            return None
+        nprobe = min(self.nprobe, len(self.centroids))
+        closest = np.argpartition(-(self.centroids @ query), nprobe - 1)[:nprobe]
+        return np.flatnonzero(np.isin(self.assignments, closest))
+
+    def _approximate_scores(self, rows, query):
+        """Similitud aproximada con la copia cuantizada, por bloques convertidos a float32"""
+        codes = self.quantized if rows is None else self.quantized[rows]
+        scaled = query * self.scales if self.scales is not None else query
+        scores = np.empty(len(codes), dtype=np.float32)
+        for start in range(0, len(codes), SCORE_BLOCK_ROWS):
+            scores[start:start + SCORE_BLOCK_ROWS] = codes[start:start + SCORE_BLOCK_ROWS].astype(np.float32) @ scaled
+        return scores
+
+    def _shortlist(self, rows, query, size):
+        """Filas de los `size` mejores candidatos según la copia cuantizada, en orden de disco"""
+        scores = self._approximate_scores(rows, query)
+        top = np.argpartition(-scores, size - 1)[:size]
+        # Ordenadas, la lectura de los vectores float32 de la memoria mapeada es secuencial
+        return np.sort(top if rows is None else rows[top])
+
+    def search_by_vector(self, embedding, k=4, filter=None, include_vectors=False):
+        """Devuelve [(row, score)] (y opcionalmente los vectores) de los k más similares"""
+        if len(self.ids) == 0:
+            return []
+        query = _normalize(np.asarray(embedding, dtype=np.float32))
+        if len(query) != self.matrix.shape[1]:
+            raise ValueError(
+                f"La consulta tiene dimensión {len(query)} y el índice {self.matrix.shape[1]}; "
+                f"revisa EMBEDDING_DIMENSIONS o migra el índice con src.migrate_embeddings"
+            )
+        rows = self._filter_rows(filter)
+        probe = self._probe_rows(query)
+        if probe is not None:
+            probed = probe if rows is None else np.intersect1d(rows, probe)
+            # Con un filtro selectivo, los clusters sondeados pueden tener menos de k filas que lo
+            # cumplan: entonces se recorren todas las filas filtradas (búsqueda exacta)
+            if len(probed) >= k:
+                rows = probed
+        total = len(self.ids) if rows is None else len(rows)
+        if self.quantized is not None and total > k * self.rescore_factor:
+            # Primera pasada cuantizada; los candidatos se recalculan abajo con float32
+            rows = self._shortlist(rows, query, k * self.rescore_factor)
+        candidates = self.matrix if rows is None else self.matrix[rows]
+        if len(candidates) == 0:
+            return []
+
+        scores = candidates @ query
+        k = min(k, len(scores))
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        result_rows = top if rows is None else rows[top]
+        results = [(int(row), float(scores[i])) for row, i in zip(result_rows, top)]
+        if include_vectors:
+            return results, np.asarray(candidates[top], dtype=np.float32)
+        return results
+
+    def _to_document(self, row):
+        metadata = dict(self.metadatas[row])
+        text = metadata.pop(self.text_key, "")
+        return Document(id=self.ids[row], page_content=text, metadata=metadata)
+
+    def similarity_search_by_vector_with_score(self, embedding, k=4, filter=None, **kwargs):
+        return [(self._to_document(row), score) for row, score in self.search_by_vector(embedding, k, filter)]
+
+    def similarity_search_with_score(self, query, k=4, filter=None, **kwargs):
+        embedding = self._embedding.embed_query(query)
+        return self.similarity_search_by_vector_with_score(embedding, k=k, filter=filter)
+
+    def similarity_search_by_vector(self, embedding, k=4, filter=None, **kwargs):
+        return [doc for doc, _ in self.similarity_search_by_vector_with_score(embedding, k, filter)]
+
+    def similarity_search(self, query, k=4, filter=None, **kwargs):
+        return [doc for doc, _ in self.similarity_search_with_score(query, k=k, filter=filter)]
+
+    def _select_relevance_score_fn(self):
+        return lambda score: (score + 1.0) / 2.0
+
+    # ----- Construcción -----
+
+    def add_texts(self, texts, metadatas=None, ids=None, **kwargs):
+        texts = list(texts)
+        metadatas = metadatas or [{} for _ in texts]
+        ids = ids or [str(i + len(self.ids) + len(self._pending)) for i in range(len(texts))]
+        vectors = self._embedding.embed_documents(texts)
+        self.upsert([
+            {"id": chunk_id, "values": vector, "metadata": {**metadata, self.text_key: text}}
+            for chunk_id, vector, metadata, text in zip(ids, vectors, metadatas, texts)
+        ])
+        self.persist()
+        return ids
+
+    @classmethod
+    def from_texts(cls, texts, embedding, metadatas=None, ids=None, directory=None, **kwargs):
+        store = cls(directory, embedding, **kwargs)
+        store.add_texts(texts, metadatas=metadatas, ids=ids)
+        return store
@@ -0,0 +1,151 @@
+# src/migrate_embeddings.py
+"""
+Migra el índice vectorial a otra dimensión de embeddings.
+
+    python -m src.migrate_embeddings --dimensions 1024            # re-proyecta los vectores existentes
+    python -m src.migrate_embeddings --dimensions 1024 --reembed  # vuelve a embeber los resúmenes
+
+Los modelos text-embedding-3 están entrenados para que los primeros d componentes de un
+embedding, renormalizados, equivalgan al embedding acortado de dimensión d: reducir la
+dimensión no requiere llamar a la API. Para aumentarla hay que volver a embeber (--reembed)
+los resúmenes guardados en el almacén local de chunks.
+
+Índice local: se reescribe en su directorio y el anterior queda en <dir>.bak-<dimensión>.
+Pinecone: la dimensión de un índice es fija, así que se crea uno nuevo (--target-index,
+por defecto <PINECONE_INDEX_NAME>-<dimensión>) y se copian los vectores con sus metadatos.
+Al terminar hay que fijar EMBEDDING_DIMENSIONS (y en Pinecone, PINECONE_INDEX_NAME).
+"""
+import argparse
+import os
+import shutil
+import numpy as np
+from .config import (
+    VECTORSTORE_BACKEND, LOCAL_INDEX_DIR, LOCAL_INDEX_NLIST, LOCAL_INDEX_NPROBE,
+    PINECONE_API_KEY, PINECONE_INDEX_NAME
+)
+from .answer_cache import bump_index_version
+from .chunk_store import get_chunk_store
+
+# Archivos del índice local que la migración reescribe; el resto (p. ej. el manifiesto) se copia
+LOCAL_INDEX_FILES = ("embeddings.npy", "records.jsonl", "ivf.npz")
+
+def project(vectors, dimensions):
+    """Acorta los embeddings a `dimensions` componentes y los renormaliza"""
+    vectors = np.asarray(vectors, dtype=np.float32)
+    if dimensions > vectors.shape[1]:
+        raise ValueError(
+            f"No se puede proyectar de {vectors.shape[1]} a {dimensions} dimensiones; usa --reembed"
+        )
+    projected = vectors[:, :dimensions]
+    norms = np.linalg.norm(projected, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return projected / norms
+
+def reembed(ids, embedding_function):
+    """Vuelve a embeber los resúmenes (el texto que se indexa) de los chunks indicados"""
+    stored = get_chunk_store().get_many(ids)
+    missing = [chunk_id for chunk_id in ids if chunk_id not in stored]
+    if missing:
+        raise ValueError(f"{len(missing)} chunks no están en el almacén local (p. ej. {missing[0]}); no se pueden re-embeber")
+    return np.asarray(embedding_function.embed_documents([stored[chunk_id][1] for chunk_id in ids]), dtype=np.float32)
+
+def iter_local_batches(index, batch_size):
+    """(ids, vectores, metadatos) del índice local por lotes"""
+    for start in range(0, len(index.ids), batch_size):
+        end = start + batch_size
+        yield index.ids[start:end], np.asarray(index.matrix[start:end], dtype=np.float32), index.metadatas[start:end]
+
+def iter_pinecone_batches(index, batch_size):
+    """(ids, vectores, metadatos) de un índice de Pinecone, listando los IDs por páginas"""
+    for page in index.list(limit=batch_size):
+        ids = list(page)
+        if not ids:
+            continue
+        vectors = index.fetch(ids=ids).vectors
+        ids = [chunk_id for chunk_id in ids if chunk_id in vectors]
+        yield (
+            ids,
+            np.asarray([vectors[chunk_id].values for chunk_id in ids], dtype=np.float32),
+            [dict(vectors[chunk_id].metadata or {}) for chunk_id in ids],
+        )
+
+def convert(batches, dimensions, embedding_function=None):
+    """Vectores listos para `upsert`, proyectados o re-embebidos con `embedding_function`"""
+    for ids, vectors, metadatas in batches:
+        values = reembed(ids, embedding_function) if embedding_function is not None else project(vectors, dimensions)
+        if values.shape[1] != dimensions:
+            raise ValueError(f"El modelo devolvió vectores de dimensión {values.shape[1]}, no {dimensions}")
+        yield [
+            {"id": chunk_id, "values": vector.tolist(), "metadata": metadata}
+            for chunk_id, vector, metadata in zip(ids, values, metadatas)
+        ]
+
+def migrate_local(dimensions, embedding_function=None, batch_size=1000, directory=LOCAL_INDEX_DIR):
+    from .local_vectorstore import LocalVectorStore
+    source = LocalVectorStore.load(directory, None)
+    if not source.ids:
+        raise ValueError(f"El índice local en {directory} está vacío")
+    previous = source.dimension
+
+    staging = directory + ".migrating"
+    if os.path.exists(staging):
+        shutil.rmtree(staging)
+    target = LocalVectorStore(staging, None, nlist=LOCAL_INDEX_NLIST, nprobe=LOCAL_INDEX_NPROBE)
+    migrated = 0
+    for vectors in convert(iter_local_batches(source, batch_size), dimensions, embedding_function):
+        target.upsert(vectors)
+        migrated += len(vectors)
+    target.persist()
+    for name in os.listdir(directory):
+        if name not in LOCAL_INDEX_FILES:
+            shutil.copy2(os.path.join(directory, name), os.path.join(staging, name))
+
+    # Se conserva el índice anterior hasta comprobar el nuevo
+    backup = f"{directory}.bak-{previous}"
+    if os.path.exists(backup):
+        shutil.rmtree(backup)
+    os.replace(directory, backup)
+    os.replace(staging, directory)
+    print(f"Índice local migrado: {migrated} vectores de {previous} a {dimensions} dimensiones (copia anterior en {backup})")
+
+def migrate_pinecone(dimensions, target_name, embedding_function=None, batch_size=100):
+    from pinecone import Pinecone
+    from .populate_database import ensure_index_exists, upsert_vectors
+    pc = Pinecone(api_key=PINECONE_API_KEY)
+    if target_name == PINECONE_INDEX_NAME:
+        raise ValueError("La dimensión de un índice de Pinecone no se puede cambiar: indica otro --target-index")
+    ensure_index_exists(pc, target_name, dimension=dimensions)
+    source, target = pc.Index(PINECONE_INDEX_NAME), pc.Index(target_name)
+    migrated = 0
+    for vectors in convert(iter_pinecone_batches(source, batch_size), dimensions, embedding_function):
+        upsert_vectors(target, vectors)
+        migrated += len(vectors)
+        print(f"  {migrated} vectores copiados")
+    print(f"Índice {PINECONE_INDEX_NAME} migrado a {target_name}: {migrated} vectores de {dimensions} dimensiones")
+
+def main():
+    parser = argparse.ArgumentParser(description="Migra el índice vectorial a otra dimensión de embeddings.")
+    parser.add_argument("--dimensions", type=int, required=True, help="Nueva dimensión (p. ej. 256 o 1024).")
+    parser.add_argument("--reembed", action="store_true", help="Vuelve a embeber los resúmenes en lugar de proyectar.")
+    parser.add_argument("--target-index", default=None, help="Índice de Pinecone de destino.")
+    parser.add_argument("--batch-size", type=int, default=None)
+    args = parser.parse_args()
+
+    embedding_function = None
+    if args.reembed:
+        from .get_embedding_function import get_embedding_function
+        embedding_function = get_embedding_function(dimensions=args.dimensions)
+
+    if VECTORSTORE_BACKEND == "local":
+        migrate_local(args.dimensions, embedding_function, batch_size=args.batch_size or 1000)
+        print(f"Fija EMBEDDING_DIMENSIONS={args.dimensions} antes de volver a consultar o ingestar.")
+    else:
+        target_name = args.target_index or f"{PINECONE_INDEX_NAME}-{args.dimensions}"
+        migrate_pinecone(args.dimensions, target_name, embedding_function, batch_size=args.batch_size or 100)
+        print(f"Fija EMBEDDING_DIMENSIONS={args.dimensions} y PINECONE_INDEX_NAME={target_name} "
+              f"antes de volver a consultar o ingestar.")
+    # Las respuestas en caché se calcularon con embeddings de la dimensión anterior
+    bump_index_version()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,33 @@
+# src/mmr.py
+import numpy as np
+
+def _normalize_rows(vectors):
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return vectors / norms
+
+def mmr_select(relevance, vectors, k, lambda_mult=0.7):
+    """
+    Maximal Marginal Relevance vectorizado. `relevance` tiene la puntuación de cada
+    candidato y `vectors` sus embeddings (filas de ceros si no se conocen). La similitud
+    entre todos los candidatos se calcula con un único producto matricial; cada una de las
+    k selecciones es una operación sobre el vector de penalizaciones, sin bucles por pares.
+    Devuelve los índices elegidos en orden de selección.
+    """
+    relevance = np.asarray(relevance, dtype=np.float32)
+    n = len(relevance)
+    k = min(k, n)
+    if k == 0:
+        return []
+    vectors = _normalize_rows(np.asarray(vectors, dtype=np.float32))
+    similarity = vectors @ vectors.T
+    penalty = np.zeros(n, dtype=np.float32)  # máxima similitud con algún elegido
+    available = np.ones(n, dtype=bool)
+    selected = []
+    for _ in range(k):
+        scores = np.where(available, lambda_mult * relevance - (1.0 - lambda_mult) * penalty, -np.inf)
+        best = int(np.argmax(scores))
+        selected.append(best)
+        available[best] = False
+        np.maximum(penalty, similarity[best], out=penalty)
+    return selected
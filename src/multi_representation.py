@@ -1,25 +1,88 @@
 import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
 # from langchain_openai import ChatOpenAI
 from langchain_core.prompts import ChatPromptTemplate
 from langchain_core.output_parsers import StrOutputParser
-from langchain_community.llms import Ollama
 from .prompts import MULTI_REPRESENTATION_PROMPT
-def generate_summary(text: str) -> str:
-    """
-    Genera un resumen del texto dado para optimizar la búsqueda semantica 
+from .summary_cache import SummaryCache
+from .config import (
+    SUMMARY_MODEL, SUMMARY_CONCURRENCY, OLLAMA_BASE_URL,
+    SUMMARY_CACHE_PATH, SUMMARY_CACHE_MAX_MB
+)
 
+@lru_cache(maxsize=None)
+def get_summary_chain():
+    """
+    Crea una única vez el cliente LLM y la cadena de resumen, compartidos por todas las llamadas.
     """
-
     # Instanciar el LLM (se puede ajustar el modelo y temperatura según necesidad)
     # llm = ChatOpenAI(
     #     model="gpt-3.5-turbo",
     #     openai_api_key=os.getenv("OPENAI_API_KEY"),
     #     temperature=0
     # )
-    llm = Ollama(model="llama3.2", temperature=0)
-        # Crear cadena de procesamiento
-    chain = MULTI_REPRESENTATION_PROMPT | llm | StrOutputParser()
+    # Import diferido: langchain_community es pesado y solo hace falta al generar resúmenes
+    from langchain_community.llms import Ollama
+    llm = Ollama(model=SUMMARY_MODEL, temperature=0, base_url=OLLAMA_BASE_URL)
+    # Crear cadena de procesamiento
+    return MULTI_REPRESENTATION_PROMPT | llm | StrOutputParser()
+
+@lru_cache(maxsize=None)
+def get_summary_cache():
+    """Caché en disco de resúmenes, ligada al modelo y a la plantilla del prompt actuales"""
+    return SummaryCache(
+        SUMMARY_CACHE_PATH,
+        model=SUMMARY_MODEL,
+        prompt_template=MULTI_REPRESENTATION_PROMPT.template,
+        max_bytes=SUMMARY_CACHE_MAX_MB * 1024 * 1024
+    )
+
+def generate_summary(text: str) -> str:
+    """
+    Genera un resumen del texto dado para optimizar la búsqueda semantica
+
+    """
+    cache = get_summary_cache()
+    summary = cache.get(text)
+    if summary is not None:
+        return summary
 
     # Generar el resumen
-    summary = chain.invoke({"text": text})
+    summary = get_summary_chain().invoke({"text": text})
+    cache.put(text, summary)
     return summary
+
+def _summary_or_fallback(text: str) -> str:
+    try:
+        return generate_summary(text)
+    except Exception as e:
+        print(f"Error al generar resumen para el chunk: {e}")
+        return text  # fallback a contenido completo si falla el resumen (no se guarda en caché)
+
+def generate_summaries(texts: list[str], max_concurrency: int = SUMMARY_CONCURRENCY) -> list[str]:
+    """
+    Genera los resúmenes de varios textos con concurrencia acotada.
+    Conserva el orden de entrada y usa el texto original si falla un resumen.
+    """
+    if not texts:
+        return []
+
+    # Se crean antes de repartir el trabajo: lru_cache no impide que varios hilos construyan
+    # a la vez su propio cliente y su propia conexión a la caché
+    cache = get_summary_cache()
+    get_summary_chain()
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=max(1, max_concurrency)) as executor:
+        # map devuelve los resultados en el mismo orden que los textos
+        summaries = list(executor.map(_summary_or_fallback, texts))
+    elapsed = time.perf_counter() - started
+
+    rate = len(texts) / elapsed if elapsed > 0 else float("inf")
+    print(f"Resúmenes generados: {len(texts)} chunks en {elapsed:.1f}s ({rate:.2f} chunks/s)")
+    stats = cache.stats()
+    print(f"Caché de resúmenes: {stats['hits']} aciertos, {stats['misses']} fallos "
+          f"({stats['hit_rate']:.0%}), {stats['entries']} entradas, {stats['bytes'] / 1e6:.1f} MB")
+    return summaries
@@ -0,0 +1,123 @@
+# src/pdf_extraction.py
+import os
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from pypdf import PdfReader
+from langchain.schema.document import Document
+from .utils.normalize_filename import normalize_filename
+
+def list_pdf_files(directory_path):
+    """Lista los PDF del directorio (recursivo) en orden determinista, igual que PyPDFDirectoryLoader"""
+    root = Path(directory_path)
+    files = [
+        p for p in root.glob("**/[!.]*.pdf")
+        if p.is_file() and not any(part.startswith(".") for part in p.relative_to(root).parts)
+    ]
+    return sorted(str(p) for p in files)
+
+def _page_label(reader, page_number):
+    """Obtiene la etiqueta de página del PDF; si no existe usa el número 1-based"""
+    try:
+        return reader.page_labels[page_number]
+    except Exception:
+        return str(page_number + 1)
+
+def _extract_range(task):
+    """
+    Extrae el texto de un rango de páginas de un PDF.
+    Se ejecuta dentro de un proceso del pool, por lo que devuelve tipos simples (picklables).
+    """
+    source, start, end = task
+    started = time.perf_counter()
+    reader = PdfReader(source)
+    total_pages = len(reader.pages)
+    pages = []
+    for page_number in range(start, min(end, total_pages)):
+        text = reader.pages[page_number].extract_text() or ""
+        pages.append({
+            "page_content": text,
+            "metadata": {
+                "source": source,
+                "total_pages": total_pages,
+                "page": page_number,
+                "page_label": _page_label(reader, page_number),
+                # Longitud sin el espacio final: permite saber si un chunk llega al final de la página
+                "page_chars": len(text.rstrip()),
+            },
+        })
+    return pages, time.perf_counter() - started
+
+def _count_pages(source):
+    return len(PdfReader(source).pages)
+
+def build_tasks(sources, pages_per_task):
+    """Divide cada archivo en rangos de páginas [start, end) para repartirlos en el pool"""
+    tasks = []
+    for source in sources:
+        try:
+            total_pages = _count_pages(source)
+        except Exception as e:
+            print(f"Error al abrir {source}: {e}")
+            continue
+        for start in range(0, total_pages, pages_per_task):
+            tasks.append((source, start, min(start + pages_per_task, total_pages)))
+    return tasks
+
+def _ordered_results(executor, tasks, window):
+    """
+    Envía las tareas al pool con una ventana acotada y devuelve los resultados en orden de envío.
+    Así la salida es determinista y no se acumulan páginas extraídas si el consumidor va más lento.
+    """
+    pending = deque()
+    for task in tasks:
+        pending.append(executor.submit(_extract_range, task))
+        if len(pending) >= window:
+            yield pending.popleft().result()
+    while pending:
+        yield pending.popleft().result()
+
+def extract_pdf_pages(directory_path, doc_type, existing_files=(), max_workers=None, pages_per_task=50):
+    """
+    Extrae en paralelo las páginas de todos los PDF del directorio.
+
+    Genera Documents en orden determinista (archivo y número de página) con los mismos
+    metadatos que PyPDFDirectoryLoader más `filename` y `doc_type`, e imprime el tiempo
+    de extracción de cada archivo.
+    """
+    sources = [s for s in list_pdf_files(directory_path) if s not in existing_files]
+    if not sources:
+        return
+
+    tasks = build_tasks(sources, max(1, pages_per_task))
+    remaining = {}
+    for source, _, _ in tasks:
+        remaining[source] = remaining.get(source, 0) + 1
+    timings = {}
+
+    # Con un solo worker se evita el coste de levantar procesos
+    if max_workers == 1:
+        results = map(_extract_range, tasks)
+        executor = None
+    else:
+        workers = max_workers or os.cpu_count() or 1
+        executor = ProcessPoolExecutor(max_workers=workers)
+        results = _ordered_results(executor, tasks, window=2 * workers)
+
+    try:
+        for (source, _, _), (pages, elapsed) in zip(tasks, results):
+            filename = normalize_filename(os.path.basename(source))
+            for page in pages:
+                metadata = page["metadata"]
+                metadata["filename"] = filename
+                metadata["doc_type"] = doc_type
+                yield Document(page_content=page["page_content"], metadata=metadata)
+
+            timings[source] = timings.get(source, 0.0) + elapsed
+            remaining[source] -= 1
+            if remaining[source] == 0:
+                print(f"Extraído {filename} en {timings[source]:.2f}s (tiempo acumulado en workers)")
+    finally:
+        if executor is not None:
+            executor.shutdown(cancel_futures=True)
@@ -1,20 +1,30 @@
+from __future__ import annotations
 import argparse
 import os
 import re
 import unicodedata
-from langchain.document_loaders.pdf import PyPDFDirectoryLoader
-from langchain_text_splitters import RecursiveCharacterTextSplitter
-from langchain.schema.document import Document
-from .get_embedding_function import get_embedding_function
-from langchain_pinecone import PineconeVectorStore
+from typing import TYPE_CHECKING
 from dotenv import load_dotenv
 from datetime import datetime
-import uuid
-from pinecone import Pinecone, ServerlessSpec
 import time
-from .config import PINECONE_API_KEY, PINECONE_INDEX_NAME
-from .utils.normalize_filename import normalize_filename
-from .multi_representation import generate_summary
+from .config import (
+    PINECONE_API_KEY, PINECONE_INDEX_NAME, PDF_WORKERS, PDF_PAGES_PER_TASK, MANIFEST_PATH,
+    INGEST_BATCH_SIZE, INGEST_MAX_IN_FLIGHT, VECTORSTORE_BACKEND, LOCAL_INDEX_DIR,
+    LOCAL_INDEX_NLIST, LOCAL_INDEX_NPROBE, LOCAL_INDEX_DTYPE, LOCAL_INDEX_RESCORE_FACTOR, EMBEDDING_DIMENSIONS
+)
+from .index_manifest import IndexManifest, file_hash, chunk_content_hash
+from .ingestion_pipeline import Pipeline, batched
+from .chunk_store import get_chunk_store
+from .article_index import CHUNK_PREFIX_PATTERN, build_article_index
+from .tracing import span, payload_bytes
+from .utils.vectors import as_list
+from .utils.filename_matcher import get_filename_matcher
+
+# LangChain, NumPy, Pinecone, OpenAI, spaCy y pypdf se importan de forma diferida dentro de cada
+# función, para que `--help` y el arranque de la app no paguen SDKs que no van a usar
+if TYPE_CHECKING:
+    from langchain_core.documents import Document
+    from pinecone import Pinecone
 
 # Cargar variables de entorno
 load_dotenv()
@@ -28,43 +38,241 @@ DOCUMENT_TYPES = {
     "04_codigos": "codigo"
 }
 
+# Metadatos que se guardan en Pinecone (el texto completo vive en el almacén local de chunks)
+PINECONE_METADATA_FIELDS = (
+    "id", "doc_type", "filename", "source", "page", "page_label", "page_chars", "start_index", "created_at"
+)
+
 def main():
     # Verificar si se debe limpiar la base de datos (usando el flag --reset).
     parser = argparse.ArgumentParser()
     parser.add_argument("--reset", action="store_true", help="Reset the database.")
+    parser.add_argument("--workers", type=int, default=PDF_WORKERS, help="Procesos para extraer PDFs.")
+    parser.add_argument("--pages-per-task", type=int, default=PDF_PAGES_PER_TASK, help="Páginas por tarea de extracción.")
+    parser.add_argument("--sync", action="store_true", help="Sincroniza solo los cambios usando el manifiesto local.")
+    parser.add_argument("--batch-size", type=int, default=INGEST_BATCH_SIZE, help="Páginas por lote del pipeline de ingesta.")
+    parser.add_argument("--max-in-flight", type=int, default=INGEST_MAX_IN_FLIGHT, help="Lotes en espera entre etapas del pipeline.")
     args = parser.parse_args()
     
-    # Inicializar Pinecone con la nueva API
-    pc = Pinecone(
-        api_key=os.getenv("PINECONE_API_KEY")
-    )
-    
-    index_name = os.getenv("PINECONE_INDEX_NAME")
+    if VECTORSTORE_BACKEND == "local":
+        # Índice local: se construye en disco con el mismo pipeline y metadatos
+        index = load_local_index()
+        manifest = IndexManifest.load(os.path.join(LOCAL_INDEX_DIR, "manifest.json"))
+        if args.reset:
+            index.delete(delete_all=True)
+    else:
+        from pinecone import Pinecone
+        
+        # Inicializar Pinecone con la nueva API
+        pc = Pinecone(
+            api_key=os.getenv("PINECONE_API_KEY")
+        )
+        
+        index_name = os.getenv("PINECONE_INDEX_NAME")
+        manifest = IndexManifest.load(MANIFEST_PATH)
+        
+        # Si se solicita reiniciar la base de datos
+        if args.reset:
+            clear_database(pc, index_name)
+        
+        # Verificar la existencia del índice
+        ensure_index_exists(pc, index_name)
+        index = pc.Index(index_name)
+        
+        # Índice creado antes del manifiesto: se reconstruye listando sus vectores
+        if not args.reset and not manifest.sources():
+            rebuild_manifest_from_index(index, manifest)
     
-    # Si se solicita reiniciar la base de datos
     if args.reset:
-        clear_database(pc, index_name)
+        get_chunk_store().clear()
+        manifest.clear()
+        manifest.save()
+    
+    # Modo delta: solo se procesan los archivos nuevos, modificados o eliminados
+    if args.sync:
+        sync_database(index, manifest, args)
+        persist_index(index)
+        build_auxiliary_indexes()
+        return
+    
+    # Rastrear archivos ya procesados (el manifiesto local evita consultar el índice)
+    existing_files = manifest.sources()
+    
+    # Procesar los documentos nuevos en streaming: carga -> división -> resumen -> embedding -> upsert
+    ids_by_source = stream_to_index(
+        iter_new_pages(existing_files, args.workers, args.pages_per_task),
+        index,
+        batch_size=args.batch_size,
+        max_in_flight=args.max_in_flight
+    )
+    persist_index(index)
+    
+    if ids_by_source:
+        record_in_manifest(manifest, ids_by_source)
+        build_auxiliary_indexes()
+    else:
+        print("No se encontraron nuevos documentos para procesar.")
+
+def build_auxiliary_indexes():
+    """Reconstruye los índices locales derivados del almacén de chunks (BM25 y artículos)"""
+    from .lexical_index import build_lexical_index
+    from .answer_cache import bump_index_version
+    chunk_store = get_chunk_store()
+    build_lexical_index(chunk_store)
+    build_article_index(chunk_store)
+    get_filename_matcher.cache_clear()
+    # Invalidar las respuestas cacheadas con el índice anterior
+    bump_index_version()
 
-    # Verificar la existencia del índice
-    ensure_index_exists(pc, index_name)
+def persist_index(index):
+    """El índice local acumula los cambios en memoria y los escribe al final"""
+    from .local_vectorstore import LocalVectorStore
+    if isinstance(index, LocalVectorStore):
+        index.persist()
+
+def iter_new_pages(existing_files, max_workers=PDF_WORKERS, pages_per_task=PDF_PAGES_PER_TASK):
+    """Genera las páginas nuevas de todos los directorios sin cargarlas todas en memoria"""
+    from .pdf_extraction import extract_pdf_pages
+    for subdir, doc_type in DOCUMENT_TYPES.items():
+        dir_path = os.path.join(ROOT_DATA_PATH, subdir)
+        if os.path.exists(dir_path):
+            yield from extract_pdf_pages(
+                dir_path, doc_type, existing_files,
+                max_workers=max_workers, pages_per_task=pages_per_task
+            )
+
+def stream_to_index(pages, index, batch_size=INGEST_BATCH_SIZE, max_in_flight=INGEST_MAX_IN_FLIGHT):
+    """
+    Ingresa páginas en lotes acotados a través de un pipeline por etapas concurrentes.
+    `index` puede ser un índice de Pinecone o un LocalVectorStore.
+    Devuelve los IDs insertados agrupados por archivo de origen.
+    """
+    from .get_embedding_function import get_embedding_function
+    embedding_function = get_embedding_function()
+    timestamp = datetime.now().isoformat()
+    text_splitter = get_text_splitter()
+    ids_by_source = {}
+    totals = {"pages": 0, "chunks": 0}
+    
+    def split(pages_batch):
+        totals["pages"] += len(pages_batch)
+        with span("ingest.split", pages=len(pages_batch)) as s:
+            chunks = prepare_chunks(assign_chunk_ids(text_splitter.split_documents(pages_batch)), timestamp)
+            if s.enabled:
+                s.set(chunks=len(chunks), bytes=payload_bytes(chunks))
+        return chunks or None
     
-    # Rastrear archivos ya procesados
-    existing_files = get_existing_files(pc, index_name) if not args.reset else set()
+    def lemmatize(chunks):
+        with span("ingest.lemmatize", chunks=len(chunks)):
+            return lemmatize_chunks(chunks)
     
-    # Cargar documentos de cada directorio
-    new_documents = []
+    def summarize(chunks):
+        with span("ingest.summarize", chunks=len(chunks)):
+            summarize_chunks(chunks)
+        return chunks
+    
+    def embed(chunks):
+        with span("ingest.embed", chunks=len(chunks)):
+            return build_vectors(chunks, embedding_function)
+    
+    def upsert(vectors):
+        with span("ingest.upsert", vectors=len(vectors)):
+            upsert_vectors(index, vectors)
+        totals["chunks"] += len(vectors)
+        for vector in vectors:
+            ids_by_source.setdefault(vector["metadata"]["source"], set()).add(vector["id"])
+    
+    pipeline = (
+        Pipeline(max_in_flight=max_in_flight)
+        .add_stage("split", split)
+        .add_stage("lemmatize", lemmatize)
+        .add_stage("summarize", summarize)
+        .add_stage("embed", embed)
+        .add_stage("upsert", upsert)
+    )
+    started = time.perf_counter()
+    timings = pipeline.run(batched(pages, max(1, batch_size)))
+    elapsed = time.perf_counter() - started
+    
+    if totals["chunks"]:
+        stage_times = ", ".join(f"{name}={seconds:.1f}s" for name, seconds in timings.items())
+        print(f"Ingesta completada: {totals['pages']} páginas, {totals['chunks']} chunks en {elapsed:.1f}s ({stage_times})")
+    return ids_by_source
+
+def sync_database(index, manifest, args):
+    """
+    Sincroniza el índice con los PDF en disco usando el manifiesto local:
+    inserta solo los chunks nuevos o modificados y elimina los que ya no existen.
+    """
+    from .pdf_extraction import list_pdf_files
+    # Hash de todos los archivos actuales
+    current = {}
     for subdir, doc_type in DOCUMENT_TYPES.items():
         dir_path = os.path.join(ROOT_DATA_PATH, subdir)
         if os.path.exists(dir_path):
-            documents = load_new_documents(dir_path, doc_type, existing_files)
-            new_documents.extend(documents)
+            for source in list_pdf_files(dir_path):
+                current[source] = (doc_type, dir_path, file_hash(source))
+    
+    # Archivos eliminados: borrar todos sus vectores
+    removed = manifest.sources() - set(current)
+    for source in sorted(removed):
+        delete_vectors(index, manifest.chunk_ids(source))
+        manifest.remove(source)
+        print(f"Eliminado del índice: {source}")
+    
+    # Archivos nuevos o modificados
+    unchanged = {source for source, (_, _, digest) in current.items() if manifest.is_current(source, digest)}
+    changed = set(current) - unchanged
+    if not changed:
+        manifest.save()
+        print("El índice ya está sincronizado.")
+        return
+    
+    documents = []
+    for dir_path, doc_type in sorted({(d, t) for t, d, _ in current.values()}):
+        documents.extend(load_new_documents(
+            dir_path, doc_type, unchanged,
+            max_workers=args.workers, pages_per_task=args.pages_per_task
+        ))
+    chunks = assign_chunk_ids(split_documents(documents))
+    
+    # Agrupar los chunks por archivo de origen
+    chunks_by_source = {}
+    for chunk in chunks:
+        chunks_by_source.setdefault(chunk.metadata["source"], []).append(chunk)
+    
+    pending = []
+    stale_ids = set()
+    for source in sorted(changed):
+        old_ids = manifest.chunk_ids(source)
+        new_ids = {c.metadata["id"] for c in chunks_by_source.get(source, [])}
+        stale_ids |= old_ids - new_ids
+        pending.extend(c for c in chunks_by_source.get(source, []) if c.metadata["id"] not in old_ids)
+    
+    print(f"Sincronización: {len(changed)} archivos cambiados, {len(pending)} chunks por insertar, "
+          f"{len(stale_ids)} por eliminar, {len(removed)} archivos eliminados")
+    
+    if pending:
+        add_to_index(pending, index)
+    delete_vectors(index, stale_ids)
+    
+    for source in changed:
+        _, _, digest = current[source]
+        manifest.update(source, digest, {c.metadata["id"] for c in chunks_by_source.get(source, [])})
+    manifest.save()
 
-    # Procesar y almacenar documentos nuevos
-    if new_documents:
-        chunks = split_documents(new_documents)
-        add_to_pinecone(chunks, index_name, pc)
-    else:
-        print("No se encontraron nuevos documentos para procesar.")
+def delete_vectors(index, ids, batch_size=1000):
+    """Elimina vectores por ID en lotes, junto con sus textos en el almacén local"""
+    ids = sorted(ids)
+    for i in range(0, len(ids), batch_size):
+        index.delete(ids=ids[i:i + batch_size])
+    get_chunk_store().delete_many(ids)
+
+def record_in_manifest(manifest, ids_by_source):
+    """Registra en el manifiesto los chunks insertados, agrupados por archivo"""
+    for source, ids in ids_by_source.items():
+        manifest.update(source, file_hash(source), manifest.chunk_ids(source) | ids)
+    manifest.save()
 
 def to_ascii_id(text):
     """
@@ -80,9 +288,31 @@ def to_ascii_id(text):
     text = re.sub(r'\s+', '_', text)           # Reemplazar espacios con guiones bajos
     return text
 
-def load_pinecone():
+def load_local_index(embedding_function=None):
+    """Carga el índice vectorial local desde disco"""
+    from .get_embedding_function import get_embedding_function
+    from .local_vectorstore import LocalVectorStore
+    return LocalVectorStore.load(
+        LOCAL_INDEX_DIR,
+        embedding_function or get_embedding_function(),
+        nlist=LOCAL_INDEX_NLIST,
+        nprobe=LOCAL_INDEX_NPROBE,
+        dtype=LOCAL_INDEX_DTYPE,
+        rescore_factor=LOCAL_INDEX_RESCORE_FACTOR
+    )
+
+def load_vectorstore(embedding_function=None):
+    """Carga el vectorstore configurado en VECTORSTORE_BACKEND"""
+    if VECTORSTORE_BACKEND == "local":
+        return load_local_index(embedding_function)
+    return load_pinecone(embedding_function)
+
+def load_pinecone(embedding_function=None):
     """Carga la base de datos vectorial Pinecone"""
-    embedding_function = get_embedding_function()
+    from langchain_pinecone import PineconeVectorStore
+    from pinecone import Pinecone
+    from .get_embedding_function import get_embedding_function
+    embedding_function = embedding_function or get_embedding_function()
     
     # Inicializar Pinecone con la nueva API
     Pinecone(api_key=PINECONE_API_KEY)
@@ -93,83 +323,106 @@ def load_pinecone():
         text_key="text"  # El campo que contiene el texto en Pinecone
     )
 
-def get_existing_files(pc, index_name):
-    """Obtiene la lista de archivos ya indexados en Pinecone"""
-    try:
-        index = pc.Index(index_name)
-        # Obtener una muestra de vectores para extraer los metadatos
-        query_response = index.query(
-            vector=[0.0] * 3072,  # Vector de consulta dummy
-            top_k=10000,          # Número máximo de registros a recuperar
-            include_metadata=True
-        )
-        
-        # Extraer los nombres de archivo únicos
-        existing_files = set()
-        for match in query_response.matches:
-            if 'filename' in match.metadata and 'source' in match.metadata:
-                existing_files.add(match.metadata['source'])
-                
-        return existing_files
-    except Exception as e:
-        print(f"Error al obtener archivos existentes: {e}")
-        return set()
+def rebuild_manifest_from_index(index, manifest, batch_size=100):
+    """
+    Reconstruye el manifiesto a partir de los vectores de un índice de Pinecone creado antes
+    de que existiera, listando todos los IDs con `index.list`. Los archivos quedan sin hash:
+    la siguiente sincronización (--sync) los vuelve a procesar con los IDs por contenido y
+    elimina los vectores antiguos, en lugar de duplicarlos.
+    """
+    ids_by_source = {}
+    unknown = 0
+    for page in index.list(limit=batch_size):
+        ids = list(page)
+        if not ids:
+            continue
+        for chunk_id, vector in index.fetch(ids=ids).vectors.items():
+            source = (vector.metadata or {}).get("source")
+            if source:
+                ids_by_source.setdefault(source, set()).add(chunk_id)
+            else:
+                unknown += 1
+    if not ids_by_source:
+        return
+    for source, ids in ids_by_source.items():
+        manifest.update(source, None, ids)
+    manifest.save()
+    print(f"Manifiesto reconstruido desde el índice: {len(ids_by_source)} archivos, "
+          f"{sum(len(ids) for ids in ids_by_source.values())} vectores")
+    if unknown:
+        print(f"{unknown} vectores sin metadato 'source' no se pudieron asignar a un archivo; usa --reset para eliminarlos")
 
-def load_new_documents(directory_path, doc_type, existing_files):
-    """Carga solo documentos nuevos que no están en existing_files"""
-    document_loader = PyPDFDirectoryLoader(directory_path)
-    documents = document_loader.load()
-    
-    new_documents = []
-    for doc in documents:
-        source_path = doc.metadata.get("source", "")
-        
-        # Verificar si el documento ya existe en la base de datos
-        if source_path not in existing_files:
-            # Extraer y normalizar el nombre base del archivo
-            original_filename = os.path.basename(source_path)
-            doc.metadata["filename"] = normalize_filename(original_filename)
-            doc.metadata["doc_type"] = doc_type
-            new_documents.append(doc)
+def load_new_documents(directory_path, doc_type, existing_files, max_workers=PDF_WORKERS, pages_per_task=PDF_PAGES_PER_TASK):
+    """Carga solo documentos nuevos que no están en existing_files (extracción en paralelo)"""
+    from .pdf_extraction import extract_pdf_pages
+    new_documents = list(extract_pdf_pages(
+        directory_path,
+        doc_type,
+        existing_files,
+        max_workers=max_workers,
+        pages_per_task=pages_per_task
+    ))
     
     if new_documents:
         print(f"Encontrados {len(new_documents)} documentos nuevos en {directory_path}")
     
     return new_documents
 
-def split_documents(documents: list[Document]):
-    text_splitter = RecursiveCharacterTextSplitter(
+def get_text_splitter():
+    from langchain_text_splitters import RecursiveCharacterTextSplitter
+    return RecursiveCharacterTextSplitter(
         chunk_size=2000,
         chunk_overlap=200,
         length_function=len,
-        separators=["\n\n", "\n", ".", "?", "!", " ", ""] 
+        separators=["\n\n", "\n", ".", "?", "!", " ", ""],
+        add_start_index=True  # posición del chunk en la página, para ordenar artículos
     )
+
+def split_documents(documents: list[Document]):
+    text_splitter = get_text_splitter()
     chunks = text_splitter.split_documents(documents)
     print(f"Total de chunks generados: {len(chunks)}")
     return chunks
 
-def add_to_pinecone(chunks: list[Document], index_name: str, pc: Pinecone):
-    embedding_function = get_embedding_function()
-    
-    # Añadir fecha de creación y generar ID apropiado para cada chunk
-    timestamp = datetime.now().isoformat()
-    
+def assign_chunk_ids(chunks: list[Document]):
+    """
+    Asigna a cada chunk un ID determinista derivado de su contenido, de modo que
+    reingestar el mismo texto sobrescribe el vector en lugar de duplicarlo.
+    """
+    seen = set()
     for chunk in chunks:
         # Obtener metadatos necesarios
         source = chunk.metadata.get("filename", "unknown")
         page = chunk.metadata.get("page_label", "0")
         doc_type = chunk.metadata.get("doc_type", "unknown")
-        unique_id = str(uuid.uuid4())[:8]
+        content_hash = chunk_content_hash(doc_type, source, page, chunk.page_content)[:16]
         
         # Asegurar que los componentes del ID sean ASCII
         ascii_doc_type = to_ascii_id(doc_type)
         ascii_source = to_ascii_id(source)
         
         # Generar ID que será usado como ID primario en Pinecone (solo ASCII)
-        chunk_id = f"{ascii_doc_type}:{ascii_source}:{page}:{unique_id}"
+        chunk_id = f"{ascii_doc_type}:{ascii_source}:{page}:{content_hash}"
+        
+        # Desambiguar chunks con texto idéntico en la misma página
+        ordinal = 1
+        unique_id = chunk_id
+        while unique_id in seen:
+            unique_id = f"{chunk_id}-{ordinal}"
+            ordinal += 1
+        seen.add(unique_id)
         
         # Establecer el ID tanto en el metadato como para el vector
-        chunk.metadata["id"] = chunk_id
+        chunk.metadata["id"] = unique_id
+    return chunks
+
+def prepare_chunks(chunks: list[Document], timestamp: str):
+    """Añade metadatos de ingesta y el contexto completo a cada chunk"""
+    for chunk in chunks:
+        # Obtener metadatos necesarios
+        source = chunk.metadata.get("filename", "unknown")
+        page = chunk.metadata.get("page_label", "0")
+        doc_type = chunk.metadata.get("doc_type", "unknown")
         
         # Añadir fecha de creación
         chunk.metadata["created_at"] = timestamp
@@ -179,57 +432,116 @@ def add_to_pinecone(chunks: list[Document], index_name: str, pc: Pinecone):
         
         # Generar el contexto completo (que incluye metadatos y contenido original)
         full_text = f"Tipo: {doc_type}. Archivo: {source}. Página: {page}. {chunk.page_content}"
-        
-        # Generar resumen optimizado para la búsqueda usando multi representation
-        try:
-            summary_text = generate_summary(full_text)
-        except Exception as e:
-            print(f"Error al generar resumen para el chunk: {e}")
-            summary_text = full_text  # fallback a contenido completo si falla el resumen
-        
-        # Asignar el resumen para la búsqueda y conservar el contexto completo para la respuesta
         chunk.metadata["full_text"] = full_text
-        chunk.metadata["text"] = summary_text
         # Actualizar el contenido de la página para que, al mostrar el contexto, se vea el texto completo
         chunk.page_content = full_text
-    
-    # Crear vectores con IDs personalizados
-    vectors_with_ids = []
-    
-    # Obtener embeddings para todos los chunks usando la representación resumen
+    return chunks
+
+def lemmatize_chunks(chunks: list[Document]):
+    """
+    Calcula el texto lematizado de cada chunk para el índice léxico BM25. Se lematiza el
+    texto sin el prefijo "Tipo/Archivo/Página": repetido en todos los chunks de un archivo,
+    inflaría la frecuencia de esos términos y las longitudes de documento.
+    """
+    from .text_preprocessing import preprocess_texts
+    lemmas = preprocess_texts(CHUNK_PREFIX_PATTERN.sub("", chunk.page_content, count=1) for chunk in chunks)
+    for chunk, chunk_lemmas in zip(chunks, lemmas):
+        chunk.metadata["lemmas"] = chunk_lemmas
+    return chunks
+
+def summarize_chunks(chunks: list[Document]):
+    """
+    Genera resúmenes optimizados para la búsqueda (multi representation) de forma concurrente;
+    si un resumen falla se usa el contenido completo
+    """
+    from .multi_representation import generate_summaries
+    summaries = generate_summaries([chunk.metadata["full_text"] for chunk in chunks])
+    for chunk, summary_text in zip(chunks, summaries):
+        # Asignar el resumen para la búsqueda y conservar el contexto completo para la respuesta
+        chunk.metadata["text"] = summary_text
+    return chunks
+
+def build_vectors(chunks: list[Document], embedding_function):
+    """
+    Calcula los embeddings de la representación resumen y arma los vectores con IDs.
+    El texto completo y el resumen se guardan en el almacén local; en Pinecone solo
+    se envían los metadatos filtrables.
+    """
     texts = [chunk.metadata["text"] for chunk in chunks]
-    embeddings = embedding_function.embed_documents(texts)
+    # CachedEmbeddings devuelve arrays sin copiar desde la caché; otros modelos, listas
+    embed = getattr(embedding_function, "embed_documents_array", embedding_function.embed_documents)
+    embeddings = embed(texts)
+    
+    vectors = [
+        {"id": chunk.metadata["id"], "values": embeddings[i], "metadata": slim_metadata(chunk.metadata)}
+        for i, chunk in enumerate(chunks)
+    ]
+    get_chunk_store().put_many(
+        (
+            chunk.metadata["id"],
+            chunk.metadata["full_text"],
+            chunk.metadata["text"],
+            {key: value for key, value in vector["metadata"].items() if key != "text"},
+            chunk.metadata.get("lemmas"),
+        )
+        for chunk, vector in zip(chunks, vectors)
+    )
+    return vectors
+
+def slim_metadata(metadata):
+    """Reduce los metadatos a los campos filtrables; `text` queda vacío porque lo exige PineconeVectorStore"""
+    slim = {key: metadata[key] for key in PINECONE_METADATA_FIELDS if key in metadata}
+    slim["text"] = ""
+    return slim
+
+def upsert_vectors(index, vectors, batch_size=100):
+    """Inserta en lotes para manejar grandes cantidades de datos"""
+    if not hasattr(index, "search_by_vector"):
+        # Pinecone serializa listas; el índice local acepta directamente los arrays de la caché
+        vectors = [{**vector, "values": as_list(vector["values"])} for vector in vectors]
+    for i in range(0, len(vectors), batch_size):
+        index.upsert(vectors=vectors[i:i + batch_size])
+
+def add_to_pinecone(chunks: list[Document], index_name: str, pc: Pinecone):
+    add_to_index(chunks, pc.Index(index_name))
+
+def add_to_index(chunks: list[Document], index):
+    from .get_embedding_function import get_embedding_function
+    embedding_function = get_embedding_function()
     
-    # Crear vectores con IDs personalizados
-    for i, chunk in enumerate(chunks):
-        vectors_with_ids.append({
-            "id": chunk.metadata["id"],
-            "values": embeddings[i],
-            "metadata": chunk.metadata
-        })
+    if any("id" not in chunk.metadata for chunk in chunks):
+        assign_chunk_ids(chunks)
     
-    # Insertar directamente en el índice de Pinecone
-    index = pc.Index(index_name)
+    # Añadir fecha de creación y el contexto completo, lematizar y generar los resúmenes
+    prepare_chunks(chunks, datetime.now().isoformat())
+    lemmatize_chunks(chunks)
+    summarize_chunks(chunks)
     
-    # Insertar en lotes para manejar grandes cantidades de datos
-    batch_size = 100
-    for i in range(0, len(vectors_with_ids), batch_size):
-        batch = vectors_with_ids[i:i+batch_size]
-        index.upsert(vectors=batch)
+    # Crear vectores con IDs personalizados e insertarlos directamente en el índice
+    vectors_with_ids = build_vectors(chunks, embedding_function)
+    upsert_vectors(index, vectors_with_ids)
     
-    print(f"Documentos añadidos a Pinecone exitosamente")
+    print(f"Documentos añadidos al índice exitosamente")
 
-def ensure_index_exists(pc: Pinecone, index_name: str):
-    """Asegura que el índice existe, si no, lo crea"""
+def ensure_index_exists(pc: Pinecone, index_name: str, dimension: int = EMBEDDING_DIMENSIONS):
+    """Asegura que el índice existe con la dimensión de los embeddings; si no existe, lo crea"""
+    from pinecone import ServerlessSpec
     indexes = pc.list_indexes()
     
-    if index_name not in indexes.names():
+    if index_name in indexes.names():
+        existing = pc.describe_index(index_name).dimension
+        if existing != dimension:
+            raise ValueError(
+                f"El índice {index_name} tiene dimensión {existing} y EMBEDDING_DIMENSIONS es {dimension}; "
+                f"migra el índice con `python -m src.migrate_embeddings --dimensions {dimension}`"
+            )
+    else:
         region = os.getenv("PINECONE_REGION", "us-east-1")
         cloud = os.getenv("PINECONE_CLOUD", "aws")
         
         pc.create_index(
             name=index_name,
-            dimension=3072,  # dimensión para text-embedding-3-large
+            dimension=dimension,
             metric="cosine",
             spec=ServerlessSpec(
                 cloud=cloud,
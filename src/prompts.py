@@ -28,6 +28,20 @@ Intenta identificar si la pregunta se refiere a artículos específicos de algú
 Pregunta reestructurada:
 """)
 
+# Prompt para resumir de forma incremental los turnos antiguos de la conversación
+CONVERSATION_SUMMARY_PROMPT = PromptTemplate.from_template("""
+Resume de forma concisa la conversación entre un usuario y un asistente legal.
+Conserva los documentos, artículos y temas mencionados.
+
+Resumen actual:
+{summary}
+
+Nuevos mensajes:
+{new_lines}
+
+Resumen actualizado:
+""")
+
 # Prompt para optimizar la indexación en Pinecone (multi representation)
 MULTI_REPRESENTATION_PROMPT = PromptTemplate.from_template("""
 Eres un experto en legislación ecuatoriana y en procesamiento de documentos legales para optimización de búsqueda semántica.
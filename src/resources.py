@@ -0,0 +1,121 @@
+# src/resources.py
+"""
+Registro de recursos compartidos por todo el proceso.
+
+Todas las sesiones (Streamlit, servicios o scripts) obtienen de aquí el mismo pool HTTP,
+los mismos clientes de embeddings y LLM, el mismo vectorstore y cadenas precompiladas por
+combinación de fuentes, en lugar de crearlos en cada sesión o en cada pregunta.
+"""
+import threading
+from .config import HTTP_MAX_CONNECTIONS, HTTP_MAX_KEEPALIVE, HTTP_TIMEOUT
+
+_lock = threading.RLock()
+_resources = {}
+
+def _get_or_create(key, factory):
+    """Devuelve el recurso `key`, creándolo una única vez aunque lo pidan varios hilos a la vez"""
+    resource = _resources.get(key)
+    if resource is None:
+        with _lock:
+            resource = _resources.get(key)
+            if resource is None:
+                resource = _resources[key] = factory()
+    return resource
+
+def _sources_key(selected_sources):
+    return tuple(sorted(selected_sources))
+
+def get_http_client():
+    """Cliente httpx con conexiones persistentes, reutilizado por embeddings y LLM"""
+    def create():
+        import httpx
+        return httpx.Client(
+            limits=httpx.Limits(
+                max_connections=HTTP_MAX_CONNECTIONS,
+                max_keepalive_connections=HTTP_MAX_KEEPALIVE
+            ),
+            timeout=HTTP_TIMEOUT
+        )
+    return _get_or_create("http_client", create)
+
+def get_async_http_client():
+    """Pool asíncrono equivalente, para las llamadas `ainvoke`/`astream` del servicio HTTP"""
+    def create():
+        import httpx
+        return httpx.AsyncClient(
+            limits=httpx.Limits(
+                max_connections=HTTP_MAX_CONNECTIONS,
+                max_keepalive_connections=HTTP_MAX_KEEPALIVE
+            ),
+            timeout=HTTP_TIMEOUT
+        )
+    return _get_or_create("async_http_client", create)
+
+def get_embeddings():
+    def create():
+        from .get_embedding_function import get_embedding_function
+        return get_embedding_function(http_client=get_http_client())
+    return _get_or_create("embeddings", create)
+
+def get_llm():
+    def create():
+        from .utils.chains import create_llm
+        return create_llm(http_client=get_http_client(), http_async_client=get_async_http_client())
+    return _get_or_create("llm", create)
+
+def get_history_summarizer():
+    """Resumidor del historial de conversación, compartido por las memorias de todas las sesiones"""
+    def create():
+        from .conversation_memory import create_history_summarizer
+        return create_history_summarizer(get_llm())
+    return _get_or_create("history_summarizer", create)
+
+def get_vectorstore():
+    def create():
+        from .populate_database import load_vectorstore
+        return load_vectorstore(embedding_function=get_embeddings())
+    return _get_or_create("vectorstore", create)
+
+def get_conversation_chain(selected_sources):
+    """Cadena RAG precompilada para una combinación de fuentes (sin estado por sesión)"""
+    def create():
+        from .utils.chains import create_conversation_chain
+        return create_conversation_chain(get_vectorstore(), list(selected_sources), llm=get_llm())
+    return _get_or_create(("conversation_chain", _sources_key(selected_sources)), create)
+
+def get_streaming_chain(selected_sources):
+    """Versión en streaming de la cadena, precompilada por combinación de fuentes"""
+    def create():
+        from .utils.chains import create_streaming_chain
+        return create_streaming_chain(get_vectorstore(), list(selected_sources), llm=get_llm())
+    return _get_or_create(("streaming_chain", _sources_key(selected_sources)), create)
+
+def get_async_streaming_chain(selected_sources):
+    """Versión en streaming asíncrono de la cadena, para el servicio HTTP"""
+    def create():
+        from .utils.chains import create_async_streaming_chain
+        return create_async_streaming_chain(get_vectorstore(), list(selected_sources), llm=get_llm())
+    return _get_or_create(("async_streaming_chain", _sources_key(selected_sources)), create)
+
+def register(key, resource):
+    """Fija un recurso ya construido (p. ej. sustitutos locales en benchmarks)"""
+    with _lock:
+        _resources[key] = resource
+
+def reset():
+    """
+    Descarta los recursos (p. ej. tras reconstruir el índice); se recrean al pedirlos de nuevo.
+    El pool asíncrono debe cerrarse antes con `aclose()` desde su bucle de eventos.
+    """
+    with _lock:
+        client = _resources.get("http_client")
+        _resources.clear()
+    if client is not None:
+        client.close()
+
+async def aclose():
+    """Cierra el pool HTTP asíncrono (al apagar el servicio)"""
+    with _lock:
+        client = _resources.pop("async_http_client", None)
+    if client is not None:
+        await client.aclose()
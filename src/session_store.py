@@ -0,0 +1,65 @@
+# src/session_store.py
+import asyncio
+import time
+import uuid
+from collections import OrderedDict
+from .config import SESSION_TTL, SESSION_MAX_COUNT
+from .conversation_memory import SummaryBufferMemory
+
+class Session:
+    """Historial de una conversación del servicio HTTP y su memoria acotada por tokens"""
+
+    def __init__(self, session_id, summarize):
+        self.id = session_id
+        self.messages = []  # [{"role", "content"}], el mismo formato que usa app.py
+        self.memory = SummaryBufferMemory(summarize)
+        # Las preguntas de una misma sesión se responden en orden: cada una depende de la anterior
+        self.lock = asyncio.Lock()
+        self.last_used = time.monotonic()
+
+    def append_turn(self, question, answer):
+        self.messages.append({"role": "user", "content": question})
+        self.messages.append({"role": "bot", "content": answer})
+
+class SessionStore:
+    """
+    Sesiones en memoria del servicio HTTP. Se descartan tras `ttl` segundos sin actividad
+    y, por LRU, al superar `max_sessions`. Se usa desde un único bucle de eventos.
+    """
+
+    def __init__(self, summarize, ttl=SESSION_TTL, max_sessions=SESSION_MAX_COUNT):
+        self.summarize = summarize
+        self.ttl = ttl
+        self.max_sessions = max_sessions
+        self._sessions = OrderedDict()
+
+    def _expire(self, now):
+        while self._sessions:
+            oldest = next(iter(self._sessions.values()))
+            if now - oldest.last_used <= self.ttl and len(self._sessions) <= self.max_sessions:
+                break
+            del self._sessions[oldest.id]
+
+    def get(self, session_id):
+        now = time.monotonic()
+        self._expire(now)
+        session = self._sessions.get(session_id)
+        if session is not None:
+            session.last_used = now
+            self._sessions.move_to_end(session_id)
+        return session
+
+    def get_or_create(self, session_id=None):
+        """Devuelve la sesión indicada o crea una nueva (también si la indicada expiró)"""
+        session = self.get(session_id) if session_id else None
+        if session is None:
+            session = Session(session_id or uuid.uuid4().hex, self.summarize)
+            self._sessions[session.id] = session
+            self._expire(time.monotonic())
+        return session
+
+    def delete(self, session_id):
+        return self._sessions.pop(session_id, None) is not None
+
+    def __len__(self):
+        return len(self._sessions)
@@ -1,23 +1,57 @@
 # text_preprocessing.py
-import spacy
+from functools import lru_cache
 from unidecode import unidecode
+from .config import LEMMA_BATCH_SIZE, LEMMA_PROCESSES, LEMMA_QUERY_CACHE_SIZE, LEMMA_QUERY_MAX_CHARS
 
-# Cargar el modelo de idioma español de spaCy
-nlp = spacy.load("es_core_news_sm")
+# Componentes necesarios para lemma_ (is_stop e is_punct son atributos léxicos);
+# el resto del pipeline (parser, ner, ...) se desactiva al procesar
+LEMMA_COMPONENTS = ("tok2vec", "morphologizer", "attribute_ruler", "lemmatizer", "trainable_lemmatizer")
+
+@lru_cache(maxsize=None)
+def get_nlp():
+    """Carga el modelo de idioma español de spaCy la primera vez que se necesita"""
+    import spacy
+    return spacy.load("es_core_news_sm")
+
+def unused_components(nlp):
+    return [name for name in nlp.pipe_names if name not in LEMMA_COMPONENTS]
+
+def _normalize(text):
+    # Eliminar acentos y caracteres especiales y convertir a minúsculas
+    return unidecode(text).lower()
+
+def _join_lemmas(doc):
+    # Lematización y eliminación de stopwords
+    return " ".join(token.lemma_ for token in doc if not token.is_stop and not token.is_punct)
 
 def preprocess_text(text: str) -> str:
     """
     Preprocesa el texto: lematiza, elimina acentos, convierte a minúsculas y normaliza.
     """
-    # Eliminar acentos y caracteres especiales
-    text = unidecode(text)
-    
-    # Convertir a minúsculas
-    text = text.lower()
-    
-    # Lematización y eliminación de stopwords
-    doc = nlp(text)
-    lemmas = [token.lemma_ for token in doc if not token.is_stop and not token.is_punct]
-    
-    # Unir las lemas en un solo texto
-    return " ".join(lemmas)
\ No newline at end of file
+    nlp = get_nlp()
+    return _join_lemmas(nlp(_normalize(text), disable=unused_components(nlp)))
+
+def preprocess_texts(texts, batch_size=LEMMA_BATCH_SIZE, n_process=LEMMA_PROCESSES):
+    """
+    Versión por lotes de preprocess_text: procesa los textos en streaming con `nlp.pipe`
+    y genera los resultados en el mismo orden, con la misma salida que la versión por texto.
+    """
+    nlp = get_nlp()
+    docs = nlp.pipe(
+        (_normalize(text) for text in texts),
+        batch_size=batch_size,
+        n_process=n_process,
+        disable=unused_components(nlp)
+    )
+    for doc in docs:
+        yield _join_lemmas(doc)
+
+@lru_cache(maxsize=LEMMA_QUERY_CACHE_SIZE)
+def _preprocess_query_cached(text):
+    return preprocess_text(text)
+
+def preprocess_query(text: str) -> str:
+    """preprocess_text para consultas: las cortas (las que se repiten) se sirven desde una caché LRU"""
+    if len(text) <= LEMMA_QUERY_MAX_CHARS:
+        return _preprocess_query_cached(text)
+    return preprocess_text(text)
@@ -0,0 +1,235 @@
+# src/tracing.py
+"""
+Trazas por etapa (spans) con duración y atributos numéricos o de texto.
+
+    with span("vector_query", k=5) as s:
+        docs = ...
+        if s.enabled:
+            s.set(docs=len(docs), bytes=payload_bytes(docs))
+
+Los spans terminados se envían al exportador configurado en TRACING_EXPORTER:
+"log" (una línea por span), "prometheus" (métricas agregadas en formato de texto),
+"json" (una línea JSON por span) o "off". Desactivado, `span()` devuelve siempre el mismo
+objeto vacío y no mide nada; los atributos costosos se calculan solo si `s.enabled`.
+"""
+import contextvars
+import json
+import logging
+import os
+import threading
+import time
+import uuid
+from .config import TRACING_EXPORTER, TRACING_JSON_PATH, TRACING_PROMETHEUS_PATH
+
+logger = logging.getLogger("legischat.tracing")
+
+_trace_id = contextvars.ContextVar("trace_id", default=None)
+
+class _NoopSpan:
+    enabled = False
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def set(self, **attributes):
+        pass
+
+_NOOP_SPAN = _NoopSpan()
+
+class Span:
+    enabled = True
+
+    def __init__(self, name, exporter, attributes):
+        self.name = name
+        self.exporter = exporter
+        self.attributes = attributes
+        self.trace_id = None
+        self.duration = 0.0
+        self.error = None
+        self.started = None
+        self._token = None
+
+    def __enter__(self):
+        self.trace_id = _trace_id.get()
+        if self.trace_id is None:
+            # Primer span de la petición: abre una traza nueva para los spans anidados
+            self.trace_id = uuid.uuid4().hex[:16]
+            self._token = _trace_id.set(self.trace_id)
+        self.started = time.time()
+        self._perf = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.duration = time.perf_counter() - self._perf
+        if exc_type is not None:
+            self.error = exc_type.__name__
+        if self._token is not None:
+            _trace_id.reset(self._token)
+        self.exporter.export(self)
+        return False
+
+    def set(self, **attributes):
+        self.attributes.update(attributes)
+
+    def to_dict(self):
+        record = {
+            "name": self.name,
+            "trace_id": self.trace_id,
+            "start": self.started,
+            "duration_ms": round(self.duration * 1000, 3),
+            **self.attributes,
+        }
+        if self.error:
+            record["error"] = self.error
+        return record
+
+class LogExporter:
+    """Una línea de log por span"""
+
+    def __init__(self):
+        # Sin configuración de logging en la aplicación, las líneas se envían a stderr
+        if not logger.handlers and not logging.getLogger().handlers:
+            logger.addHandler(logging.StreamHandler())
+            logger.setLevel(logging.INFO)
+
+    def export(self, span):
+        attributes = " ".join(f"{key}={value}" for key, value in span.attributes.items())
+        logger.info("span=%s trace=%s duration_ms=%.1f %s", span.name, span.trace_id, span.duration * 1000, attributes)
+
+class JsonExporter:
+    """Añade cada span como una línea JSON al archivo indicado"""
+
+    def __init__(self, path):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._file = open(path, "a", encoding="utf-8")
+        self._lock = threading.Lock()
+
+    def export(self, span):
+        line = json.dumps(span.to_dict(), ensure_ascii=False, default=str)
+        with self._lock:
+            self._file.write(line + "\n")
+            self._file.flush()
+
+class PrometheusExporter:
+    """
+    Agrega los spans en métricas con formato de texto de Prometheus: número y segundos
+    totales por span, la suma de cada atributo numérico (tokens, bytes, documentos...) y
+    los indicadores publicados con `set_gauge` (tasas de acierto de las cachés). `render()`
+    devuelve el texto; si hay `path`, se reescribe como mucho una vez por segundo.
+    """
+
+    def __init__(self, path=None, write_interval=1.0):
+        self.path = path
+        self.write_interval = write_interval
+        self._counts = {}
+        self._seconds = {}
+        self._attributes = {}
+        self._errors = {}
+        self._gauges = {}
+        self._last_write = 0.0
+        self._lock = threading.Lock()
+
+    def export(self, span):
+        with self._lock:
+            self._counts[span.name] = self._counts.get(span.name, 0) + 1
+            self._seconds[span.name] = self._seconds.get(span.name, 0.0) + span.duration
+            if span.error:
+                self._errors[span.name] = self._errors.get(span.name, 0) + 1
+            for key, value in span.attributes.items():
+                if isinstance(value, (int, float)) and not isinstance(value, bool):
+                    metric = (span.name, key)
+                    self._attributes[metric] = self._attributes.get(metric, 0) + value
+            due = self.path and time.time() - self._last_write >= self.write_interval
+            if due:
+                self._last_write = time.time()
+        if due:
+            self.write()
+
+    def set_gauge(self, name, value):
+        with self._lock:
+            self._gauges[name] = value
+
+    def render(self):
+        with self._lock:
+            lines = [
+                "# TYPE legischat_span_total counter",
+                *(f'legischat_span_total{{span="{name}"}} {count}' for name, count in sorted(self._counts.items())),
+                "# TYPE legischat_span_seconds_total counter",
+                *(f'legischat_span_seconds_total{{span="{name}"}} {seconds:.6f}' for name, seconds in sorted(self._seconds.items())),
+                "# TYPE legischat_span_errors_total counter",
+                *(f'legischat_span_errors_total{{span="{name}"}} {count}' for name, count in sorted(self._errors.items())),
+                "# TYPE legischat_span_attribute_total counter",
+                *(
+                    f'legischat_span_attribute_total{{span="{name}",attribute="{key}"}} {value}'
+                    for (name, key), value in sorted(self._attributes.items())
+                ),
+            ]
+            for name, value in sorted(self._gauges.items()):
+                lines += [f"# TYPE legischat_{name} gauge", f"legischat_{name} {value}"]
+        return "\n".join(lines) + "\n"
+
+    def write(self):
+        text = self.render()
+        with open(self.path + ".tmp", "w", encoding="utf-8") as f:
+            f.write(text)
+        os.replace(self.path + ".tmp", self.path)
+
+def create_exporter(kind):
+    if kind == "log":
+        return LogExporter()
+    if kind == "json":
+        return JsonExporter(TRACING_JSON_PATH)
+    if kind == "prometheus":
+        return PrometheusExporter(TRACING_PROMETHEUS_PATH)
+    if kind in ("", "off", None):
+        return None
+    raise ValueError(f"Exportador de trazas desconocido: {kind}")
+
+_exporter = create_exporter(TRACING_EXPORTER)
+
+def configure(exporter):
+    """Sustituye el exportador activo (None desactiva las trazas)"""
+    global _exporter
+    _exporter = exporter
+
+def get_exporter():
+    return _exporter
+
+def span(name, **attributes):
+    exporter = _exporter
+    if exporter is None:
+        return _NOOP_SPAN
+    return Span(name, exporter, attributes)
+
+def tracing_enabled():
+    return _exporter is not None
+
+def record_span(name, seconds, **attributes):
+    """Registra un span ya terminado que duró `seconds` (para etapas que no caben en un `with`)"""
+    exporter = _exporter
+    if exporter is None:
+        return
+    finished = Span(name, exporter, {key: value for key, value in attributes.items() if value is not None})
+    finished.trace_id = _trace_id.get() or uuid.uuid4().hex[:16]
+    finished.started = time.time() - seconds
+    finished.duration = seconds
+    exporter.export(finished)
+
+def set_gauge(name, value):
+    """Publica el valor actual de un indicador; solo el exportador de Prometheus los guarda"""
+    exporter = _exporter
+    if exporter is not None and hasattr(exporter, "set_gauge"):
+        exporter.set_gauge(name, value)
+
+def payload_bytes(docs):
+    """Bytes de texto (contenido y metadatos de texto) de una lista de documentos recuperados"""
+    total = 0
+    for doc in docs:
+        total += len(doc.page_content.encode("utf-8"))
+        total += sum(len(value.encode("utf-8")) for value in doc.metadata.values() if isinstance(value, str))
+    return total
@@ -1,89 +1,565 @@
 # src/utils/chains.py
-from langchain_openai import ChatOpenAI
-from langchain_core.runnables import RunnablePassthrough
+from langchain_core.runnables import RunnablePassthrough, RunnableLambda
+from langchain_core.runnables.config import run_in_executor
 from langchain_core.output_parsers import StrOutputParser
 from operator import itemgetter
-from src.config import MODEL_NAME, TEMPERATURE, OPENAI_API_KEY, RETRIEVER_K
+from langchain_core.documents import Document
+import contextvars
+import re
+import threading
+import time
+from types import SimpleNamespace
+from concurrent.futures import Future, ThreadPoolExecutor
+import numpy as np
+from src.config import (
+    MODEL_NAME, TEMPERATURE, OPENAI_API_KEY, RETRIEVER_K, HYBRID_SEARCH, HYBRID_CANDIDATES, RRF_K,
+    ANSWER_CACHE_ENABLED, LOW_LATENCY_MODE, SPECULATIVE_REUSE_THRESHOLD, SPECULATIVE_WORKERS,
+    MMR_ENABLED, MMR_CANDIDATES, MMR_LAMBDA
+)
 from src.prompts import ANSWER_PROMPT, CONDENSE_QUESTION_PROMPT
-# from src.utils.filters import create_filter_dict
+from src.chunk_store import get_chunk_store
+from src.lexical_index import get_lexical_index, reciprocal_rank_fusion
+from src.article_index import get_article_index, strip_accents
+from src.answer_cache import get_answer_cache
+from src.utils.vectors import as_list
+from src.context_assembly import assemble_context
+from src.mmr import mmr_select
+from src.tracing import span, record_span, set_gauge, tracing_enabled, payload_bytes
+from src.utils.tokens import count_tokens
+from src.utils.filters import detect_article_reference, detect_document_type, create_filter_dict
+from src.utils.filename_matcher import get_filename_matcher
 
-def create_filtered_retriever(vectorstore, selected_sources, question):
-    """Crea un retriever filtrado basado en la selección y la pregunta"""
+def build_filter(selected_sources, question):
+    """Filtro de metadatos según la selección y los documentos mencionados en la pregunta"""
+    return create_filter_dict(selected_sources, question, get_filename_matcher())
+
+def search_with_vectors(vectorstore, question, k, filter_dict=None, embedding=None):
+    """
+    Búsqueda densa que devuelve también los embeddings de los resultados:
+    (docs, scores, matriz de vectores). Soporta el índice local y Pinecone.
+    Con `embedding` (ya calculado, p. ej. en lote) no se vuelve a embeber la pregunta.
+    """
+    if embedding is None:
+        with span("embed", texts=1):
+            embedding = vectorstore.embeddings.embed_query(question)
+    with span("vector_query", k=k, filter=str(filter_dict)) as s:
+        if hasattr(vectorstore, "search_by_vector"):
+            results = vectorstore.search_by_vector(embedding, k, filter_dict, include_vectors=True)
+            if not results:
+                return [], np.zeros(0, dtype=np.float32), np.zeros((0, len(embedding)), dtype=np.float32)
+            rows, vectors = results
+            docs = [vectorstore._to_document(row) for row, _ in rows]
+            scores = np.asarray([score for _, score in rows], dtype=np.float32)
+        else:
+            # PineconeVectorStore: consulta directa al índice pidiendo los valores de cada vector
+            response = vectorstore._index.query(
+                vector=as_list(embedding), top_k=k, filter=filter_dict, include_values=True, include_metadata=True
+            )
+            docs, scores, vectors = [], [], []
+            for match in response.matches:
+                metadata = dict(match.metadata or {})
+                text = metadata.pop(vectorstore._text_key, "")
+                docs.append(Document(id=match.id, page_content=text, metadata=metadata))
+                scores.append(match.score)
+                vectors.append(match.values)
+            scores = np.asarray(scores, dtype=np.float32)
+            vectors = np.asarray(vectors, dtype=np.float32).reshape(len(docs), -1)
+        if s.enabled:
+            s.set(docs=len(docs), bytes=payload_bytes(docs) + vectors.nbytes)
+    return docs, scores, vectors
+
+def diversified_search(vectorstore, question, k=RETRIEVER_K, filter_dict=None, embedding=None):
+    """Recupera MMR_CANDIDATES candidatos con sus vectores y elige k diversos con MMR"""
+    docs, scores, vectors = search_with_vectors(vectorstore, question, max(k, MMR_CANDIDATES), filter_dict, embedding)
+    return [docs[i] for i in mmr_select(scores, vectors, k, MMR_LAMBDA)]
+
+def dense_search(vectorstore, question, k, filter_dict=None, embedding=None):
+    """Búsqueda densa sin MMR; con `embedding` se busca por vector sin embeber la pregunta"""
+    with span("vector_query", k=k, filter=str(filter_dict)) as s:
+        if embedding is None:
+            # Incluye el embedding de la consulta, que hace el propio vectorstore
+            docs = vectorstore.similarity_search(question, k=k, filter=filter_dict)
+        else:
+            if not hasattr(vectorstore, "search_by_vector"):
+                embedding = as_list(embedding)
+            docs = vectorstore.similarity_search_by_vector(embedding, k=k, filter=filter_dict)
+        if s.enabled:
+            s.set(docs=len(docs), bytes=payload_bytes(docs))
+    return docs
+
+def hybrid_retrieve(vectorstore, selected_sources, question, k=RETRIEVER_K, embedding=None):
+    """
+    Combina la búsqueda densa con BM25 sobre el texto lematizado mediante Reciprocal Rank Fusion.
+    Si no hay índice léxico construido, se usa solo la búsqueda densa. `embedding` es el de
+    la pregunta si ya se calculó (p. ej. en un lote de batch_qa).
+    """
+    lexical_index = get_lexical_index() if HYBRID_SEARCH else None
+    filter_dict = build_filter(selected_sources, question)
+    if lexical_index is None:
+        if MMR_ENABLED:
+            return diversified_search(vectorstore, question, k, filter_dict, embedding)
+        return dense_search(vectorstore, question, k, filter_dict, embedding)
     
-    # Si el usuario ha seleccionado "todos", no se aplica filtro
-    if "todos" in selected_sources:
-        filter_dict = None
+    if MMR_ENABLED:
+        dense_docs, _, dense_vectors = search_with_vectors(
+            vectorstore, question, max(HYBRID_CANDIDATES, MMR_CANDIDATES), filter_dict, embedding
+        )
     else:
-        # Construir filtro para doc_type
-        filter_dict = {"doc_type": {"$in": selected_sources}}
+        dense_docs = dense_search(vectorstore, question, HYBRID_CANDIDATES, filter_dict, embedding)
+    with span("lexical_query", k=HYBRID_CANDIDATES) as s:
+        lexical_hits = lexical_index.search(question, k=HYBRID_CANDIDATES, filter=filter_dict)
+        s.set(hits=len(lexical_hits))
     
-    return vectorstore.as_retriever(
-        search_kwargs={
-            "k": RETRIEVER_K, 
-            "filter": filter_dict  # Aplicar filtro basado en los tipos seleccionados
-        }
-    )
+    dense_ids = [doc.metadata.get("id") for doc in dense_docs]
+    dense_by_id = dict(zip(dense_ids, dense_docs))
+    fused = reciprocal_rank_fusion([dense_ids, [chunk_id for chunk_id, _ in lexical_hits]], k=RRF_K, with_scores=True)
+    
+    if MMR_ENABLED:
+        # MMR sobre los mejores candidatos fusionados; los encontrados solo por BM25 no tienen
+        # vector (fila de ceros) y compiten solo por relevancia
+        fused = fused[:MMR_CANDIDATES]
+        row_by_id = {chunk_id: row for row, chunk_id in enumerate(dense_ids)}
+        vectors = np.zeros((len(fused), dense_vectors.shape[1] if len(dense_vectors) else 1), dtype=np.float32)
+        for i, (chunk_id, _) in enumerate(fused):
+            if chunk_id in row_by_id:
+                vectors[i] = dense_vectors[row_by_id[chunk_id]]
+        relevance = np.asarray([score for _, score in fused], dtype=np.float32)
+        # Las puntuaciones RRF son muy próximas entre sí: se escalan a [0, 1] para compararlas con la similitud
+        spread = relevance.max() - relevance.min() if len(relevance) else 0.0
+        relevance = (relevance - relevance.min()) / spread if spread > 0 else np.ones_like(relevance)
+        fused_ids = [fused[i][0] for i in mmr_select(relevance, vectors, k, MMR_LAMBDA)]
+    else:
+        fused_ids = [chunk_id for chunk_id, _ in fused[:k]]
+    
+    # Los chunks encontrados solo por BM25 se crean vacíos y se completan desde el almacén local
+    return [
+        dense_by_id.get(chunk_id) or Document(page_content="", metadata={"id": chunk_id})
+        for chunk_id in fused_ids
+    ]
 
-def create_conversation_chain(vectorstore, selected_sources):
-    """Crea la cadena de conversación RAG con debug para imprimir información extra"""
-    # Modelo de lenguaje
-    llm = ChatOpenAI(
+def lookup_article_documents(question, selected_sources):
+    """
+    Si la pregunta menciona un artículo de un documento identificable, devuelve sus chunks
+    directamente desde el índice de artículos (sin embeddings ni búsqueda vectorial).
+    Devuelve None cuando no aplica o la referencia es ambigua.
+    """
+    article_index = get_article_index()
+    if article_index is None:
+        return None
+    article = detect_article_reference(question)
+    if article is None:
+        return None
+    
+    doc_type, specific_source = detect_document_type(question)
+    doc_types = None if "todos" in selected_sources else set(selected_sources)
+    if doc_type:
+        doc_types = {doc_type} if doc_types is None or doc_type in doc_types else set()
+    
+    result = article_index.lookup(article, doc_types, specific_source)
+    if result is None:
+        return None
+    _, chunk_ids = result
+    return hydrate_documents([Document(page_content="", metadata={"id": chunk_id}) for chunk_id in chunk_ids])
+
+def hydrate_documents(docs):
+    """Completa page_content con el texto completo de cada chunk (una sola consulta al almacén local)"""
+    with span("hydrate", docs=len(docs)) as s:
+        stored = get_chunk_store().get_many([doc.metadata["id"] for doc in docs if "id" in doc.metadata])
+        for doc in docs:
+            if doc.metadata.get("id") in stored:
+                full_text, summary, metadata = stored[doc.metadata["id"]]
+                doc.page_content = full_text
+                doc.metadata = {**metadata, **doc.metadata, "text": summary}
+            # Vectores antiguos que aún guardan el texto completo en Pinecone
+            elif "full_text" in doc.metadata:
+                doc.page_content = doc.metadata["full_text"]
+        # Carga útil recuperada que llegará al prompt de respuesta
+        if s.enabled:
+            s.set(bytes=payload_bytes(docs), tokens=sum(count_tokens(doc.page_content) for doc in docs))
+    return docs
+
+class LatencyTracker:
+    """Media móvil exponencial de una latencia, para estimar el tiempo ahorrado al omitir un paso"""
+    
+    def __init__(self, alpha=0.2):
+        self.alpha = alpha
+        self.average = 0.0
+    
+    def update(self, seconds):
+        self.average = seconds if self.average == 0.0 else self.alpha * seconds + (1 - self.alpha) * self.average
+
+class SpeculativeRetrieval:
+    """
+    Recuperación sobre la pregunta original lanzada en paralelo con la condensación.
+
+    Primero embebe la pregunta y publica el embedding (que también sirve para comparar con
+    la pregunta condensada) y después consulta los índices. `cancel()` descarta el resultado:
+    si la tarea no empezó, no se ejecuta; si ya embebió, no llega a consultar los índices;
+    una consulta ya en curso termina igualmente.
+    """
+
+    def __init__(self, executor, question, embed, fetch):
+        self.question = question
+        self._embed = embed
+        self._fetch = fetch
+        self._embedding = Future()
+        self._cancelled = threading.Event()
+        # Se propaga el contexto para que sus spans pertenezcan a la traza de la petición
+        self._future = executor.submit(contextvars.copy_context().run, self._run)
+
+    def _run(self):
+        started = time.perf_counter()
+        try:
+            embedding = self._embed(self.question)
+        except Exception as e:
+            self._embedding.set_exception(e)
+            raise
+        self._embedding.set_result(embedding)
+        if self._cancelled.is_set():
+            return None
+        return self._fetch(self.question, embedding), time.perf_counter() - started
+
+    def question_embedding(self):
+        """Embedding de la pregunta original; si la tarea aún no empezó, se cancela y se calcula aquí"""
+        if self._future.cancel():
+            self._cancelled.set()
+            return self._embed(self.question)
+        return self._embedding.result()
+
+    def cancel(self):
+        self._cancelled.set()
+        self._future.cancel()
+
+    def result(self):
+        """(docs, segundos) de la recuperación, o None si se descartó antes de consultar"""
+        if self._future.cancelled():
+            return None
+        return self._future.result()
+
+# Recursos compartidos por todas las cadenas del proceso
+_speculative_executor = ThreadPoolExecutor(max_workers=SPECULATIVE_WORKERS)
+_condense_latency = LatencyTracker()
+
+def _normalize_question(question):
+    return re.sub(r"[^\w\s]", "", strip_accents(question)).split()
+
+def questions_equivalent(original, condensed, original_embedding, condensed_embedding):
+    """La pregunta condensada es equivalente si coincide normalizada o su embedding es casi idéntico"""
+    if _normalize_question(original) == _normalize_question(condensed):
+        return True
+    a = np.asarray(original_embedding, dtype=np.float32)
+    b = np.asarray(condensed_embedding, dtype=np.float32)
+    similarity = float(a @ b / ((np.linalg.norm(a) * np.linalg.norm(b)) or 1.0))
+    return similarity >= SPECULATIVE_REUSE_THRESHOLD
+
+def create_llm(http_client=None, http_async_client=None):
+    """Modelo de lenguaje para condensar y responder (`http_async_client` se usa en ainvoke/astream)"""
+    # Import diferido: el SDK de OpenAI solo se carga al construir la primera cadena
+    from langchain_openai import ChatOpenAI
+    return ChatOpenAI(
         model_name=MODEL_NAME,
         temperature=TEMPERATURE,
-        openai_api_key=OPENAI_API_KEY
+        openai_api_key=OPENAI_API_KEY,
+        http_client=http_client,
+        http_async_client=http_async_client
     )
-    
-    # Cadena para condensar la pregunta basada en el historial
-    condense_question_chain = (
+
+def create_condense_chain(llm):
+    """Cadena para condensar la pregunta basada en el historial"""
+    return (
         {"question": itemgetter("question"), "chat_history": itemgetter("chat_history")}
         | CONDENSE_QUESTION_PROMPT
         | llm
         | StrOutputParser()
     )
-    
-    # Cadena para responder
-    answer_chain = (
-        {"context": itemgetter("context"), "question": itemgetter("question")}
+
+def build_context(inputs):
+    """Ensambla el contexto del prompt (chunks fusionados y sin redundancia, dentro del presupuesto)"""
+    with span("context_assembly", chunks=len(inputs["context"])) as s:
+        context, tokens_before, tokens_after = assemble_context(inputs["context"])
+        s.set(tokens_before=tokens_before, tokens_after=tokens_after)
+    return context
+
+def create_answer_chain(llm):
+    """Cadena para responder a partir de {"context": [Document], "question": str}"""
+    return (
+        {"context": build_context, "question": itemgetter("question")}
         | ANSWER_PROMPT
         | llm
         | StrOutputParser()
     )
+
+def _build_conversation_steps(vectorstore, selected_sources, llm=None, memory=None):
+    """
+    Construye los pasos de la cadena RAG (recuperación y respuesta) compartidos por el modo
+    normal y el streaming. `memory` (p. ej. SummaryBufferMemory) compacta el historial antes
+    de condensar; una entrada "memory" en cada llamada tiene prioridad, para que las cadenas
+    compartidas entre sesiones usen la memoria de la sesión que pregunta.
+    """
+    # Modelo de lenguaje
+    llm = llm or create_llm()
     
-    def debug_retrieve(condensed_question):
-        """Recupera documentos, imprime en consola el contexto y la pregunta reformulada."""
-        retriever = create_filtered_retriever(vectorstore, selected_sources, condensed_question)
-        docs = retriever.get_relevant_documents(condensed_question)
+    answer_cache = get_answer_cache() if ANSWER_CACHE_ENABLED else None
+    condense_latency = _condense_latency
+    
+    condense_question_chain = create_condense_chain(llm)
+    answer_chain = create_answer_chain(llm)
+    
+    def fetch_documents(question, embedding=None):
+        """Recupera y completa los documentos para una pregunta"""
+        return hydrate_documents(hybrid_retrieve(vectorstore, selected_sources, question, embedding=embedding))
+    
+    def debug_retrieve(condensed_question, docs=None, embedding=None):
+        """Recupera documentos (si no vienen de la recuperación especulativa) para la pregunta reformulada."""
+        if docs is None:
+            docs = fetch_documents(condensed_question, embedding)
+        return {"context": docs, "question": condensed_question}
+    
+    def embed_question(question):
+        with span("embed", texts=1):
+            return vectorstore.embeddings.embed_query(question)
+    
+    def compact_history(inputs):
+        """Aplica la memoria acotada por tokens al historial; devuelve (inputs, tokens_ahorrados)"""
+        session_memory = inputs.get("memory") or memory
+        if session_memory is None or not inputs.get("chat_history"):
+            return inputs, 0
+        with span("memory", messages=len(inputs["chat_history"])) as s:
+            history = session_memory.history(inputs["chat_history"])
+            s.set(tokens_saved=session_memory.last_tokens_saved, summarized=session_memory.summarized)
+        return {**inputs, "chat_history": history}, session_memory.last_tokens_saved
+    
+    def condense(inputs):
+        """
+        Condensa la pregunta. En modo baja latencia se omite sin historial y, con historial,
+        se lanza la recuperación sobre la pregunta original en paralelo.
+        Devuelve (pregunta_condensada, futuro_especulativo, segundos_ahorrados).
+        """
+        question = inputs["question"]
+        if not LOW_LATENCY_MODE:
+            with span("condense"):
+                return condense_question_chain.invoke(inputs), None, 0.0
         
-        # Asegurarse de que page_content sea igual a full_text para cada documento
-        for doc in docs:
-            if "full_text" in doc.metadata:
-                doc.page_content = doc.metadata["full_text"]
+        # Primer turno: condensar no aporta nada, se ahorra una llamada al LLM
+        if not inputs.get("chat_history"):
+            return question, None, condense_latency.average
         
-        print("----- DEBUG RETRIEVE -----")
-        print("Pregunta reformulada:", condensed_question)
-        print("Documentos recuperados:")
-        for doc in docs:
-            filename = doc.metadata.get("filename", "N/A")
-            print(f"  - Fuente: {filename}")
-            # Mostrar qué texto se usó para la búsqueda vs. qué texto se usará para responder
-            print(f"  - Texto optimizado (para búsqueda): {doc.metadata.get('text', 'N/A')[:200]}...")
-            print(f"  - Texto completo (para respuesta): {doc.page_content[:200]}...")
-            print("  ----------------------")
+        speculative = SpeculativeRetrieval(_speculative_executor, question, embed_question, fetch_documents)
+        started = time.perf_counter()
+        with span("condense", speculative=True):
+            condensed_question = condense_question_chain.invoke(inputs)
+        condense_latency.update(time.perf_counter() - started)
+        return condensed_question, speculative, 0.0
+    
+    def retrieve(inputs):
+        """Recuperación de una petición dentro de su span (la ruta seguida queda como atributo)"""
+        with span("retrieve") as s:
+            result = route_retrieval(inputs, s)
+            s.set(docs=len(result["context"]), time_saved=result.get("time_saved", 0.0))
+        return result
+    
+    def route_retrieval(inputs, retrieve_span):
+        """Atajo por número de artículo; si no aplica, condensa la pregunta y hace la búsqueda normal."""
+        direct_docs = lookup_article_documents(inputs["question"], selected_sources)
+        if direct_docs:
+            retrieve_span.set(route="article_index")
+            return {"context": direct_docs, "question": inputs["question"]}
         
-        return {"context": docs, "question": condensed_question}
+        inputs, history_tokens_saved = compact_history(inputs)
+        condensed_question, speculative, time_saved = condense(inputs)
+        
+        embedding = None
+        if answer_cache is not None or speculative is not None:
+            embedding = embed_question(condensed_question)
+        
+        # Caché semántica: preguntas equivalentes sobre las mismas fuentes reutilizan la respuesta
+        if answer_cache is not None:
+            with span("answer_cache") as s:
+                cached = answer_cache.lookup(embedding, selected_sources, condensed_question)
+                if s.enabled:
+                    stats = answer_cache.stats()
+                    s.set(hit=int(cached is not None))
+                    set_gauge("answer_cache_hit_rate", stats["hit_rate"])
+                    set_gauge("answer_cache_entries", stats["entries"])
+            if cached is not None:
+                answer, source_ids = cached
+                if speculative is not None:
+                    speculative.cancel()
+                docs = hydrate_documents([Document(page_content="", metadata={"id": i}) for i in source_ids])
+                retrieve_span.set(route="answer_cache")
+                return {
+                    "context": docs,
+                    "question": condensed_question,
+                    "response": answer,
+                    "history_tokens_saved": history_tokens_saved
+                }
+        
+        docs = None
+        if speculative is not None:
+            try:
+                # El embedding de la pregunta original lo calcula (una sola vez) la tarea especulativa
+                original_embedding = speculative.question_embedding()
+                if questions_equivalent(inputs["question"], condensed_question, original_embedding, embedding):
+                    # Se reutiliza la recuperación hecha en paralelo; se ahorra lo que no hubo que esperar
+                    waited = time.perf_counter()
+                    fetched = speculative.result()
+                    if fetched is not None:
+                        docs, speculative_time = fetched
+                        time_saved = speculative_time - (time.perf_counter() - waited)
+                else:
+                    # La pregunta condensada cambió de forma material: se recupera de nuevo
+                    speculative.cancel()
+            except Exception as e:
+                # La recuperación especulativa es solo un adelanto: si falla, se busca con la pregunta condensada
+                speculative.cancel()
+                docs, time_saved = None, 0.0
+                retrieve_span.set(speculative_error=type(e).__name__)
+        
+        retrieve_span.set(route="speculative" if docs is not None else "search")
+        result = debug_retrieve(condensed_question, docs, embedding)
+        result["time_saved"] = time_saved
+        result["history_tokens_saved"] = history_tokens_saved
+        if answer_cache is not None:
+            result["embedding"] = embedding
+        return result
+
+    def finish_answer(inputs, answer):
+        """Guarda la respuesta generada en la caché semántica y arma el resultado"""
+        if inputs.get("embedding") is not None:
+            answer_cache.store(
+                inputs["embedding"],
+                selected_sources,
+                answer,
+                [doc.metadata.get("id") for doc in inputs["context"] if doc.metadata.get("id")],
+                inputs.get("question")
+            )
+        return {
+            "response": answer,
+            "context": inputs.get("context"),
+            "question": inputs.get("question"),
+            "time_saved": inputs.get("time_saved", 0.0),
+            "history_tokens_saved": inputs.get("history_tokens_saved", 0)
+        }
 
     def debug_answer(inputs):
-        answer = answer_chain.invoke(inputs)
-        print("----- DEBUG ANSWER -----")
-        print("Respuesta generada:", answer)
-        return {"response": answer, "context": inputs.get("context"), "question": inputs.get("question")}
+        if "response" in inputs:
+            return inputs
+        with span("answer") as s:
+            answer = answer_chain.invoke(inputs)
+            if s.enabled:
+                s.set(answer_tokens=count_tokens(answer))
+        return finish_answer(inputs, answer)
+    
+    async def adebug_answer(inputs):
+        """Versión asíncrona: la llamada al LLM no ocupa un hilo mientras espera la respuesta"""
+        if "response" in inputs:
+            return inputs
+        with span("answer") as s:
+            answer = await answer_chain.ainvoke(inputs)
+            if s.enabled:
+                s.set(answer_tokens=count_tokens(answer))
+        return finish_answer(inputs, answer)
+    
+    return SimpleNamespace(
+        retrieve=retrieve,
+        answer_chain=answer_chain,
+        finish_answer=finish_answer,
+        debug_answer=debug_answer,
+        adebug_answer=adebug_answer
+    )
 
+def create_conversation_chain(vectorstore, selected_sources, llm=None, memory=None):
+    """Crea la cadena de conversación RAG (cada etapa queda registrada en un span de src.tracing)"""
+    steps = _build_conversation_steps(vectorstore, selected_sources, llm, memory)
     
     chain = (
-        {"question": itemgetter("question"), "chat_history": itemgetter("chat_history"), "selected_sources": itemgetter("selected_sources")}
-        | condense_question_chain
-        | debug_retrieve
-        | debug_answer
+        {
+            "question": itemgetter("question"),
+            "chat_history": itemgetter("chat_history"),
+            "selected_sources": itemgetter("selected_sources"),
+            "memory": lambda inputs: inputs.get("memory")
+        }
+        | RunnableLambda(steps.retrieve)
+        # Con `ainvoke`, la recuperación (clientes síncronos) va al executor y la respuesta es asíncrona
+        | RunnableLambda(steps.debug_answer, afunc=steps.adebug_answer)
     )
     
     return chain
+
+def _finish_stream(steps, retrieved, parts, answer_started, time_to_first_token):
+    """Evento final del streaming; registra el span de la respuesta si se generó con el LLM"""
+    if "response" in retrieved:
+        result = dict(retrieved)
+    else:
+        answer = "".join(parts)
+        # El span se registra al terminar: un `with` abierto entre `yield` no es seguro si el
+        # consumidor itera el generador desde otro hilo o contexto
+        record_span(
+            "answer", time.perf_counter() - answer_started,
+            streaming=True, time_to_first_token=time_to_first_token,
+            answer_tokens=count_tokens(answer) if tracing_enabled() else None
+        )
+        result = steps.finish_answer(retrieved, answer)
+    result["time_to_first_token"] = time_to_first_token
+    return {"type": "done", **result}
+
+def create_streaming_chain(vectorstore, selected_sources, llm=None, memory=None):
+    """
+    Crea una versión en streaming de la cadena de conversación. La función devuelta recibe
+    las mismas entradas que `chain.invoke` y genera eventos:
+      - {"type": "sources", "context": [...]} en cuanto termina la recuperación
+      - {"type": "token", "token": str} por cada fragmento de la respuesta del LLM
+      - {"type": "done", "response": ..., "context": ..., "time_to_first_token": ...} al final
+    """
+    steps = _build_conversation_steps(vectorstore, selected_sources, llm, memory)
+    
+    def stream(inputs):
+        started = time.perf_counter()
+        retrieved = steps.retrieve(inputs)
+        yield {"type": "sources", "context": retrieved["context"]}
+        
+        # Si la respuesta vino de la caché se emite de una vez
+        tokens = [retrieved["response"]] if "response" in retrieved else steps.answer_chain.stream(retrieved)
+        parts = []
+        time_to_first_token = None
+        answer_started = time.perf_counter()
+        for token in tokens:
+            if time_to_first_token is None:
+                time_to_first_token = time.perf_counter() - started
+            parts.append(token)
+            yield {"type": "token", "token": token}
+        
+        yield _finish_stream(steps, retrieved, parts, answer_started, time_to_first_token)
+    
+    return stream
+
+def create_async_streaming_chain(vectorstore, selected_sources, llm=None, memory=None):
+    """
+    Versión asíncrona de `create_streaming_chain` (mismos eventos, como generador asíncrono).
+    La recuperación se ejecuta en el executor y los tokens llegan con `astream`, de modo que
+    muchas preguntas en curso comparten un único bucle de eventos.
+    """
+    steps = _build_conversation_steps(vectorstore, selected_sources, llm, memory)
+    
+    async def stream(inputs):
+        started = time.perf_counter()
+        retrieved = await run_in_executor(None, steps.retrieve, inputs)
+        yield {"type": "sources", "context": retrieved["context"]}
+        
+        parts = []
+        time_to_first_token = None
+        answer_started = time.perf_counter()
+        if "response" in retrieved:
+            time_to_first_token = time.perf_counter() - started
+            parts.append(retrieved["response"])
+            yield {"type": "token", "token": retrieved["response"]}
+        else:
+            async for token in steps.answer_chain.astream(retrieved):
+                if time_to_first_token is None:
+                    time_to_first_token = time.perf_counter() - started
+                parts.append(token)
+                yield {"type": "token", "token": token}
+        
+        yield _finish_stream(steps, retrieved, parts, answer_started, time_to_first_token)
+    
+    return stream
@@ -0,0 +1,123 @@
+# src/utils/filename_matcher.py
+import os
+import re
+from collections import Counter, deque
+from functools import lru_cache
+from src.article_index import strip_accents
+from src.chunk_store import get_chunk_store
+
+WORD_PATTERN = re.compile(r"\w+")
+# Palabras finales de hasta este largo se tratan como siglas o abreviaturas ("cc", "coip", "act ene")
+MAX_SUFFIX_TOKEN_CHARS = 4
+# Un alias o prefijo necesita al menos tantas palabras para no confundirse con texto común
+MIN_ALIAS_TOKENS = 2
+MIN_PREFIX_TOKENS = 3
+
+def tokenize(text):
+    """Palabras sin acentos y en minúsculas, para comparar menciones con nombres de archivo"""
+    return WORD_PATTERN.findall(strip_accents(text))
+
+def filename_patterns(filename):
+    """
+    Secuencias de palabras que identifican a un archivo normalizado: el título completo
+    (sin extensión), el título sin los números finales (años, versiones, copias) y el
+    título sin las palabras cortas finales ("codigo civil cc" -> "codigo civil").
+    """
+    tokens = tokenize(os.path.splitext(filename)[0])
+    patterns = [tuple(tokens)]
+    while tokens and tokens[-1].isdigit():
+        tokens = tokens[:-1]
+    patterns.append(tuple(tokens))
+    while tokens and (tokens[-1].isdigit() or len(tokens[-1]) <= MAX_SUFFIX_TOKEN_CHARS):
+        tokens = tokens[:-1]
+    patterns.append(tuple(tokens))
+    aliases = [pattern for pattern in dict.fromkeys(patterns[1:]) if len(pattern) >= MIN_ALIAS_TOKENS]
+    return [pattern for pattern in dict.fromkeys(patterns[:1] + aliases) if pattern]
+
+def prefix_patterns(pattern):
+    """Prefijos del título de al menos MIN_PREFIX_TOKENS palabras que terminan en una palabra larga"""
+    return [
+        pattern[:length] for length in range(MIN_PREFIX_TOKENS, len(pattern))
+        if len(pattern[length - 1]) > MAX_SUFFIX_TOKEN_CHARS
+    ]
+
+class FilenameMatcher:
+    """
+    Autómata Aho-Corasick sobre palabras, construido una vez a partir de los nombres de
+    archivo normalizados. Encuentra en una pregunta todas las menciones de títulos de
+    documentos en una sola pasada, sin importar acentos ni mayúsculas. Además de los
+    patrones de `filename_patterns`, un título largo se reconoce por sus prefijos
+    ("ley organica para impulsar la iniciativa privada") si no los comparte con otro archivo.
+    """
+
+    def __init__(self, filenames):
+        self.filenames = sorted(filenames)
+        self._goto = [{}]
+        self._fail = [0]
+        self._output = [[]]  # por nodo: [(longitud_en_palabras, filename)]
+        patterns = {filename: filename_patterns(filename) for filename in self.filenames}
+        prefixes = {
+            filename: set(prefix for pattern in file_patterns for prefix in prefix_patterns(pattern))
+            for filename, file_patterns in patterns.items()
+        }
+        owners = Counter(prefix for file_prefixes in prefixes.values() for prefix in file_prefixes)
+        titles = {pattern for file_patterns in patterns.values() for pattern in file_patterns}
+        for filename in self.filenames:
+            unique = [prefix for prefix in sorted(prefixes[filename]) if owners[prefix] == 1 and prefix not in titles]
+            for pattern in dict.fromkeys(patterns[filename] + unique):
+                self._insert(pattern, filename)
+        self._build_failure_links()
+
+    def _insert(self, pattern, filename):
+        node = 0
+        for token in pattern:
+            if token not in self._goto[node]:
+                self._goto.append({})
+                self._fail.append(0)
+                self._output.append([])
+                self._goto[node][token] = len(self._goto) - 1
+            node = self._goto[node][token]
+        self._output[node].append((len(pattern), filename))
+
+    def _build_failure_links(self):
+        queue = deque(self._goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for token, child in self._goto[node].items():
+                queue.append(child)
+                fail = self._fail[node]
+                while fail and token not in self._goto[fail]:
+                    fail = self._fail[fail]
+                self._fail[child] = self._goto[fail].get(token, 0)
+                self._output[child] = self._output[child] + self._output[self._fail[child]]
+
+    def find(self, text):
+        """Devuelve [(inicio, fin, filename)] de todas las menciones, en posiciones de palabra"""
+        matches = []
+        node = 0
+        for position, token in enumerate(tokenize(text)):
+            while node and token not in self._goto[node]:
+                node = self._fail[node]
+            node = self._goto[node].get(token, 0)
+            for length, filename in self._output[node]:
+                matches.append((position + 1 - length, position + 1, filename))
+        return matches
+
+    def match(self, text):
+        """
+        Archivos mencionados en el texto. Solo se conservan las menciones más largas: si
+        "ley orgánica de salud" contiene una mención más corta, esta se descarta.
+        """
+        matches = self.find(text)
+        return sorted({
+            filename for start, end, filename in matches
+            if not any(s <= start and end <= e and (e - s) > (end - start) for s, e, _ in matches)
+        })
+
+@lru_cache(maxsize=None)
+def get_filename_matcher():
+    """Matcher compartido, construido con los archivos del almacén de chunks; None si está vacío"""
+    filenames = get_chunk_store().filenames()
+    if not filenames:
+        return None
+    return FilenameMatcher(filenames)
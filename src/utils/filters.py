@@ -1,46 +1,56 @@
 import re
 
+# Patrones para detectar referencias a tipos de documentos (compilados una sola vez)
+CONSTITUTION_PATTERN = re.compile(r"(constituci[oó]n|carta magna)")
+CODE_PATTERN = re.compile(r"(c[oó]digo\s+\w+)")
+LAW_PATTERN = re.compile(r"(ley\s+\w+|ley\s+org[aá]nica\s+\w+|ley\s+de\s+\w+)")
+INTERNATIONAL_PATTERN = re.compile(r"(convenio|tratado|acuerdo)\s+internacional")
+ARTICLE_PATTERN = re.compile(r"\bart(?:[ií]culo|\.|\b)\s*(?:n[uú]mero\s*|no\.\s*|n\.?\s*º\s*)?(\d+(?:\.\d+)?)")
+
 def detect_document_type(question):
     """Detecta el tipo de documento basado en patrones en la pregunta"""
     # Convertir a minúsculas para facilitar la detección
     question_lower = question.lower()
     
-    # Patrones para detectar referencias a tipos de documentos
-    constitution_pattern = r"(constituci[oó]n|carta magna)"
-    code_pattern = r"(c[oó]digo\s+\w+)"
-    law_pattern = r"(ley\s+\w+|ley\s+org[aá]nica\s+\w+|ley\s+de\s+\w+)"
-    international_pattern = r"(convenio|tratado|acuerdo)\s+internacional"
-    
     # Filtrar por tipo de documento basado en patrones en la pregunta
     doc_type_filter = None
     specific_source = None
     
-    if re.search(constitution_pattern, question_lower):
+    if CONSTITUTION_PATTERN.search(question_lower):
         doc_type_filter = "constitucion"
-    elif re.search(code_pattern, question_lower):
+    elif match := CODE_PATTERN.search(question_lower):
         doc_type_filter = "codigo"
-        # Intentar extraer el nombre específico del código
-        match = re.search(code_pattern, question_lower)
-        if match:
-            specific_source = match.group(0)
-    elif re.search(law_pattern, question_lower):
+        # Nombre específico del código
+        specific_source = match.group(0)
+    elif match := LAW_PATTERN.search(question_lower):
         doc_type_filter = "ley"
-        # Intentar extraer el nombre específico de la ley
-        match = re.search(law_pattern, question_lower)
-        if match:
-            specific_source = match.group(0)
-    elif re.search(international_pattern, question_lower):
+        # Nombre específico de la ley
+        specific_source = match.group(0)
+    elif INTERNATIONAL_PATTERN.search(question_lower):
         doc_type_filter = "convenio_internacional"
     
     return doc_type_filter, specific_source
 
-def create_filter_dict(selected_sources, question):
-    """Crea un diccionario de filtro para el retriever de Pinecone"""
-    doc_type_filter, specific_source = detect_document_type(question)
+def detect_article_reference(question):
+    """Detecta una referencia a un artículo concreto (p. ej. "artículo 66", "art. 10") y devuelve su número"""
+    match = ARTICLE_PATTERN.search(question.lower())
+    return match.group(1) if match else None
+
+def create_filter_dict(selected_sources, question, matcher=None):
+    """
+    Crea un diccionario de filtro para el retriever. Si la pregunta menciona documentos
+    concretos (según `matcher`, un FilenameMatcher), el filtro es exacto por nombre de
+    archivo (`filename $in [...]`), que Pinecone y el índice local resuelven del lado del índice.
+    """
+    doc_type_filter, _ = detect_document_type(question)
+    filenames = matcher.match(question) if matcher is not None else []
     filter_dict = {}
     
+    # Documentos mencionados explícitamente: la búsqueda se limita a ellos
+    if filenames:
+        filter_dict["filename"] = {"$in": filenames}
     # Si se seleccionó "todos" y no se detectó un tipo específico, no aplicar filtro
-    if "todos" in selected_sources and not doc_type_filter:
+    elif "todos" in selected_sources and not doc_type_filter:
         # No aplicar ningún filtro
         pass
     # Si se detectó un tipo específico en la pregunta, usar ese filtro
@@ -50,10 +60,4 @@ def create_filter_dict(selected_sources, question):
     elif "todos" not in selected_sources:
         filter_dict["doc_type"] = {"$in": selected_sources}
     
-    # Si se detectó una referencia a un documento específico, añadir al filtro
-    if specific_source:
-        # Crear un filtro más flexible para el nombre del archivo
-        filter_dict["filename"] = {"$contains": specific_source}
-    
-    print(f"Filtro aplicado: {filter_dict}")
-    return filter_dict
\ No newline at end of file
+    return filter_dict or None
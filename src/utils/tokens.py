@@ -0,0 +1,40 @@
+# src/utils/tokens.py
+from functools import lru_cache
+from src.config import MODEL_NAME, TOKEN_COUNTER
+
+# Caracteres por token en la estimación sin tiktoken (aproximado para texto en español)
+CHARS_PER_TOKEN = 4
+
+class CharEstimate:
+    """
+    Sustituto de la codificación de tiktoken cuando su archivo BPE no se puede cargar
+    (sin red y sin caché en TIKTOKEN_CACHE_DIR): cada "token" son CHARS_PER_TOKEN caracteres.
+    Implementa lo que usa el proyecto: encode y decode.
+    """
+
+    def encode(self, text):
+        return [text[i:i + CHARS_PER_TOKEN] for i in range(0, len(text), CHARS_PER_TOKEN)]
+
+    def decode(self, tokens):
+        return "".join(tokens)
+
+@lru_cache(maxsize=None)
+def get_encoding():
+    """
+    Codificación de tiktoken del modelo de chat (cl100k_base si el modelo no se reconoce).
+    tiktoken descarga el BPE la primera vez; si no puede, se usa una estimación por caracteres.
+    """
+    if TOKEN_COUNTER == "chars":
+        return CharEstimate()
+    import tiktoken
+    try:
+        try:
+            return tiktoken.encoding_for_model(MODEL_NAME)
+        except KeyError:
+            return tiktoken.get_encoding("cl100k_base")
+    except (OSError, ValueError) as e:
+        print(f"No se pudo cargar la codificación de tiktoken ({e}); los tokens se estiman por caracteres")
+        return CharEstimate()
+
+def count_tokens(text):
+    return len(get_encoding().encode(text or ""))
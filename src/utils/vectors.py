@@ -0,0 +1,6 @@
+# src/utils/vectors.py
+# Sin dependencias: populate_database lo importa al cargar y no debe arrastrar NumPy ni LangChain
+
+def as_list(vector):
+    """Vector como lista de floats (lo que esperan Pinecone y las APIs remotas)"""
+    return vector.tolist() if hasattr(vector, "tolist") else list(vector)
@@ -0,0 +1,61 @@
+from benchmarks.fakes import FakeEmbeddings
+from src.answer_cache import SemanticAnswerCache, bump_index_version
+
+embeddings = FakeEmbeddings(dim=256)
+
+def cache_in(tmp_path, threshold=0.9, **kwargs):
+    return SemanticAnswerCache(threshold=threshold, version_path=str(tmp_path / "index_version"), **kwargs)
+
+def store(cache, question, answer, sources=("ley",)):
+    cache.store(embeddings.embed_query(question), list(sources), answer, [f"id-{answer}"], question)
+
+def lookup(cache, question, sources=("ley",)):
+    return cache.lookup(embeddings.embed_query(question), list(sources), question)
+
+def test_equivalent_question_reuses_the_answer(tmp_path):
+    cache = cache_in(tmp_path)
+    store(cache, "¿Qué dice el artículo 66 de la constitución?", "derechos de libertad")
+    assert lookup(cache, "¿qué dice el artículo 66 de la Constitución?") == ("derechos de libertad", ["id-derechos de libertad"])
+    assert cache.stats()["hit_rate"] == 1.0
+
+def test_different_numbers_never_reuse_the_answer(tmp_path):
+    cache = cache_in(tmp_path)
+    store(cache, "¿Qué dice el artículo 66 de la constitución?", "derechos de libertad")
+    # Para el embedding son casi idénticas, pero citan otro artículo
+    question = "¿Qué dice el artículo 67 de la constitución?"
+    assert cache.lookup(embeddings.embed_query("¿Qué dice el artículo 66 de la constitución?"), ["ley"], question) is None
+    assert lookup(cache, question) is None
+    assert lookup(cache, "¿Qué dice el artículo de la constitución?") is None
+
+def test_a_matching_candidate_below_a_mismatching_one_is_found(tmp_path):
+    # Umbral bajo para que ambas entradas sean candidatas en cada búsqueda
+    cache = cache_in(tmp_path, threshold=0.8)
+    store(cache, "sanción por el artículo 140 del código penal", "artículo 140")
+    store(cache, "sanción por el artículo 141 del código penal", "artículo 141")
+    # La entrada más parecida cita el 140; se descarta y se reutiliza la del 141
+    closest_to_140 = embeddings.embed_query("sanción por el artículo 140 del código penal")
+    assert cache.lookup(closest_to_140, ["ley"], "sanción por el artículo 141 del código penal")[0] == "artículo 141"
+
+def test_sources_must_match(tmp_path):
+    cache = cache_in(tmp_path)
+    store(cache, "¿Qué es el habeas corpus?", "garantía", sources=("constitucion",))
+    assert lookup(cache, "¿Qué es el habeas corpus?", sources=("ley",)) is None
+    assert lookup(cache, "¿Qué es el habeas corpus?", sources=("constitucion",)) is not None
+
+def test_index_version_change_invalidates_entries(tmp_path):
+    cache = cache_in(tmp_path)
+    store(cache, "¿Qué es el habeas corpus?", "garantía")
+    bump_index_version(cache.version_path)
+    assert lookup(cache, "¿Qué es el habeas corpus?") is None
+    assert cache.stats()["entries"] == 0
+
+def test_expired_and_evicted_entries_are_dropped(tmp_path):
+    cache = cache_in(tmp_path, ttl=-1)
+    store(cache, "¿Qué es el habeas corpus?", "garantía")
+    assert lookup(cache, "¿Qué es el habeas corpus?") is None
+
+    cache = cache_in(tmp_path, max_entries=1)
+    store(cache, "¿Qué es el habeas corpus?", "garantía")
+    store(cache, "¿Qué es la acción de protección?", "otra garantía")
+    assert lookup(cache, "¿Qué es el habeas corpus?") is None
+    assert lookup(cache, "¿Qué es la acción de protección?")[0] == "otra garantía"
@@ -0,0 +1,65 @@
+import os
+import pytest
+from benchmarks.fakes import FakeChatModel, StageRecorder
+from src.batch_qa import checkpoint_path, load_completed, read_output, run
+
+class FakeAnswerer:
+    """Responde con FakeChatModel sin recuperar documentos; puede interrumpirse tras `stop_after` lotes"""
+
+    def __init__(self, stop_after=None, fail_on=()):
+        self.llm = FakeChatModel(recorder=StageRecorder())
+        self.stop_after = stop_after
+        self.fail_on = set(fail_on)
+        self.batches = []
+
+    def answer(self, items):
+        if self.stop_after is not None and len(self.batches) == self.stop_after:
+            raise KeyboardInterrupt
+        self.batches.append([item["question"] for item in items])
+        for item in items:
+            item["condensed_question"] = item["question"]
+            item["docs"] = []
+            if item["question"] in self.fail_on:
+                item["error"] = ConnectionError("LLM no disponible")
+            else:
+                item["answer"] = self.llm.invoke(f"Contexto: {item['question']}\nPregunta: {item['question']}").content
+        return items
+
+def rows(count):
+    return [
+        {"row_id": str(i), "question": f"¿Pregunta {i}?", "selected_sources": ["todos"], "chat_history": []}
+        for i in range(count)
+    ]
+
+def test_interrupted_run_resumes_from_the_checkpoint(tmp_path):
+    output = str(tmp_path / "respuestas.csv")
+    with pytest.raises(KeyboardInterrupt):
+        run(rows(7), output, FakeAnswerer(stop_after=2), chunk_size=2)
+    assert sorted(load_completed(output)) == ["0", "1", "2", "3"]
+
+    resumed = FakeAnswerer()
+    answered, failed, _ = run(rows(7), output, resumed, chunk_size=2)
+    assert resumed.batches == [["¿Pregunta 4?", "¿Pregunta 5?"], ["¿Pregunta 6?"]]
+    assert (answered, failed) == (3, 0)
+    assert list(read_output(output)["row_id"].astype(str)) == [str(i) for i in range(7)]
+    assert not os.path.exists(checkpoint_path(output))
+
+def test_duplicate_rows_are_answered_once(tmp_path):
+    output = str(tmp_path / "respuestas.csv")
+    duplicated = rows(2) + [{**rows(1)[0], "row_id": "2", "question": "  ¿PREGUNTA 0?"}]
+    answerer = FakeAnswerer()
+    answered, failed, _ = run(duplicated, output, answerer)
+    assert answerer.batches == [["¿Pregunta 0?", "¿Pregunta 1?"]]
+    assert (answered, failed) == (3, 0)
+
+def test_failed_rows_keep_the_checkpoint_and_are_retried(tmp_path):
+    output = str(tmp_path / "respuestas.csv")
+    answered, failed, _ = run(rows(3), output, FakeAnswerer(fail_on={"¿Pregunta 1?"}))
+    assert (answered, failed) == (2, 1)
+    assert os.path.exists(checkpoint_path(output))
+
+    retry = FakeAnswerer()
+    answered, failed, _ = run(rows(3), output, retry)
+    assert retry.batches == [["¿Pregunta 1?"]]
+    assert (answered, failed) == (1, 0)
+    assert not os.path.exists(checkpoint_path(output))
@@ -0,0 +1,63 @@
+from langchain_core.documents import Document
+from src.context_assembly import assemble_context, _merge_blocks
+
+PAGE_TEXT = (
+    "Art. 1.- El Ecuador es un Estado constitucional de derechos y justicia.\n\n"
+    "Art. 2.- La bandera, el escudo y el himno nacional son los símbolos de la patria."
+)
+
+def chunk(text, start, page=1, chunk_id=None, page_chars=None, filename="constitucion.pdf"):
+    metadata = {"filename": filename, "page": page, "page_label": str(page), "start_index": start}
+    if chunk_id is not None:
+        metadata["id"] = chunk_id
+    if page_chars is not None:
+        metadata["page_chars"] = page_chars
+    return Document(page_content=f"Tipo: constitucion. Archivo: {filename}. Página: {page}. {text}", metadata=metadata)
+
+def split(text, cut):
+    """Dos chunks contiguos como los deja el splitter: con el espacio en blanco del corte recortado"""
+    first, second = text[:cut].rstrip(), text[cut:].lstrip()
+    return (first, 0), (second, len(text) - len(second))
+
+def test_contiguous_chunks_with_trimmed_whitespace_are_merged():
+    (first, first_start), (second, second_start) = split(PAGE_TEXT, PAGE_TEXT.index("Art. 2"))
+    assert second_start - len(first) == 2
+    blocks = _merge_blocks([chunk(second, second_start, chunk_id="b"), chunk(first, first_start, chunk_id="a")])
+    assert len(blocks) == 1
+    assert blocks[0].text == first + "\n" + second
+    assert blocks[0].rank == 0
+
+def test_overlapping_chunks_are_merged_without_repetition():
+    first, second_start = PAGE_TEXT[:90], 60
+    blocks = _merge_blocks([chunk(first, 0, chunk_id="a"), chunk(PAGE_TEXT[second_start:], second_start, chunk_id="b")])
+    assert len(blocks) == 1
+    assert blocks[0].text == PAGE_TEXT
+
+def test_distant_chunks_on_the_same_page_stay_separate():
+    blocks = _merge_blocks([chunk(PAGE_TEXT[:20], 0, chunk_id="a"), chunk(PAGE_TEXT[40:60], 40, chunk_id="b")])
+    assert len(blocks) == 2
+
+def test_next_page_is_merged_only_when_the_block_reaches_the_page_end():
+    page_one = PAGE_TEXT[:70]
+    reaching = [chunk(page_one, 0, chunk_id="a", page_chars=len(page_one)), chunk("Art. 3.- Continúa.", 0, page=2, chunk_id="b")]
+    blocks = _merge_blocks(reaching)
+    assert len(blocks) == 1
+    assert blocks[0].header() == "Archivo: constitucion.pdf. Página: 1-2."
+
+    short = [chunk(page_one, 0, chunk_id="a", page_chars=len(page_one) + 100), chunk("Art. 3.- Continúa.", 0, page=2, chunk_id="b")]
+    assert len(_merge_blocks(short)) == 2
+
+def test_other_files_are_never_merged():
+    blocks = _merge_blocks([chunk(PAGE_TEXT, 0, chunk_id="a"), chunk(PAGE_TEXT, 0, chunk_id="b", filename="coip.pdf")])
+    assert len(blocks) == 2
+
+def test_assembled_context_drops_repeated_prefix_and_respects_budget():
+    (first, first_start), (second, second_start) = split(PAGE_TEXT, PAGE_TEXT.index("Art. 2"))
+    docs = [chunk(first, first_start, chunk_id="a"), chunk(second, second_start, chunk_id="b")]
+    context, tokens_before, tokens_after = assemble_context(docs)
+    assert context.count("Tipo:") == 0
+    assert context.startswith("Archivo: constitucion.pdf. Página: 1.\n")
+    assert tokens_after < tokens_before
+
+    context, _, tokens_after = assemble_context(docs, max_tokens=60)
+    assert tokens_after <= 60
@@ -0,0 +1,56 @@
+import threading
+from src.conversation_memory import SummaryBufferMemory
+
+def conversation(turns):
+    messages = []
+    for i in range(turns):
+        messages += [{"role": "user", "content": f"pregunta {i}"}, {"role": "assistant", "content": f"respuesta {i}"}]
+    return messages
+
+def test_summary_is_updated_in_background_without_blocking_the_request():
+    release = threading.Event()
+
+    def summarize(summary, messages):
+        release.wait(timeout=5)
+        return " ".join(message["content"] for message in messages)
+
+    memory = SummaryBufferMemory(summarize, max_turns=1, max_tokens=10_000)
+    messages = conversation(3)
+    # Mientras el resumen está en curso se envían los mensajes sin resumir tal cual
+    assert memory.history(messages) == messages
+    release.set()
+    memory.wait()
+    assert memory.summarized == 4
+    assert memory.summary == "pregunta 0 respuesta 0 pregunta 1 respuesta 1"
+
+    compact = memory.history(messages)
+    assert compact[0]["role"] == "system" and memory.summary in compact[0]["content"]
+    assert compact[1:] == messages[4:]
+
+def test_failed_summary_keeps_messages_and_is_retried():
+    calls = []
+
+    def summarize(summary, messages):
+        calls.append(len(messages))
+        if len(calls) == 1:
+            raise ConnectionError("LLM no disponible")
+        return "resumen"
+
+    memory = SummaryBufferMemory(summarize, max_turns=1, max_tokens=10_000)
+    messages = conversation(2)
+    memory.history(messages)
+    memory.wait()
+    assert memory.summarized == 0
+    memory.history(messages)
+    memory.wait()
+    assert (memory.summary, memory.summarized) == ("resumen", 2)
+
+def test_new_conversation_discards_pending_summary():
+    release = threading.Event()
+    memory = SummaryBufferMemory(lambda summary, messages: release.wait(timeout=5) and "antiguo", max_turns=1, max_tokens=10_000)
+    memory.history(conversation(3))
+    pending = memory._pending
+    assert memory.history(conversation(1)) == conversation(1)
+    release.set()
+    pending.result()
+    assert (memory.summary, memory.summarized) == ("", 0)
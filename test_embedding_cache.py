@@ -0,0 +1,67 @@
+import os
+import numpy as np
+from benchmarks.fakes import FakeEmbeddings
+from src.embedding_cache import CachedEmbeddings, EmbeddingCache
+
+DIM = 8
+MODEL = "fake"
+
+def cached_embeddings(directory, **kwargs):
+    return CachedEmbeddings(FakeEmbeddings(DIM), EmbeddingCache(str(directory), MODEL), **kwargs)
+
+def test_documents_are_cached_on_disk_and_rows_stay_aligned(tmp_path):
+    embeddings = cached_embeddings(tmp_path)
+    texts = ["artículo uno", "artículo dos", "artículo uno"]
+    vectors = embeddings.embed_documents(texts)
+    assert isinstance(vectors[0], list) and vectors[0] == vectors[2]
+
+    reopened = cached_embeddings(tmp_path)
+    arrays = reopened.embed_documents_array(["artículo dos", "artículo tres", "artículo uno"])
+    assert reopened.cache.stats()["hits"] == 2
+    fake = FakeEmbeddings(DIM)
+    for text, vector in zip(["artículo dos", "artículo tres", "artículo uno"], arrays):
+        np.testing.assert_allclose(vector, fake.embed_query(text), rtol=1e-6)
+
+def test_interrupted_write_is_repaired(tmp_path):
+    embeddings = cached_embeddings(tmp_path)
+    embeddings.embed_documents(["uno", "dos"])
+    # Corte entre la escritura de los vectores y la de sus claves: una fila huérfana y una clave a medias
+    with open(tmp_path / "vectors.bin", "ab") as f:
+        f.write(np.ones(DIM, dtype=np.float32).tobytes())
+    with open(tmp_path / "keys.txt", "ab") as f:
+        f.write(b"clave-a-medi")
+
+    reopened = cached_embeddings(tmp_path)
+    assert os.path.getsize(tmp_path / "vectors.bin") == 2 * DIM * 4
+    assert (tmp_path / "keys.txt").read_bytes().count(b"\n") == 2
+    vectors = reopened.embed_documents(["tres", "uno", "dos"])
+    fake = FakeEmbeddings(DIM)
+    for text, vector in zip(["tres", "uno", "dos"], vectors):
+        np.testing.assert_allclose(vector, fake.embed_query(text), rtol=1e-6)
+    # "tres" ocupa la fila de la huérfana, no una posterior
+    assert reopened.cache._rows[reopened.cache.key("tres")] == 2
+
+def test_keys_without_vectors_invalidate_the_cache(tmp_path):
+    cached_embeddings(tmp_path).embed_documents(["uno", "dos"])
+    os.truncate(tmp_path / "vectors.bin", DIM * 4)
+    reopened = cached_embeddings(tmp_path)
+    assert reopened.cache.stats()["entries"] == 0
+    assert reopened.embed_documents(["dos"])[0] == FakeEmbeddings(DIM).embed_query("dos")
+
+def test_two_instances_share_the_directory(tmp_path):
+    first, second = cached_embeddings(tmp_path), cached_embeddings(tmp_path)
+    first.embed_documents(["uno"])
+    second.embed_documents(["dos"])
+    first.embed_documents(["tres"])
+    reopened = cached_embeddings(tmp_path)
+    fake = FakeEmbeddings(DIM)
+    for text, vector in zip(["uno", "dos", "tres"], reopened.embed_documents_array(["uno", "dos", "tres"])):
+        np.testing.assert_allclose(vector, fake.embed_query(text), rtol=1e-6)
+    assert reopened.cache.stats()["hits"] == 3
+
+def test_queries_only_use_the_memory_lru(tmp_path):
+    embeddings = cached_embeddings(tmp_path, query_cache_size=2)
+    embeddings.embed_query("pregunta uno")
+    embeddings.embed_queries(["pregunta dos", "pregunta tres"])
+    assert not (tmp_path / "keys.txt").exists()
+    assert len(embeddings._queries) == 2
@@ -0,0 +1,35 @@
+from src.chunk_store import ChunkStore
+from src.utils.filename_matcher import FilenameMatcher
+
+FILENAMES = [
+    "codigo civil cc.pdf",
+    "codigo organico integral penal coip.pdf",
+    "constitucion de la republica del ecuador act ene 2021.pdf",
+    "ley organica para impulsar la iniciativa privada en la generacion de energias (1).pdf",
+    "ley organica de salud.pdf",
+]
+
+def test_titles_match_without_accents_or_short_suffixes():
+    matcher = FilenameMatcher(FILENAMES)
+    assert matcher.match("¿Qué dice el Código Civil sobre el matrimonio?") == ["codigo civil cc.pdf"]
+    assert matcher.match("Art. 140 del COIP y del código orgánico integral penal") == ["codigo organico integral penal coip.pdf"]
+    assert matcher.match("según la Constitución de la República del Ecuador") == [
+        "constitucion de la republica del ecuador act ene 2021.pdf"
+    ]
+
+def test_unique_prefixes_match_but_shared_ones_do_not():
+    matcher = FilenameMatcher(FILENAMES)
+    assert matcher.match("la ley orgánica para impulsar la iniciativa privada") == [
+        "ley organica para impulsar la iniciativa privada en la generacion de energias (1).pdf"
+    ]
+    assert matcher.match("¿qué dice la ley orgánica?") == []
+
+def test_chunk_store_lists_filenames(tmp_path):
+    store = ChunkStore(str(tmp_path / "chunks.db"))
+    store.put_many([
+        ("a:1:0", "texto", "resumen", {"filename": "codigo civil cc.pdf"}, None),
+        ("a:2:0", "texto", "resumen", {"filename": "codigo civil cc.pdf"}, None),
+        ("b:1:0", "texto", "resumen", {"filename": "ley organica de salud.pdf"}, None),
+        ("c:1:0", "texto", "resumen", {}, None),
+    ])
+    assert store.filenames() == ["codigo civil cc.pdf", "ley organica de salud.pdf"]
@@ -0,0 +1,94 @@
+import os
+from types import SimpleNamespace
+import pytest
+from langchain_core.documents import Document
+from benchmarks.fakes import FakeEmbeddings, FakeVectorIndex
+from src import populate_database
+from src.chunk_store import ChunkStore
+from src.index_manifest import IndexManifest
+from src.pdf_extraction import list_pdf_files
+
+PAGE_BREAK = "\f"
+
+def load_pages(dir_path, doc_type, existing_files, **kwargs):
+    """Sustituto de la extracción de PDF: cada archivo es texto plano con páginas separadas por \\f"""
+    documents = []
+    for source in list_pdf_files(dir_path):
+        if source in existing_files:
+            continue
+        with open(source, encoding="utf-8") as f:
+            pages = f.read().split(PAGE_BREAK)
+        for number, text in enumerate(pages):
+            documents.append(Document(page_content=text, metadata={
+                "source": source, "filename": os.path.basename(source), "doc_type": doc_type,
+                "page": number, "page_label": str(number + 1),
+            }))
+    return documents
+
+@pytest.fixture
+def workspace(tmp_path, monkeypatch):
+    embeddings = FakeEmbeddings(16)
+    index = FakeVectorIndex(str(tmp_path / "index"), embeddings)
+    inserted = []
+
+    def add_to_index(chunks, target):
+        # Sin resúmenes ni lematización: solo interesa qué chunks se insertan
+        inserted.append(sorted(chunk.metadata["id"] for chunk in chunks))
+        vectors = embeddings.embed_documents([chunk.page_content for chunk in chunks])
+        target.upsert([
+            {"id": chunk.metadata["id"], "values": vector, "metadata": {"source": chunk.metadata["source"]}}
+            for chunk, vector in zip(chunks, vectors)
+        ])
+
+    monkeypatch.setattr(populate_database, "ROOT_DATA_PATH", str(tmp_path / "data"))
+    monkeypatch.setattr(populate_database, "load_new_documents", load_pages)
+    monkeypatch.setattr(populate_database, "add_to_index", add_to_index)
+    chunk_store = ChunkStore(str(tmp_path / "chunks.db"))
+    monkeypatch.setattr(populate_database, "get_chunk_store", lambda: chunk_store)
+    laws = tmp_path / "data" / "03_leyes"
+    laws.mkdir(parents=True)
+    manifest_path = str(tmp_path / "manifest.json")
+
+    def sync():
+        inserted.clear()
+        manifest = IndexManifest.load(manifest_path)
+        populate_database.sync_database(index, manifest, SimpleNamespace(workers=1, pages_per_task=1))
+        index.persist()
+        return IndexManifest.load(manifest_path)
+
+    return SimpleNamespace(laws=laws, index=index, inserted=inserted, sync=sync)
+
+def write_pdf(path, *pages):
+    path.write_text(PAGE_BREAK.join(pages), encoding="utf-8")
+    return str(path)
+
+def test_sync_only_touches_changed_and_removed_files(workspace):
+    changed = write_pdf(workspace.laws / "ley a.pdf", "Art. 1.- Primera página.", "Art. 2.- Segunda página.")
+    removed = write_pdf(workspace.laws / "ley b.pdf", "Art. 1.- Ley que se eliminará.")
+    kept = write_pdf(workspace.laws / "ley c.pdf", "Art. 1.- Ley que no cambia.")
+    manifest = workspace.sync()
+    assert manifest.sources() == {changed, removed, kept}
+    assert set(workspace.index.ids) == manifest.chunk_ids(changed) | manifest.chunk_ids(removed) | manifest.chunk_ids(kept)
+    first_ids = {source: manifest.chunk_ids(source) for source in manifest.sources()}
+
+    # Cambia solo la segunda página de "ley a" y desaparece "ley b"
+    write_pdf(workspace.laws / "ley a.pdf", "Art. 1.- Primera página.", "Art. 2.- Segunda página reformada.")
+    os.remove(removed)
+    manifest = workspace.sync()
+
+    assert manifest.sources() == {changed, kept}
+    new_ids = manifest.chunk_ids(changed) - first_ids[changed]
+    stale_ids = first_ids[changed] - manifest.chunk_ids(changed)
+    assert len(new_ids) == len(stale_ids) == 1
+    # Solo se reinserta el chunk de la página modificada; la página intacta conserva su vector
+    assert workspace.inserted == [sorted(new_ids)]
+    assert manifest.chunk_ids(kept) == first_ids[kept]
+    assert set(workspace.index.ids) == manifest.chunk_ids(changed) | manifest.chunk_ids(kept)
+
+def test_sync_without_changes_does_not_insert(workspace):
+    write_pdf(workspace.laws / "ley a.pdf", "Art. 1.- Texto.")
+    workspace.sync()
+    ids = list(workspace.index.ids)
+    workspace.sync()
+    assert workspace.inserted == []
+    assert workspace.index.ids == ids
@@ -0,0 +1,72 @@
+import itertools
+import time
+import pytest
+from benchmarks.fakes import FakeEmbeddings, StageRecorder
+from src.ingestion_pipeline import Pipeline, batched
+
+def test_batches_flow_through_every_stage_in_order():
+    embeddings = FakeEmbeddings(dim=8, recorder=StageRecorder())
+    received = []
+    pipeline = (
+        Pipeline(max_in_flight=2)
+        .add_stage("filter", lambda batch: [text for text in batch if text] or None)
+        .add_stage("embed", lambda batch: list(zip(batch, embeddings.embed_documents(batch))))
+        .add_stage("sink", received.extend)
+    )
+    texts = [f"texto {i}" if i % 3 else "" for i in range(20)]
+    timings = pipeline.run(batched(texts, 4))
+    assert [text for text, _ in received] == [text for text in texts if text]
+    assert set(timings) == {"filter", "embed", "sink"}
+    assert len(embeddings.recorder.durations["embed"]) == 5
+
+def test_stage_error_stops_the_pipeline_and_is_raised():
+    produced = itertools.count()
+
+    def source():
+        # Generador sin fin: solo termina si el pipeline deja de pedir lotes
+        for i in produced:
+            yield [i]
+
+    def fail(batch):
+        if batch[0] == 3:
+            raise ValueError("lote inválido")
+        return batch
+
+    after_failure = []
+    pipeline = Pipeline(max_in_flight=1).add_stage("validate", fail).add_stage("sink", after_failure.append)
+    started = time.perf_counter()
+    with pytest.raises(RuntimeError, match="'validate'") as raised:
+        pipeline.run(source())
+    assert isinstance(raised.value.__cause__, ValueError)
+    assert time.perf_counter() - started < 5
+    assert [batch[0] for batch in after_failure] == [0, 1, 2]
+    # Con colas de un elemento, la fuente no avanza mucho más allá del lote que falló
+    assert next(produced) < 10
+
+def test_source_error_is_raised_after_in_flight_batches_finish():
+    def source():
+        yield [1]
+        raise OSError("PDF ilegible")
+
+    pipeline = Pipeline().add_stage("sink", lambda batch: None)
+    with pytest.raises(RuntimeError, match="'source'") as raised:
+        pipeline.run(source())
+    assert isinstance(raised.value.__cause__, OSError)
+
+def test_slow_stage_applies_back_pressure():
+    pulled = []
+
+    def source():
+        for i in range(10):
+            pulled.append(i)
+            yield [i]
+
+    in_progress = []
+
+    def slow(batch):
+        in_progress.append(len(pulled) - batch[0])
+        time.sleep(0.01)
+
+    Pipeline(max_in_flight=1).add_stage("slow", slow).run(source())
+    # Lotes leídos por delante del que se procesa: el de la cola y el que espera para entrar
+    assert max(in_progress) <= 3
@@ -0,0 +1,75 @@
+import numpy as np
+import pytest
+from benchmarks.fakes import FakeEmbeddings, FakeVectorIndex
+from src.local_vectorstore import LocalVectorStore
+
+DIM = 32
+
+def random_vectors(count, seed=0):
+    rng = np.random.default_rng(seed)
+    return rng.standard_normal((count, DIM)).astype(np.float32)
+
+def build(directory, count=400, **kwargs):
+    index = FakeVectorIndex(str(directory), FakeEmbeddings(DIM), **kwargs)
+    vectors = random_vectors(count)
+    index.upsert([
+        {
+            "id": f"chunk-{i}",
+            "values": vector.tolist(),
+            "metadata": {"doc_type": "ley" if i % 2 else "codigo", "filename": f"archivo {i % 40}.pdf", "text": f"texto {i}"},
+        }
+        for i, vector in enumerate(vectors)
+    ])
+    index.persist()
+    return index, vectors
+
+def exact_top(vectors, query, k, rows=None):
+    normalized = vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+    scores = normalized @ (query / np.linalg.norm(query))
+    candidates = np.arange(len(vectors)) if rows is None else np.asarray(rows)
+    return list(candidates[np.argsort(-scores[candidates])[:k]])
+
+def test_filters_by_partition_field_and_in_operator(tmp_path):
+    index, _ = build(tmp_path)
+    query = random_vectors(1, seed=1)[0]
+    assert all(index.metadatas[row]["doc_type"] == "ley" for row, _ in index.search_by_vector(query, k=10, filter={"doc_type": "ley"}))
+    rows = [row for row, _ in index.search_by_vector(query, k=50, filter={"filename": {"$in": ["archivo 3.pdf", "archivo 4.pdf"]}})]
+    assert len(rows) == 20
+    assert {index.metadatas[row]["filename"] for row in rows} == {"archivo 3.pdf", "archivo 4.pdf"}
+    assert index.search_by_vector(query, k=5, filter={"filename": "no existe.pdf"}) == []
+
+@pytest.mark.parametrize("dtype", ["int8", "float16"])
+def test_quantized_first_pass_is_rescored_in_float32(tmp_path, dtype):
+    index, vectors = build(tmp_path, dtype=dtype, rescore_factor=8)
+    assert index.quantized is not None
+    for seed in range(5):
+        query = random_vectors(1, seed=seed + 10)[0]
+        results = index.search_by_vector(query, k=5)
+        # Puntuaciones float32 exactas aunque los candidatos salgan de la copia cuantizada
+        expected = vectors[[row for row, _ in results]] @ query
+        expected /= np.linalg.norm(vectors[[row for row, _ in results]], axis=1) * np.linalg.norm(query)
+        np.testing.assert_allclose([score for _, score in results], expected, rtol=1e-4)
+        assert results[0][0] == exact_top(vectors, query, 1)[0]
+
+def test_selective_filter_with_ivf_still_returns_k_results(tmp_path):
+    index, vectors = build(tmp_path, nlist=8, nprobe=1)
+    assert index.centroids is not None
+    query = random_vectors(1, seed=2)[0]
+    filter_rows = [i for i in range(len(vectors)) if i % 40 == 7]
+    results = index.search_by_vector(query, k=5, filter={"filename": "archivo 7.pdf"})
+    assert [row for row, _ in results] == exact_top(vectors, query, 5, filter_rows)
+
+def test_persist_and_load_round_trip(tmp_path):
+    index, _ = build(tmp_path, nlist=4, dtype="int8")
+    index.delete(ids=["chunk-0", "chunk-1"])
+    index.upsert([{"id": "nuevo", "values": random_vectors(1, seed=3)[0].tolist(), "metadata": {"doc_type": "ley", "text": "nuevo"}}])
+    index.persist()
+
+    loaded = LocalVectorStore.load(str(tmp_path), FakeEmbeddings(DIM), nlist=4, dtype="int8")
+    assert loaded.ids == index.ids
+    assert "chunk-0" not in loaded.ids and "nuevo" in loaded.ids
+    assert loaded.centroids is not None and loaded.quantized is not None
+    query = random_vectors(1, seed=4)[0]
+    assert loaded.search_by_vector(query, k=5, filter={"doc_type": "ley"}) == index.search_by_vector(query, k=5, filter={"doc_type": "ley"})
+    doc = loaded.similarity_search_by_vector(random_vectors(1, seed=3)[0].tolist(), k=1)[0]
+    assert (doc.id, doc.page_content) == ("nuevo", "nuevo")
@@ -0,0 +1,31 @@
+import pytest
+
+pytest.importorskip("spacy")
+
+from src.text_preprocessing import (
+    get_nlp, preprocess_text, preprocess_texts, _join_lemmas, _normalize
+)
+
+LEGAL_TEXTS = [
+    "Art. 66.- Se reconoce y garantizará a las personas el derecho a la inviolabilidad de la vida.",
+    "Las servidoras y servidores públicos serán responsables administrativa, civil y penalmente.",
+    "¿Qué sanción corresponde por el incumplimiento de las obligaciones tributarias?",
+    "El juez de garantías penales resolverá sobre la prisión preventiva en audiencia oral.",
+    "Disposición transitoria primera: la Asamblea Nacional aprobará las leyes en el plazo de 120 días.",
+    "",
+]
+
+@pytest.fixture(scope="module")
+def nlp():
+    try:
+        return get_nlp()
+    except OSError:
+        pytest.skip("Falta el modelo es_core_news_sm (python -m spacy download es_core_news_sm)")
+
+def test_batch_matches_single_text(nlp):
+    assert list(preprocess_texts(LEGAL_TEXTS, batch_size=2)) == [preprocess_text(text) for text in LEGAL_TEXTS]
+
+def test_disabled_components_do_not_change_lemmas(nlp):
+    # Misma salida que el pipeline completo que se usaba antes de desactivar componentes
+    full_pipeline = [_join_lemmas(nlp(_normalize(text))) for text in LEGAL_TEXTS]
+    assert [preprocess_text(text) for text in LEGAL_TEXTS] == full_pipeline